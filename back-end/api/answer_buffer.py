@@ -0,0 +1,150 @@
+"""Write-behind buffer for practice answers.
+
+When ``ANSWER_WRITE_BEHIND['ENABLED']`` is set, CheckAnswerView hands its
+UserAnswer rows to this buffer instead of inserting them itself. A
+background thread flushes the buffer with one ``bulk_create`` (plus the
+matching answer events) every ``FLUSH_ROWS`` rows or
+``FLUSH_INTERVAL_MS`` milliseconds, whichever comes first.
+
+The buffer holds at most ``MAX_SIZE`` rows; when it is full, ``add`` returns
+False and the caller writes synchronously. Pending rows are flushed when the
+process exits. Rows still in memory are lost if the process is killed, so
+keep the buffer disabled where every answer must be durable on response.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .answer_events import record_answer_events
+from .models import AnswerEvent, UserAnswer
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    'ENABLED': False,
+    'MAX_SIZE': 10000,
+    'FLUSH_ROWS': 500,
+    'FLUSH_INTERVAL_MS': 200,
+}
+
+
+def get_options():
+    return {**DEFAULT_OPTIONS, **getattr(settings, 'ANSWER_WRITE_BEHIND', {})}
+
+
+def write_answers(answers):
+    """Insert answers and their answer events in one transaction"""
+    with transaction.atomic():
+        UserAnswer.objects.bulk_create(answers)
+        record_answer_events([
+            AnswerEvent(
+                user=answer.user,
+                question=answer.question,
+                source='practice',
+                is_correct=answer.is_correct,
+                similarity_score=answer.similarity_score,
+                created_at=answer.created_at
+            )
+            for answer in answers
+        ])
+
+
+class AnswerWriteBuffer:
+    """Bounded in-memory queue of UserAnswer rows flushed by a background thread"""
+
+    def __init__(self, max_size, flush_rows, flush_interval):
+        self.max_size = max_size
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.condition = threading.Condition()
+        self.flush_lock = threading.Lock()
+        self.thread = None
+        self.stopping = False
+        self.flushed_count = 0
+        self.fallback_count = 0
+
+    def add(self, answer):
+        """Queue an unsaved UserAnswer; False if the buffer is full"""
+        with self.condition:
+            if len(self.pending) >= self.max_size or self.stopping:
+                self.fallback_count += 1
+                return False
+            self.pending.append(answer)
+            if self.thread is None:
+                self._start()
+            if len(self.pending) >= self.flush_rows:
+                self.condition.notify()
+        return True
+
+    def _start(self):
+        self.thread = threading.Thread(target=self._run, name='answer-write-behind', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.stopping and len(self.pending) < self.flush_rows:
+                    self.condition.wait(self.flush_interval)
+                if self.stopping and not self.pending:
+                    return
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        """Write every queued answer now; returns the number of rows written"""
+        with self.flush_lock:
+            with self.condition:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            try:
+                write_answers(batch)
+            except Exception:
+                logger.exception('Failed to flush %s buffered answers; retrying one by one', len(batch))
+                written = 0
+                for answer in batch:
+                    try:
+                        write_answers([answer])
+                        written += 1
+                    except Exception:
+                        logger.exception('Dropped buffered answer for question %s', answer.question_id)
+                self.flushed_count += written
+                return written
+            self.flushed_count += len(batch)
+            return len(batch)
+
+    def stop(self):
+        """Flush pending rows and stop the background thread"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_answer_buffer():
+    """The process-wide buffer, or None when write-behind is disabled"""
+    global _buffer
+    options = get_options()
+    if not options['ENABLED']:
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AnswerWriteBuffer(
+                    max_size=options['MAX_SIZE'],
+                    flush_rows=options['FLUSH_ROWS'],
+                    flush_interval=options['FLUSH_INTERVAL_MS'] / 1000
+                )
+    return _buffer
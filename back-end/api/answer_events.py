@@ -0,0 +1,278 @@
+"""Answer event log and the projections derived from it.
+
+Every answer endpoint appends an ``AnswerEvent`` and then hands it to the
+projections below, which keep the derived state up to date:
+
+* ``rollups``       - UserDailyRollup counters
+* ``streaks``       - UserPoints current/longest streak
+* ``task_progress`` - UserTaskProgress for every weekly task type (``api.task_rules``)
+* ``points``        - UserPoints total and weekly points
+
+Each projection can also be rebuilt from the log (``manage.py
+rebuild_projections``): ``reset`` returns its state to the opening balances
+recorded when the log started (migration 0011; answers stored before it
+have no events), every event is streamed through ``apply`` in id order, and
+``finish`` adds anything that does not come from answers.
+"""
+from django.db.models import Case, Exists, F, OuterRef, Q, Sum, When
+from django.utils import timezone
+
+from .counters import add_points
+from .models import AnswerEvent, DailyTaskCompletion, UserDailyRollup, UserPoints, UserTaskProgress
+from .task_rules import TASK_RULES, evaluate_tasks, week_start_of
+
+
+def _filter_users(queryset, user_ids):
+    return queryset if user_ids is None else queryset.filter(user_id__in=user_ids)
+
+
+def _opening_dates(user_ids):
+    return dict(
+        UserPoints.objects.filter(user_id__in=user_ids, opening_date__isnull=False)
+        .values_list('user_id', 'opening_date')
+    )
+
+
+class RollupProjection:
+    """Per-user, per-day answer counters.
+
+    Days up to the user's ``UserPoints.opening_date`` hold history from
+    before the log: rebuilds keep those rows and skip the events on them.
+    """
+
+    def reset(self, user_ids=None):
+        opening = UserPoints.objects.filter(user_id=OuterRef('user_id'), opening_date__gte=OuterRef('date'))
+        _filter_users(UserDailyRollup.objects.all(), user_ids).filter(~Exists(opening)).delete()
+
+    def apply(self, events, rebuilding=False):
+        opening_dates = _opening_dates({event.user_id for event in events}) if rebuilding else {}
+        # (user_id, date, source) -> [answered, correct, points, seconds]
+        totals = {}
+        for event in events:
+            if event.user_id is None:
+                continue
+            opening_date = opening_dates.get(event.user_id)
+            if opening_date is not None and event.activity_date <= opening_date:
+                continue
+            row = totals.setdefault((event.user_id, event.activity_date, event.source), [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += 1 if event.is_correct else 0
+            row[2] += event.points
+            row[3] += event.seconds_spent
+        for (user_id, date, source), (answered, correct, points, seconds) in totals.items():
+            UserDailyRollup.record_answers(user_id, source, answered, correct, points, seconds, date=date)
+
+    def finish(self, user_ids=None):
+        pass
+
+
+class TaskProgressProjection:
+    """Weekly task progress, evaluated by the task rule engine"""
+
+    def reset(self, user_ids=None):
+        rows = _filter_users(UserTaskProgress.objects.filter(task__task_type__in=TASK_RULES), user_ids)
+        # Tasks already complete before the log keep their completion and reward
+        rows.exclude(opening_progress__gte=F('task__target_count')).update(
+            current_progress=F('opening_progress'),
+            is_completed=False,
+            completed_at=None,
+            points_earned=0,
+            updated_at=timezone.now()
+        )
+
+    def apply(self, events, rebuilding=False):
+        # Rewards are part of the points projection's rebuild (see PointsProjection.finish)
+        evaluate_tasks(events, award_points=not rebuilding)
+
+    def finish(self, user_ids=None):
+        pass
+
+
+class StreakProjection:
+    """Daily activity streaks on UserPoints"""
+
+    def reset(self, user_ids=None):
+        _filter_users(UserPoints.objects.all(), user_ids).update(
+            current_streak=0,
+            longest_streak=0,
+            last_activity_date=None,
+            updated_at=timezone.now()
+        )
+        # Answers before the log have no events: start from their rollup days
+        opening_days = {}
+        rollups = UserDailyRollup.objects.filter(questions_answered__gt=0, user__points__opening_date__gte=F('date'))
+        for user_id, date in _filter_users(rollups, user_ids).values_list('user_id', 'date'):
+            opening_days.setdefault(user_id, set()).add(date)
+        for user_points in UserPoints.objects.filter(user_id__in=opening_days):
+            for date in sorted(opening_days[user_points.user_id]):
+                user_points.advance_streak(date)
+            user_points.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date', 'updated_at'])
+
+    def apply(self, events, rebuilding=False):
+        dates = {}
+        for event in events:
+            if event.user_id is not None:
+                dates.setdefault(event.user_id, set()).add(event.activity_date)
+        if not dates:
+            return
+
+        rows = {points.user_id: points for points in UserPoints.objects.filter(user_id__in=dates)}
+        for user_id, user_dates in dates.items():
+            user_points = rows.get(user_id) or UserPoints.objects.get_or_create(user_id=user_id)[0]
+            changed = False
+            for date in sorted(user_dates):
+                changed = user_points.advance_streak(date) or changed
+            if changed:
+                user_points.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date', 'updated_at'])
+
+    def finish(self, user_ids=None):
+        # Daily activity reports advance streaks too: replay them merged with the
+        # answer days, taken from the rollups so that days before the log count
+        days = {}
+        reports = _filter_users(DailyTaskCompletion.objects.all(), user_ids).values_list('user_id', 'completion_date')
+        for user_id, date in reports:
+            days.setdefault(user_id, set()).add(date)
+        if not days:
+            return
+        answers = UserDailyRollup.objects.filter(user_id__in=days, questions_answered__gt=0).values_list('user_id', 'date')
+        for user_id, date in answers:
+            days[user_id].add(date)
+
+        for user_points in UserPoints.objects.filter(user_id__in=days):
+            user_points.current_streak = user_points.longest_streak = 0
+            user_points.last_activity_date = None
+            for date in sorted(days[user_points.user_id]):
+                user_points.advance_streak(date)
+            user_points.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date', 'updated_at'])
+
+
+class PointsProjection:
+    """Total and weekly points on UserPoints.
+
+    Rebuilds start from the opening balances, answer points come from the
+    log and ``finish`` adds the points recorded elsewhere (daily activity
+    reports and completed weekly tasks).
+    """
+
+    def reset(self, user_ids=None):
+        week_start = week_start_of(timezone.now().date())
+        _filter_users(UserPoints.objects.all(), user_ids).update(
+            total_points=F('opening_total_points'),
+            weekly_points=Case(When(opening_week_start=week_start, then=F('opening_weekly_points')), default=0),
+            updated_at=timezone.now()
+        )
+
+    def apply(self, events, rebuilding=False):
+        week_start = week_start_of(timezone.now().date())
+        totals = {}
+        for event in events:
+            if event.user_id is not None and event.points:
+                row = totals.setdefault(event.user_id, [0, 0])
+                row[0] += event.points
+                row[1] += event.points if event.activity_date >= week_start else 0
+        for user_id, (total, weekly) in totals.items():
+            add_points(user_id, total, weekly)
+
+    def finish(self, user_ids=None):
+        week_start = week_start_of(timezone.now().date())
+        totals = {}
+        activity = _filter_users(DailyTaskCompletion.objects.all(), user_ids).values('user_id').annotate(
+            total=Sum('points_earned'),
+            weekly=Sum('points_earned', filter=Q(completion_date__gte=week_start))
+        )
+        rewards = _filter_users(UserTaskProgress.objects.filter(is_completed=True), user_ids).values('user_id').annotate(
+            total=Sum('points_earned'),
+            weekly=Sum('points_earned', filter=Q(week_start__gte=week_start))
+        )
+        for row in list(activity) + list(rewards):
+            user_totals = totals.setdefault(row['user_id'], [0, 0])
+            user_totals[0] += row['total'] or 0
+            user_totals[1] += row['weekly'] or 0
+        for user_id, (total, weekly) in totals.items():
+            if total or weekly:
+                add_points(user_id, total, weekly)
+
+
+# Applied (and rebuilt) in this order: task rules read the rollups and
+# streaks, and points come last so that task rewards completed during a
+# rebuild are counted by PointsProjection.finish
+PROJECTIONS = {
+    'rollups': RollupProjection(),
+    'streaks': StreakProjection(),
+    'task_progress': TaskProgressProjection(),
+    'points': PointsProjection(),
+}
+
+
+def record_answer_events(events):
+    """Append events to the log and update every projection.
+
+    Call it inside the transaction that stores the graded answers. The cost
+    is fixed per call, not per event: one insert for the events, one
+    counter update per (user, day, source) for the rollups, one read of the
+    streak rows, one read per task measure needed by the active tasks, the
+    task upsert and its read-back, and one points update per user with
+    points (plus one per user completing a task). Counter updates share the
+    caller's transaction instead of opening savepoints.
+    """
+    for event in events:
+        if event.activity_date is None:
+            event.activity_date = event.created_at.date()
+    AnswerEvent.objects.bulk_create(events)
+    for projection in PROJECTIONS.values():
+        projection.apply(events)
+    return events
+
+
+def record_answer_event(**fields):
+    """Append a single event (AnswerEvent field values) and update every projection"""
+    return record_answer_events([AnswerEvent(**fields)])[0]
+
+
+def projection_state(names, user_ids=None):
+    """Values a rebuild of the named projections is expected to reproduce.
+
+    Maps ('points', user_id) to (total_points, weekly_points) and
+    ('task_progress', progress_id) to (current_progress, is_completed).
+    """
+    state = {}
+    if 'points' in names:
+        rows = _filter_users(UserPoints.objects.all(), user_ids).values_list('user_id', 'total_points', 'weekly_points')
+        for user_id, total, weekly in rows:
+            state[('points', user_id)] = (total, weekly)
+    if 'task_progress' in names:
+        rows = _filter_users(UserTaskProgress.objects.filter(task__task_type__in=TASK_RULES), user_ids).values_list(
+            'id', 'current_progress', 'is_completed'
+        )
+        for progress_id, progress, completed in rows:
+            state[('task_progress', progress_id)] = (progress, completed)
+    return state
+
+
+def rebuild_projections(names, user_ids=None, batch_size=2000):
+    """Recompute the named projections from the log in one streaming pass.
+
+    Returns the number of events read. Run it inside a transaction.
+    """
+    projections = [PROJECTIONS[name] for name in PROJECTIONS if name in names]
+    for projection in projections:
+        projection.reset(user_ids)
+
+    events = _filter_users(AnswerEvent.objects.all(), user_ids).order_by('id')
+    count = 0
+    batch = []
+    for event in events.iterator(chunk_size=batch_size):
+        batch.append(event)
+        if len(batch) >= batch_size:
+            for projection in projections:
+                projection.apply(batch, rebuilding=True)
+            count += len(batch)
+            batch = []
+    if batch:
+        for projection in projections:
+            projection.apply(batch, rebuilding=True)
+        count += len(batch)
+
+    for projection in projections:
+        projection.finish(user_ids)
+    return count
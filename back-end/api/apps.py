@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connect the signals that keep the leaderboard index, dashboard cache,
+        # task definition cache, username cache and token cache current
+        from . import authentication, dashboard_cache, leaderboard, task_rules, user_resolver  # noqa: F401
+        # Register the system checks
+        from . import checks  # noqa: F401
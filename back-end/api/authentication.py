@@ -0,0 +1,139 @@
+"""Token authentication with a process-local cache of validated tokens.
+
+DRF's ``TokenAuthentication`` joins ``Token`` and ``User`` on every request.
+``CachedTokenAuthentication`` remembers validated tokens for
+``TOKEN_CACHE_TTL`` seconds (at most ``TOKEN_CACHE_SIZE`` of them, least
+recently used first out), so repeat requests authenticate without a query.
+
+Cached entries hold field values only; every request gets fresh Token and
+User instances. A token is dropped when it is deleted, and all of a user's
+tokens are dropped when the user is saved (e.g. deactivated) or deleted in
+this process; the TTL bounds how long a change made by another process can
+go unnoticed.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _values(instance):
+    return tuple(getattr(instance, field.attname) for field in instance._meta.concrete_fields)
+
+
+def _from_values(model, values):
+    return model.from_db(DEFAULT_DB_ALIAS, [field.attname for field in model._meta.concrete_fields], values)
+
+
+class TokenCache:
+    """Bounded LRU map of token key -> (expiry, user id, token values, user values)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Fresh (token, user) instances for a cached key, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            _, _, token_values, user_values = entry
+
+        user = _from_values(User, user_values)
+        token = _from_values(Token, token_values)
+        token.user = user
+        return token, user
+
+    def put(self, token, user):
+        ttl = getattr(settings, 'TOKEN_CACHE_TTL', 300)
+        with self.lock:
+            self.entries[token.key] = (time.monotonic() + ttl, user.pk, _values(token), _values(user))
+            self.entries.move_to_end(token.key)
+            self.keys_by_user.setdefault(user.pk, set()).add(token.key)
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            user_id = entry[1]
+            keys = self.keys_by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_user[user_id]
+
+    def discard_key(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+
+token_cache = TokenCache(getattr(settings, 'TOKEN_CACHE_SIZE', 10000))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token/User query for recently validated tokens"""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            token, user = cached
+            return (user, token)
+
+        # Raises AuthenticationFailed for unknown keys and inactive users
+        user, token = super().authenticate_credentials(key)
+        token_cache.put(token, user)
+        return (user, token)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.discard_key(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    token_cache.discard_user(instance.pk)
@@ -0,0 +1,23 @@
+"""System checks for the api app"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Dashboard snapshots and their invalidation need a cache shared by all processes"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or not backend.endswith('.LocMemCache'):
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process.',
+            hint=(
+                'Dashboard snapshots, their invalidation and the weekly task definition version '
+                'are kept in the default cache; with several workers a write handled by one '
+                'process leaves stale dashboards in the others. Set REDIS_URL or configure a '
+                'shared CACHES backend.'
+            ),
+            id='api.W001',
+        )
+    ]
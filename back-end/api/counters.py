@@ -0,0 +1,158 @@
+"""Atomic counter updates.
+
+Counters (points, answer counts) are changed with a single
+``UPDATE ... SET column = column + delta`` instead of loading the row,
+adding in Python and saving every column. Concurrent requests therefore
+never lose increments, and each write touches only the counter columns.
+
+Where the database supports ``UPDATE ... RETURNING`` (PostgreSQL, SQLite
+3.35+) the new values come back from the same statement; elsewhere they are
+read back inside the same transaction.
+
+``QuerySet.update`` does not send ``post_save``, so every counter update
+sends ``counters_updated`` with the new values for listeners such as the
+leaderboard index and the dashboard cache.
+"""
+from django.db import connection, models, transaction
+from django.db.models.sql import UpdateQuery
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+# sender=model class, values={attname: new value} (always includes pk and user_id if present)
+counters_updated = Signal()
+
+
+def _supports_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _returning_columns(model, returning):
+    fields = [model._meta.pk.attname]
+    if any(field.attname == 'user_id' for field in model._meta.concrete_fields):
+        fields.append('user_id')
+    if returning == '__all__':
+        returning = [field.attname for field in model._meta.concrete_fields]
+    fields.extend(name for name in returning if name not in fields)
+    return fields
+
+
+def _update_returning(queryset, changes, fields):
+    """Run the UPDATE through the ORM compiler with a RETURNING clause appended"""
+    model = queryset.model
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(changes)
+    sql, params = query.get_compiler(queryset.db).as_sql()
+
+    fields_by_attname = {field.attname: field for field in model._meta.concrete_fields}
+    columns = [fields_by_attname[name].get_col(model._meta.db_table) for name in fields]
+    qn = connection.ops.quote_name
+    sql = f"{sql} RETURNING {', '.join(qn(column.target.column) for column in columns)}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    converters = [
+        (column, connection.ops.get_db_converters(column) + column.get_db_converters(connection))
+        for column in columns
+    ]
+    result = []
+    for row in rows:
+        values = {}
+        for name, (column, column_converters), value in zip(fields, converters, row):
+            for converter in column_converters:
+                value = converter(value, column, connection)
+            values[name] = value
+        result.append(values)
+    return result
+
+
+def update_returning(queryset, changes, returning=()):
+    """Apply ``changes`` to the rows of ``queryset`` and return their new values.
+
+    Returns one ``{attname: new value}`` dict per updated row (pk, user_id
+    and ``returning``). Rows are only returned if they matched the
+    queryset's filters when the UPDATE ran, so a conditional update (e.g.
+    ``filter(is_completed=False)``) reports exactly the rows it changed.
+    Sends no signal; run it inside a transaction.
+    """
+    fields = _returning_columns(queryset.model, returning)
+    if _supports_update_returning():
+        return _update_returning(queryset, changes, fields)
+    pks = list(queryset.select_for_update().values_list('pk', flat=True))
+    if not pks:
+        return []
+    rows = queryset.model.objects.filter(pk__in=pks)
+    rows.update(**changes)
+    return [dict(zip(fields, row)) for row in rows.values_list(*fields)]
+
+
+def increment(model, filters, deltas, assign=None, returning=()):
+    """Add ``deltas`` ({field: amount or expression}) to the row matching ``filters``.
+
+    ``filters`` must identify a single row (primary key or a unique lookup).
+
+    ``assign`` sets other columns in the same UPDATE; ``updated_at`` is set
+    automatically when the model has one. Returns ``{attname: new value}``
+    for ``returning`` (a list of attnames or '__all__'), or None if no row
+    matched.
+    """
+    changes = {
+        field: models.F(field) + delta if not hasattr(delta, 'resolve_expression') else delta
+        for field, delta in deltas.items()
+    }
+    changes.update(assign or {})
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changes.setdefault('updated_at', timezone.now())
+
+    fields = _returning_columns(model, returning)
+    # No savepoint inside an outer transaction: answer endpoints make several
+    # of these updates per request and roll back as a whole anyway
+    with transaction.atomic(savepoint=False):
+        if _supports_update_returning():
+            rows = _update_returning(model.objects.filter(**filters), changes, fields)
+            values = rows[0] if rows else None
+        else:
+            rows = model.objects.filter(**filters)
+            if not rows.update(**changes):
+                return None
+            values = dict(zip(fields, rows.values_list(*fields).first()))
+
+        if values is not None:
+            counters_updated.send(sender=model, values=values)
+    return values
+
+
+def increment_or_create(model, lookup, deltas, assign=None, returning=(), defaults=None):
+    """Like ``increment``, creating the row from ``lookup`` and ``defaults`` first if missing"""
+    values = increment(model, lookup, deltas, assign, returning)
+    if values is None:
+        model.objects.get_or_create(**lookup, defaults=defaults or {})
+        values = increment(model, lookup, deltas, assign, returning)
+    return values
+
+
+def apply_values(instance, values):
+    """Copy values returned by ``increment`` onto a loaded instance"""
+    for name, value in values.items():
+        setattr(instance, name, value)
+    return instance
+
+
+def add_points(user, points, weekly_points=None):
+    """Add points to the user's total and weekly score; returns the new UserPoints values.
+
+    ``user`` may be a User or a user id.
+    """
+    from .models import UserPoints
+
+    return increment_or_create(
+        UserPoints,
+        {'user_id': getattr(user, 'pk', user)},
+        {'total_points': points, 'weekly_points': points if weekly_points is None else weekly_points},
+        returning=['total_points', 'weekly_points', 'current_streak', 'longest_streak']
+    )
@@ -0,0 +1,170 @@
+"""Per-user snapshot cache for the task and daily learning dashboards.
+
+Snapshots live in the Django cache under a key built from the user id,
+today's date, a per-user version and a global generation. Saving any model
+a dashboard reads bumps the user's version (after the transaction commits),
+so a stale snapshot can never be read again, even if a request that started
+before the write stores its result afterwards. Changes to the weekly task
+definitions bump the global generation.
+
+Versions, generations and the hit, miss and invalidation counts all live in
+the Django cache. With a shared backend (``REDIS_URL``, see ``CACHES`` in
+settings) they cover every worker process and management command; with the
+per-process in-memory fallback each process only sees its own writes.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import counters_updated
+from .models import (
+    DailyLearningSession, DailyLearningSettings, DailyLearningStreak, DailyTaskCompletion,
+    UserPoints, UserTaskProgress, WeeklyTask
+)
+
+
+DASHBOARD_CACHE_TIMEOUT = 15 * 60
+DASHBOARD_KINDS = ['tasks', 'daily_learning']
+
+# Model -> dashboards built from its rows
+DASHBOARD_SOURCES = {
+    UserPoints: ['tasks'],
+    UserTaskProgress: ['tasks'],
+    DailyTaskCompletion: ['tasks'],
+    DailyLearningSession: ['daily_learning'],
+    DailyLearningStreak: ['daily_learning'],
+    DailyLearningSettings: ['daily_learning'],
+}
+
+
+def _user_id_key(username):
+    return f'dashboard:user:{username}'
+
+
+def _version_key(kind, user_id):
+    return f'dashboard:version:{kind}:{user_id}'
+
+
+def _stats_key(kind, outcome):
+    return f'dashboard:stats:{kind}:{outcome}'
+
+
+_GENERATION_KEY = 'dashboard:generation'
+
+
+def _increment(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+        return 1
+
+
+def _record(kind, outcome):
+    _increment(_stats_key(kind, outcome))
+
+
+def dashboard_snapshot_key(kind, user_id):
+    """Cache key of the user's current snapshot.
+
+    Read it before loading the dashboard data, so a write that happens while
+    the response is being built moves readers to a newer key.
+    """
+    values = cache.get_many([_GENERATION_KEY, _version_key(kind, user_id)])
+    generation = values.get(_GENERATION_KEY, 0)
+    version = values.get(_version_key(kind, user_id), 0)
+    today = timezone.now().date().isoformat()
+    return f'dashboard:snapshot:{kind}:{user_id}:{today}:{generation}:{version}'
+
+
+def get_dashboard_snapshot(kind, username):
+    """Return the cached response data for a username, or None on a miss"""
+    user_id = cache.get(_user_id_key(username))
+    if user_id is not None:
+        snapshot = cache.get(dashboard_snapshot_key(kind, user_id))
+        # Guard against a username that was renamed or reused
+        if snapshot is not None and snapshot[0] == username:
+            _record(kind, 'hits')
+            return snapshot[1]
+    _record(kind, 'misses')
+    return None
+
+
+def store_dashboard_snapshot(key, user, data):
+    cache.set_many({
+        _user_id_key(user.username): user.id,
+        key: (user.username, data),
+    }, timeout=DASHBOARD_CACHE_TIMEOUT)
+
+
+def invalidate_dashboards(user_id, kinds=DASHBOARD_KINDS):
+    for kind in kinds:
+        _increment(_version_key(kind, user_id))
+        _record(kind, 'invalidations')
+
+
+def invalidate_all_dashboards():
+    """Drop every cached dashboard, in every process sharing the cache.
+
+    This is the invalidation contract for bulk rewrites that bypass model
+    signals (``QuerySet.update``, rebuilds, weekly rollover):
+
+    * write ``UserPoints.updated_at`` on every row changed, so each worker's
+      leaderboard index picks the rows up on its next sync
+      (``api.leaderboard``);
+    * call this function once the rewrite has committed.
+    """
+    _increment(_GENERATION_KEY)
+
+
+def get_dashboard_cache_stats():
+    """Hit, miss and invalidation counts with the hit rate for each dashboard"""
+    keys = [
+        _stats_key(kind, outcome)
+        for kind in DASHBOARD_KINDS
+        for outcome in ['hits', 'misses', 'invalidations']
+    ]
+    values = cache.get_many(keys)
+    stats = {}
+    for kind in DASHBOARD_KINDS:
+        hits = values.get(_stats_key(kind, 'hits'), 0)
+        misses = values.get(_stats_key(kind, 'misses'), 0)
+        stats[kind] = {
+            'hits': hits,
+            'misses': misses,
+            'invalidations': values.get(_stats_key(kind, 'invalidations'), 0),
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0
+        }
+    return stats
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_user_dashboards(sender, instance, **kwargs):
+    kinds = DASHBOARD_SOURCES.get(sender)
+    if kinds:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_dashboards(user_id, kinds))
+
+
+@receiver(counters_updated)
+def invalidate_user_dashboards_from_counters(sender, values, **kwargs):
+    kinds = DASHBOARD_SOURCES.get(sender)
+    if kinds and values.get('user_id') is not None:
+        user_id = values['user_id']
+        transaction.on_commit(lambda: invalidate_dashboards(user_id, kinds))
+
+
+@receiver(m2m_changed, sender=DailyLearningSettings.preferred_topics.through)
+def invalidate_settings_dashboard(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, DailyLearningSettings):
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_dashboards(user_id, ['daily_learning']))
+
+
+@receiver(post_save, sender=WeeklyTask)
+@receiver(post_delete, sender=WeeklyTask)
+def invalidate_task_definitions(sender, **kwargs):
+    transaction.on_commit(invalidate_all_dashboards)
@@ -0,0 +1,223 @@
+import csv
+import datetime
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import DailyLearningQuestion, Question, UserAnswer
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_FORMATS = ['ndjson', 'csv']
+
+# Dataset name -> (model, exported columns, cursor field).
+#
+# Incremental pulls of append-only tables (cursor field None) use the
+# primary key as the watermark: ids only grow, and SQLite serializes
+# writers, so a row that commits after an export can never have an id at or
+# below that export's last id. (A created_at watermark skips rows whose
+# transaction started before the previous pull but committed after it.)
+#
+# Tables whose rows change after insert (daily learning answers count their
+# attempts on the same row) use an ``(updated_at, id)`` cursor instead, so
+# changed rows are exported again. updated_at is stamped before the
+# transaction commits, so an export only covers rows last changed at least
+# ``EXPORT_CURSOR_LAG`` seconds ago; newer changes go in the next pull.
+#
+# Each export reports the cursor it ends at (``format_cursor``); pass it
+# back on the next pull.
+EXPORT_DATASETS = {
+    'questions': (Question, [
+        'id', 'topic_id', 'topic__name', 'vietnamese_text', 'english_text',
+        'difficulty', 'created_at'
+    ], None),
+    'user-answers': (UserAnswer, [
+        'id', 'user_id', 'user__username', 'question_id', 'user_answer',
+        'is_correct', 'similarity_score', 'created_at'
+    ], None),
+    'daily-learning-answers': (DailyLearningQuestion, [
+        'id', 'session_id', 'session__user_id', 'session__user__username',
+        'session__session_date', 'session__exercise_type', 'question_id',
+        'user_answer', 'is_correct', 'similarity_score', 'time_taken',
+        'attempts', 'created_at', 'updated_at'
+    ], 'updated_at'),
+}
+
+# Datasets holding every user's answers -> lookup of the owning user
+EXPORT_USER_FIELDS = {
+    'user-answers': 'user',
+    'daily-learning-answers': 'session__user',
+}
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _cursor_lag():
+    return datetime.timedelta(seconds=getattr(settings, 'EXPORT_CURSOR_LAG', 60))
+
+
+def parse_since(value):
+    """Parse a ``since`` watermark (ISO date or datetime); None if invalid"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_after_id(value):
+    """Parse an ``after_id`` watermark (non-negative integer); None if invalid"""
+    value = (value or '').strip()
+    if not value.isdigit():
+        return None
+    return int(value)
+
+
+def parse_cursor(dataset, value):
+    """Parse a cursor reported by a previous export of ``dataset``; None if invalid
+
+    Id-ordered datasets use the last id; ``(updated_at, id)`` cursors are
+    written as ``<microseconds since the epoch>:<id>``.
+    """
+    _, _, cursor_field = EXPORT_DATASETS[dataset]
+    if cursor_field is None:
+        return parse_after_id(value)
+    stamp, _, row_id = (value or '').strip().partition(':')
+    if not stamp.isdigit() or not row_id.isdigit():
+        return None
+    return (_EPOCH + datetime.timedelta(microseconds=int(stamp)), int(row_id))
+
+
+def format_cursor(cursor):
+    if isinstance(cursor, tuple):
+        moment, row_id = cursor
+        return f'{(moment - _EPOCH) // datetime.timedelta(microseconds=1)}:{row_id}'
+    return str(cursor)
+
+
+def export_bounds(dataset, after=None):
+    """The ``(after, last)`` cursor range an export started now will cover
+
+    ``last`` is the cursor of the newest row at the moment of the call (for
+    ``(updated_at, id)`` cursors, the newest row older than the lag), or
+    ``after`` if there are no newer rows, so it is always a valid watermark
+    for the next pull.
+    """
+    model, _, cursor_field = EXPORT_DATASETS[dataset]
+    if cursor_field is None:
+        after = after or 0
+        last_id = model.objects.aggregate(last_id=Max('id'))['last_id']
+        return after, max(after, last_id or 0)
+
+    after = after or (_EPOCH, 0)
+    last = (
+        model.objects.filter(**{f'{cursor_field}__lte': timezone.now() - _cursor_lag()})
+        .order_by(f'-{cursor_field}', '-id').values_list(cursor_field, 'id').first()
+    )
+    return after, max(after, last) if last is not None else after
+
+
+def export_rows(dataset, since=None, after=None, last=None, user=None):
+    """Stream ``(columns, row iterator)`` for a dataset without loading it
+
+    ``user`` limits answer datasets to that user's rows.
+    """
+    model, columns, cursor_field = EXPORT_DATASETS[dataset]
+    queryset = model.objects.all()
+    if user is not None:
+        queryset = queryset.filter(**{EXPORT_USER_FIELDS[dataset]: user})
+    if since is not None:
+        queryset = queryset.filter(created_at__gt=since)
+
+    if cursor_field is None:
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        if last is not None:
+            queryset = queryset.filter(id__lte=last)
+        queryset = queryset.order_by('id')
+    else:
+        if after is not None:
+            queryset = queryset.filter(
+                Q(**{f'{cursor_field}__gt': after[0]}) | Q(**{cursor_field: after[0], 'id__gt': after[1]})
+            )
+        if last is not None:
+            queryset = queryset.filter(
+                Q(**{f'{cursor_field}__lt': last[0]}) | Q(**{cursor_field: last[0], 'id__lte': last[1]})
+            )
+        queryset = queryset.order_by(cursor_field, 'id')
+    return columns, queryset.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _column_names(columns):
+    return [column.replace('__', '_') for column in columns]
+
+
+def iter_ndjson(columns, rows):
+    names = _column_names(columns)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_column_names(columns))
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+            for value in row
+        ])
+
+
+def iter_buffered(lines, buffer_size=EXPORT_BUFFER_SIZE):
+    """Join small text lines into UTF-8 chunks of roughly ``buffer_size`` bytes"""
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def iter_gzip(chunks):
+    """Incrementally gzip a stream of byte chunks"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(dataset, export_format='ndjson', since=None, gzip=False,
+                  after=None, last=None, user=None):
+    """Return an iterator of byte chunks for a full or incremental export"""
+    columns, rows = export_rows(dataset, since, after, last, user)
+    lines = iter_csv(columns, rows) if export_format == 'csv' else iter_ndjson(columns, rows)
+    chunks = iter_buffered(lines)
+    return iter_gzip(chunks) if gzip else chunks
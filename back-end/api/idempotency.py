@@ -0,0 +1,144 @@
+"""Idempotency-Key support for answer submission endpoints.
+
+A client that may retry a submission sends the same ``Idempotency-Key``
+header with every attempt. The first attempt reserves the key by inserting
+an ``IdempotencyKey`` row, runs the view and stores its status code and
+response data on the row; later attempts get that stored response back
+(marked with ``Idempotent-Replayed: true``) without grading or writing
+anything again. The view runs in the same transaction as the update that
+stores its response; a server error rolls back everything it wrote and
+releases the key.
+
+The row's unique key (a short hash of the endpoint, username and client
+key) makes the reservation atomic across every worker process. Entries
+expire after ``IDEMPOTENCY_KEY_TTL`` seconds (24 hours by default); expired
+rows are replaced when their key is reused and deleted by ``manage.py
+purge_idempotency_keys``.
+"""
+import datetime
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# How long a reservation survives if the process dies mid-request
+PENDING_TIMEOUT = 60
+
+
+def _key_hash(scope, username, key):
+    return hashlib.sha256(f'{scope}\0{username}\0{key}'.encode()).hexdigest()[:32]
+
+
+def _fingerprint(data):
+    if hasattr(data, 'dict'):
+        data = data.dict()
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _is_live(entry, now):
+    """Whether a stored entry still counts (not expired, not an abandoned reservation)"""
+    if entry.status_code is None:
+        return entry.created_at > now - datetime.timedelta(seconds=PENDING_TIMEOUT)
+    return entry.created_at > now - _ttl()
+
+
+def purge_expired_keys():
+    """Delete expired entries; returns the number deleted"""
+    return IdempotencyKey.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()[0]
+
+
+def _stored_response(entry, fingerprint):
+    if entry.fingerprint != fingerprint:
+        return Response(
+            {'error': f'{HEADER} này đã được dùng cho một yêu cầu khác'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if entry.status_code is None:
+        return Response(
+            {'error': 'Yêu cầu với khóa này đang được xử lý, vui lòng thử lại sau'},
+            status=status.HTTP_409_CONFLICT
+        )
+    response = Response(entry.response_data, status=entry.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+class _HandlerFailed(Exception):
+    """Rolls back a handler that returned a server error"""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def idempotent(scope):
+    """Decorate an APIView handler so that requests carrying an Idempotency-Key run once"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER, '').strip()
+            if not key:
+                return handler(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{HEADER} không được dài quá {MAX_KEY_LENGTH} ký tự'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            key_hash = _key_hash(scope, request.data.get('username', ''), key)
+            fingerprint = _fingerprint(request.data)
+            now = timezone.now()
+            entry = IdempotencyKey.objects.filter(key=key_hash).first()
+            if entry is not None:
+                if _is_live(entry, now):
+                    return _stored_response(entry, fingerprint)
+                IdempotencyKey.objects.filter(pk=entry.pk, created_at=entry.created_at).delete()
+
+            try:
+                with transaction.atomic():
+                    entry = IdempotencyKey.objects.create(key=key_hash, fingerprint=fingerprint, created_at=now)
+            except IntegrityError:
+                # Another request reserved the key first
+                entry = IdempotencyKey.objects.filter(key=key_hash).first()
+                if entry is None:
+                    return Response(
+                        {'error': 'Yêu cầu với khóa này đang được xử lý, vui lòng thử lại sau'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                return _stored_response(entry, fingerprint)
+
+            # The handler's writes and the stored response commit together: a
+            # 5xx rolls both back, so the client can retry with the same key
+            try:
+                with transaction.atomic():
+                    response = handler(self, request, *args, **kwargs)
+                    if response.status_code >= 500:
+                        raise _HandlerFailed(response)
+                    IdempotencyKey.objects.filter(pk=entry.pk).update(
+                        status_code=response.status_code,
+                        response_data=response.data
+                    )
+            except _HandlerFailed as failure:
+                entry.delete()
+                return failure.response
+            except Exception:
+                entry.delete()
+                raise
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,612 @@
+import codecs
+import csv
+import datetime
+import json
+import logging
+import os
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Question, QuestionImportJob, Topic
+from .near_duplicates import (
+    compute_signature, find_near_duplicates, insert_buckets, signature_from_bytes, signature_to_bytes
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 10
+# A running job without a progress update for this long has lost its worker
+STALE_JOB_SECONDS = 5 * 60
+MAX_JOB_ATTEMPTS = 3
+TOPIC_NAME_MAX_LENGTH = Topic._meta.get_field('name').max_length
+VALID_DIFFICULTIES = {choice for choice, _ in Question.DIFFICULTY_CHOICES}
+
+
+def _latin1_fallback(error):
+    """Decode bytes that are not valid UTF-8 as latin-1 instead of failing"""
+    bad_bytes = error.object[error.start:error.end]
+    return bad_bytes.decode('latin-1'), error.end
+
+
+codecs.register_error('utf8_latin1_fallback', _latin1_fallback)
+
+
+def iter_text_chunks(byte_chunks):
+    """Incrementally decode an iterable of byte chunks as UTF-8.
+
+    Multi-byte characters split across chunk boundaries are buffered by the
+    decoder, and invalid sequences fall back to latin-1 so the upload is only
+    decoded once.
+    """
+    # utf-8-sig drops the byte order mark that spreadsheet exports often start with
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='utf8_latin1_fallback')
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def iter_lines(text_chunks, keepends=False):
+    """Yield complete lines from an iterable of text chunks"""
+    pending = ''
+    for chunk in text_chunks:
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        if keepends:
+            for line in lines:
+                yield line + '\n'
+        else:
+            yield from lines
+    if pending:
+        yield pending
+
+
+def normalize_difficulty(value):
+    """Map a free-form difficulty label (Vietnamese or English) to a choice key"""
+    value = value.strip().lower()
+    if 'dễ' in value or 'easy' in value:
+        return 'easy'
+    elif 'khó' in value or 'hard' in value:
+        return 'hard'
+    else:
+        return 'medium'
+
+
+def parse_question_block(lines):
+    """Parse one ``Question:/Answer:/Topic:/Status:`` block into a dict"""
+    question_data = {
+        'vietnamese': '',
+        'english': '',
+        'topic': '',
+        'difficulty': 'medium'
+    }
+
+    for line in lines:
+        # Parse Question line
+        if line.startswith('Question:'):
+            question_data['vietnamese'] = line.replace('Question:', '').strip()
+
+        # Parse Answer line
+        elif line.startswith('Answer:'):
+            question_data['english'] = line.replace('Answer:', '').strip()
+
+        # Parse Topic line
+        elif line.startswith('Topic:'):
+            question_data['topic'] = line.replace('Topic:', '').strip()
+
+        # Parse Status line (difficulty)
+        elif line.startswith('Status:'):
+            question_data['difficulty'] = normalize_difficulty(line.replace('Status:', ''))
+
+    return question_data
+
+
+def parse_questions_file(byte_chunks):
+    """Yield question dicts from an uploaded text file as blocks complete.
+
+    Blocks are separated by blank lines. Only the current block is held in
+    memory, so the file is parsed in constant memory regardless of its size.
+    """
+    block = []
+    for line in iter_lines(iter_text_chunks(byte_chunks)):
+        line = line.strip()
+        if line:
+            block.append(line)
+            continue
+        if block:
+            question_data = parse_question_block(block)
+            block = []
+            # Only yield if we have both question and answer
+            if question_data['vietnamese'] and question_data['english']:
+                yield question_data
+
+    if block:
+        question_data = parse_question_block(block)
+        if question_data['vietnamese'] and question_data['english']:
+            yield question_data
+
+
+# Accepted header names for each field of a tabular or JSON record
+FIELD_ALIASES = {
+    'vietnamese': {'vietnamese', 'vietnamese_text', 'question', 'vi'},
+    'english': {'english', 'english_text', 'answer', 'en'},
+    'topic': {'topic', 'topic_name'},
+    'difficulty': {'difficulty', 'status', 'level'},
+}
+KNOWN_DIFFICULTY_LABELS = {
+    'easy': 'easy', 'dễ': 'easy',
+    'medium': 'medium', 'trung bình': 'medium',
+    'hard': 'hard', 'khó': 'hard',
+}
+
+
+def _difficulty_from_column(value):
+    """Strict difficulty mapping for structured formats.
+
+    Unknown labels are passed through unchanged so the importer reports them
+    as errors instead of silently importing them as medium.
+    """
+    value = (value or '').strip()
+    if not value:
+        return 'medium'
+    return KNOWN_DIFFICULTY_LABELS.get(value.lower(), value)
+
+
+def _record_from_mapping(mapping):
+    """Build a question dict from a row keyed by (case-insensitive) header names"""
+    lowered = {str(key).strip().lower(): value for key, value in mapping.items() if key is not None}
+    question_data = {}
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((lowered[alias] for alias in aliases if alias in lowered), '')
+        question_data[field] = '' if value is None else str(value)
+    question_data['difficulty'] = _difficulty_from_column(question_data['difficulty'])
+    return question_data
+
+
+def parse_delimited_file(byte_chunks, delimiter=','):
+    """Yield question dicts from a CSV/TSV upload, one row at a time.
+
+    A header row naming the columns is used when present; otherwise columns
+    are read positionally as vietnamese, english, topic, difficulty.
+    """
+    reader = csv.reader(iter_lines(iter_text_chunks(byte_chunks), keepends=True), delimiter=delimiter)
+    columns = None
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+
+        if columns is None:
+            header = [cell.strip().lower() for cell in row]
+            known = set().union(*FIELD_ALIASES.values())
+            if known.intersection(header):
+                columns = header
+                continue
+            columns = ['vietnamese', 'english', 'topic', 'difficulty']
+
+        if len(row) > len(columns):
+            yield {
+                'vietnamese': row[0],
+                'error': f'dòng {reader.line_num} có {len(row)} cột, nhiều hơn tiêu đề ({len(columns)})'
+            }
+            continue
+
+        yield _record_from_mapping(dict(zip(columns, row)))
+
+
+def parse_jsonl_file(byte_chunks):
+    """Yield question dicts from a JSON Lines upload, one object per line"""
+    for line_num, line in enumerate(iter_lines(iter_text_chunks(byte_chunks)), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {'vietnamese': line[:50], 'error': f'dòng {line_num} không phải JSON hợp lệ ({e})'}
+            continue
+        if not isinstance(record, dict):
+            yield {'vietnamese': line[:50], 'error': f'dòng {line_num} không phải một đối tượng JSON'}
+            continue
+        yield _record_from_mapping(record)
+
+
+IMPORT_FORMATS = {
+    '.txt': 'text',
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+
+def detect_import_format(filename):
+    """Return the import format for a file name, or None if unsupported"""
+    return IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def parse_import_file(byte_chunks, file_format):
+    """Dispatch to the streaming parser for ``file_format``"""
+    if file_format == 'csv':
+        return parse_delimited_file(byte_chunks, delimiter=',')
+    elif file_format == 'tsv':
+        return parse_delimited_file(byte_chunks, delimiter='\t')
+    elif file_format == 'jsonl':
+        return parse_jsonl_file(byte_chunks)
+    return parse_questions_file(byte_chunks)
+
+
+LOAD_SEGMENT_SIZE = 8 * 1024 * 1024
+
+
+def iter_file_range(path, start, end, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield the bytes of ``path`` between two offsets in chunks"""
+    with open(path, 'rb') as file:
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def plan_file_segments(path, file_format, segment_size=LOAD_SEGMENT_SIZE):
+    """Split a file into byte ranges that each start on a record boundary.
+
+    Text files are cut after a blank line and JSONL files after a newline.
+    CSV/TSV files are kept whole because they rely on their header row and
+    may contain quoted newlines.
+    """
+    size = os.path.getsize(path)
+    if file_format in ('csv', 'tsv') or size <= segment_size:
+        return [(path, file_format, 0, size)]
+
+    segments = []
+    start = 0
+    with open(path, 'rb') as file:
+        while start < size:
+            file.seek(start + segment_size)
+            # Finish the current line, then for text files the current block
+            file.readline()
+            if file_format == 'text':
+                while True:
+                    line = file.readline()
+                    if not line or not line.strip():
+                        break
+            end = min(file.tell(), size)
+            segments.append((path, file_format, start, end))
+            start = end
+    return segments
+
+
+def prepare_segment(segment):
+    """Parse one file segment and precompute hashes for the writer.
+
+    Runs in ``load_questions`` worker processes, so it must not touch the
+    database; the CPU-heavy parsing and MinHash signing happen here.
+    """
+    path, file_format, start, end = segment
+    records = []
+    for q_data in parse_import_file(iter_file_range(path, start, end), file_format):
+        vietnamese = (q_data.get('vietnamese') or '').strip()
+        english = (q_data.get('english') or '').strip()
+        if not q_data.get('error') and vietnamese and english:
+            q_data['content_hash'] = Question.compute_content_hash(vietnamese, english)
+            q_data['minhash'] = signature_to_bytes(compute_signature(vietnamese, english))
+        records.append(q_data)
+    return records
+
+
+class QuestionBulkImporter:
+    """Save parsed question blocks with batched inserts in one transaction.
+
+    Topics are resolved once into an in-memory map, duplicates are detected
+    through ``Question.content_hash`` (both against existing rows and within
+    the file itself) and new rows are written with ``bulk_create``.
+    Near-duplicates found through the MinHash LSH index are flagged and
+    saved without buckets, or skipped when ``near_duplicate_mode`` is
+    ``'skip'``; ``'off'`` still indexes new rows but skips the lookup.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, commit_every_batch=False, progress_callback=None,
+                 near_duplicate_mode='flag'):
+        self.batch_size = batch_size
+        self.near_duplicate_mode = near_duplicate_mode
+        self.commit_every_batch = commit_every_batch
+        self.progress_callback = progress_callback
+        self.parsed_count = 0
+        self.topic_map = {}
+        self.seen_hashes = set()
+        self.created_count = 0
+        self.duplicate_count = 0
+        self.near_duplicate_count = 0
+        self.near_duplicates = []
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, questions_data):
+        """Import an iterable of parsed question dicts and return the summary.
+
+        By default the whole import is one transaction. With
+        ``commit_every_batch`` each batch commits on its own, which lets
+        background jobs publish progress; re-running a failed job is safe
+        because already inserted rows are skipped as duplicates.
+        """
+        outer = nullcontext() if self.commit_every_batch else transaction.atomic()
+        with outer:
+            batch = []
+            for q_data in questions_data:
+                self.parsed_count += 1
+                batch.append(q_data)
+                if len(batch) >= self.batch_size:
+                    self._commit_batch(batch)
+                    batch = []
+            if batch:
+                self._commit_batch(batch)
+        return self.summary()
+
+    def _commit_batch(self, batch):
+        with transaction.atomic(savepoint=False):
+            self._save_batch(batch)
+            if self.progress_callback:
+                self.progress_callback(self)
+
+    def summary(self):
+        return {
+            'parsed_count': self.parsed_count,
+            'created_count': self.created_count,
+            'duplicate_count': self.duplicate_count,
+            'near_duplicate_count': self.near_duplicate_count,
+            'near_duplicates': self.near_duplicates,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def _add_error(self, q_data, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Lỗi với câu hỏi: {q_data.get('vietnamese') or 'N/A'} - {message}")
+
+    def _add_near_duplicate(self, question, match, batch_questions):
+        self.near_duplicate_count += 1
+        if len(self.near_duplicates) >= MAX_REPORTED_ERRORS:
+            return
+        ref, similarity = match
+        if isinstance(ref, tuple):
+            similar_to_id = None
+            similar_to_text = batch_questions[ref[1]].vietnamese_text
+        else:
+            similar_to_id = ref
+            similar_to_text = Question.objects.filter(id=ref).values_list('vietnamese_text', flat=True).first()
+        self.near_duplicates.append({
+            'vietnamese': question.vietnamese_text,
+            'similar_to_id': similar_to_id,
+            'similar_to': similar_to_text,
+            'similarity': round(similarity, 2),
+        })
+
+    def _filter_near_duplicates(self, new_questions):
+        """Attach MinHash signatures and flag or drop near-duplicates.
+
+        Returns ``(question, signature)`` pairs to insert; the signature is
+        None for flagged rows, which are saved but not indexed.
+        """
+        signatures = [
+            signature_from_bytes(q.minhash) if q.minhash is not None
+            else compute_signature(q.vietnamese_text, q.english_text)
+            for q in new_questions
+        ]
+        matches = find_near_duplicates(signatures) if self.near_duplicate_mode != 'off' else {}
+
+        kept = []
+        for index, (question, signature) in enumerate(zip(new_questions, signatures)):
+            question.minhash = signature_to_bytes(signature)
+            match = matches.get(index)
+            if match is not None:
+                self._add_near_duplicate(question, match, new_questions)
+                if self.near_duplicate_mode == 'skip':
+                    continue
+                signature = None
+            kept.append((question, signature))
+        return kept
+
+    def _resolve_topics(self, names):
+        """Load or create every topic not yet in the map with two queries"""
+        missing = {name for name in names if name not in self.topic_map}
+        if not missing:
+            return
+
+        for topic in Topic.objects.filter(name__in=missing):
+            self.topic_map[topic.name] = topic
+        missing -= self.topic_map.keys()
+
+        if missing:
+            Topic.objects.bulk_create(
+                [Topic(name=name, description=f'Chủ đề {name}') for name in missing],
+                ignore_conflicts=True
+            )
+            # Reload to get primary keys, which SQLite does not return with ignore_conflicts
+            for topic in Topic.objects.filter(name__in=missing):
+                self.topic_map[topic.name] = topic
+
+    def _save_batch(self, batch):
+        valid = []
+        for q_data in batch:
+            if q_data.get('error'):
+                self._add_error(q_data, q_data['error'])
+                continue
+
+            vietnamese = (q_data.get('vietnamese') or '').strip()
+            english = (q_data.get('english') or '').strip()
+            topic_name = (q_data.get('topic') or '').strip()
+            difficulty = q_data.get('difficulty') or 'medium'
+
+            if not vietnamese or not english:
+                self._add_error(q_data, 'thiếu câu hỏi hoặc đáp án')
+            elif len(topic_name) > TOPIC_NAME_MAX_LENGTH:
+                self._add_error(q_data, f'tên chủ đề dài quá {TOPIC_NAME_MAX_LENGTH} ký tự')
+            elif difficulty not in VALID_DIFFICULTIES:
+                self._add_error(q_data, f'độ khó không hợp lệ "{difficulty}"')
+            else:
+                # Hashes may have been computed ahead of time by a parser process
+                content_hash = q_data.get('content_hash') or Question.compute_content_hash(vietnamese, english)
+                valid.append((vietnamese, english, topic_name, difficulty, content_hash, q_data.get('minhash')))
+
+        if not valid:
+            return
+
+        # Single hashed lookup against rows already in the database
+        batch_hashes = {row[4] for row in valid}
+        existing_hashes = set(
+            Question.objects.filter(content_hash__in=batch_hashes)
+            .order_by().values_list('content_hash', flat=True)
+        )
+
+        self._resolve_topics({row[2] for row in valid if row[2]})
+
+        new_questions = []
+        for vietnamese, english, topic_name, difficulty, content_hash, minhash in valid:
+            if content_hash in existing_hashes or content_hash in self.seen_hashes:
+                self.duplicate_count += 1
+                continue
+            self.seen_hashes.add(content_hash)
+            new_questions.append(Question(
+                vietnamese_text=vietnamese,
+                english_text=english,
+                topic=self.topic_map.get(topic_name) if topic_name else None,
+                difficulty=difficulty,
+                content_hash=content_hash,
+                minhash=minhash,
+            ))
+
+        if not new_questions:
+            return
+
+        kept = self._filter_near_duplicates(new_questions)
+        questions = [question for question, _ in kept]
+        Question.objects.bulk_create(questions, batch_size=self.batch_size)
+
+        if any(question.pk is None for question in questions):
+            # Backends without RETURNING support: recover ids through the hash index
+            ids = dict(
+                Question.objects.filter(content_hash__in=[q.content_hash for q in questions])
+                .order_by('id').values_list('content_hash', 'id')
+            )
+            for question in questions:
+                question.pk = ids.get(question.content_hash)
+
+        insert_buckets([(question.pk, signature) for question, signature in kept if signature is not None])
+        self.created_count += len(questions)
+
+
+def requeue_stale_import_jobs():
+    """Put back running jobs whose worker stopped publishing progress.
+
+    A running job's ``updated_at`` is bumped by every progress update, so a
+    job silent for ``STALE_JOB_SECONDS`` lost its worker (killed, crashed or
+    restarted). It goes back to pending and starts over; questions already
+    inserted are then reported as duplicates. A job that has already been
+    claimed ``MAX_JOB_ATTEMPTS`` times is failed instead, so a file that
+    kills the worker cannot block the queue. Returns (requeued, failed).
+    """
+    now = timezone.now()
+    stale = QuestionImportJob.objects.filter(
+        status='running',
+        updated_at__lt=now - datetime.timedelta(seconds=STALE_JOB_SECONDS)
+    )
+    failed = stale.filter(attempts__gte=MAX_JOB_ATTEMPTS).update(
+        status='failed',
+        error_message=f'Worker ngừng phản hồi khi xử lý file ({MAX_JOB_ATTEMPTS} lần)',
+        finished_at=now,
+        updated_at=now
+    )
+    requeued = stale.update(
+        status='pending',
+        started_at=None,
+        parsed_count=0,
+        created_count=0,
+        duplicate_count=0,
+        near_duplicate_count=0,
+        error_count=0,
+        errors=[],
+        near_duplicates=[],
+        updated_at=now
+    )
+    if requeued or failed:
+        logger.warning('Requeued %d and failed %d stale import jobs', requeued, failed)
+    return requeued, failed
+
+
+def claim_next_import_job():
+    """Atomically move the oldest pending job to running and return it"""
+    requeue_stale_import_jobs()
+    for job_id in QuestionImportJob.objects.filter(status='pending').values_list('id', flat=True)[:5]:
+        now = timezone.now()
+        claimed = QuestionImportJob.objects.filter(id=job_id, status='pending').update(
+            status='running',
+            attempts=F('attempts') + 1,
+            started_at=now,
+            updated_at=now
+        )
+        if claimed:
+            return QuestionImportJob.objects.get(id=job_id)
+    return None
+
+
+def run_import_job(job, batch_size=IMPORT_BATCH_SIZE):
+    """Parse and insert the file of a claimed job, publishing progress per batch"""
+    def save_progress(importer):
+        QuestionImportJob.objects.filter(id=job.id).update(
+            parsed_count=importer.parsed_count,
+            created_count=importer.created_count,
+            duplicate_count=importer.duplicate_count,
+            near_duplicate_count=importer.near_duplicate_count,
+            near_duplicates=importer.near_duplicates,
+            error_count=importer.error_count,
+            errors=importer.errors,
+            updated_at=timezone.now()
+        )
+
+    importer = QuestionBulkImporter(
+        batch_size=batch_size,
+        commit_every_batch=True,
+        progress_callback=save_progress,
+        near_duplicate_mode=job.near_duplicate_mode
+    )
+    try:
+        with job.file.open('rb') as file:
+            chunks = file.chunks(chunk_size=IMPORT_CHUNK_SIZE)
+            result = importer.run(parse_import_file(chunks, job.file_format))
+    except Exception as e:
+        logger.exception('Import job %s failed', job.id)
+        job.refresh_from_db()
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'finished_at', 'updated_at'])
+        return job
+
+    for field, value in result.items():
+        setattr(job, field, value)
+    if result['parsed_count'] == 0:
+        job.status = 'failed'
+        job.error_message = 'Không tìm thấy câu hỏi hợp lệ trong file'
+    else:
+        job.status = 'completed'
+    job.finished_at = timezone.now()
+
+    # The upload is no longer needed once every row has been committed
+    job.file.delete(save=False)
+    job.save()
+    return job
@@ -0,0 +1,240 @@
+"""In-process order-statistic index over UserPoints.
+
+Each leaderboard (total and weekly) is a pair of parallel ``array('q')``
+vectors: sort keys in ascending order and the matching user ids. A key packs
+the score and the streak tie-breaker into one negative integer, so ascending
+order is leaderboard order. Rank, top-K and "around me" lookups are binary
+searches; an update is one deletion and one insertion in the arrays.
+
+The index is built lazily from the database, kept current by UserPoints
+signals in this process, and synced with writes from other processes by
+comparing a (row count, latest updated_at) stamp at most once per
+``LEADERBOARD_SYNC_INTERVAL`` seconds.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import counters_updated
+from .models import UserPoints
+
+
+STREAK_BITS = 20
+MAX_STREAK = (1 << STREAK_BITS) - 1
+# Rows written just before the last sync may commit after it; re-read this window
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+LEADERBOARD_FIELDS = {
+    'total': ('total_points', 'longest_streak'),
+    'weekly': ('weekly_points', 'current_streak'),
+}
+
+
+def _make_key(score, streak):
+    return -((max(score, 0) << STREAK_BITS) | min(max(streak, 0), MAX_STREAK))
+
+
+def _score_of(key):
+    return (-key) >> STREAK_BITS
+
+
+class ScoreBoard:
+    """Sorted score vector for one leaderboard ordering"""
+
+    def __init__(self):
+        self.keys = array('q')
+        self.users = array('q')
+        self.user_keys = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self, entries):
+        """Replace the contents with ``(user_id, score, streak)`` entries"""
+        rows = sorted((_make_key(score, streak), user_id) for user_id, score, streak in entries)
+        self.keys = array('q', (key for key, _ in rows))
+        self.users = array('q', (user_id for _, user_id in rows))
+        self.user_keys = {user_id: key for key, user_id in rows}
+
+    def _position(self, key, user_id):
+        # Equal keys are ordered by user id, so the slot is a second bisect
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.users, user_id, lo, hi)
+
+    def upsert(self, user_id, score, streak):
+        key = _make_key(score, streak)
+        old_key = self.user_keys.get(user_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            position = self._position(old_key, user_id)
+            del self.keys[position]
+            del self.users[position]
+        position = self._position(key, user_id)
+        self.keys.insert(position, key)
+        self.users.insert(position, user_id)
+        self.user_keys[user_id] = key
+
+    def remove(self, user_id):
+        key = self.user_keys.pop(user_id, None)
+        if key is not None:
+            position = self._position(key, user_id)
+            del self.keys[position]
+            del self.users[position]
+
+    def rank_of_score(self, score):
+        """RANK() semantics: 1 + number of users with a strictly higher score"""
+        return bisect_right(self.keys, _make_key(score + 1, 0)) + 1
+
+    def position_of(self, user_id):
+        """0-based position of a user in leaderboard order, or None"""
+        key = self.user_keys.get(user_id)
+        if key is None:
+            return None
+        return self._position(key, user_id)
+
+    def entries(self, start, stop):
+        """``(user_id, score, rank)`` for positions ``start`` to ``stop``"""
+        start = max(start, 0)
+        result = []
+        for position in range(start, min(stop, len(self.keys))):
+            score = _score_of(self.keys[position])
+            result.append((self.users[position], score, self.rank_of_score(score)))
+        return result
+
+
+class LeaderboardIndex:
+    """Total and weekly ScoreBoards kept in sync with UserPoints"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.boards = {name: ScoreBoard() for name in LEADERBOARD_FIELDS}
+        self.built = False
+        self.stamp = None
+        self.watermark = None
+        self.last_sync = 0.0
+
+    def _row_values(self):
+        return ['user_id', 'updated_at'] + [
+            field for fields in LEADERBOARD_FIELDS.values() for field in fields
+        ]
+
+    def rebuild(self):
+        """Load every UserPoints row into fresh score vectors"""
+        rows = list(UserPoints.objects.values_list(*self._row_values()).iterator(chunk_size=5000))
+        with self.lock:
+            for offset, (name, _) in enumerate(LEADERBOARD_FIELDS.items()):
+                self.boards[name].load(
+                    (row[0], row[2 + offset * 2], row[3 + offset * 2]) for row in rows
+                )
+            self.watermark = max((row[1] for row in rows), default=None)
+            self.stamp = (len(rows), self.watermark)
+            self.built = True
+            self.last_sync = time.monotonic()
+
+    def apply(self, user_id, values):
+        """Apply a UserPoints row given as a dict of field values"""
+        with self.lock:
+            if not self.built:
+                return
+            for name, (score_field, streak_field) in LEADERBOARD_FIELDS.items():
+                self.boards[name].upsert(user_id, values[score_field], values[streak_field])
+
+    def remove(self, user_id):
+        with self.lock:
+            if not self.built:
+                return
+            for board in self.boards.values():
+                board.remove(user_id)
+
+    def invalidate(self):
+        with self.lock:
+            self.built = False
+
+    def ensure_fresh(self, force=False):
+        """Build the index or pull changes made by other processes"""
+        interval = getattr(settings, 'LEADERBOARD_SYNC_INTERVAL', 1.0)
+        if self.built and not force and time.monotonic() - self.last_sync < interval:
+            return
+        if not self.built:
+            self.rebuild()
+            return
+
+        stamp = UserPoints.objects.aggregate(total=Count('id'), latest=Max('updated_at'))
+        stamp = (stamp['total'], stamp['latest'])
+        if stamp != self.stamp and stamp[1] is not None:
+            since = stamp[1] if self.watermark is None else self.watermark - SYNC_OVERLAP
+            changed = UserPoints.objects.filter(updated_at__gte=since).values(*self._row_values())
+            for values in changed:
+                self.apply(values['user_id'], values)
+            self.watermark = stamp[1]
+
+        with self.lock:
+            # Rows removed or rolled back elsewhere only show up as a size mismatch
+            if stamp[0] != len(self.boards['total']):
+                self.rebuild()
+                return
+            self.stamp = stamp
+            self.last_sync = time.monotonic()
+
+    def total_users(self):
+        self.ensure_fresh()
+        return len(self.boards['total'])
+
+    def rank_of_score(self, leaderboard, score):
+        self.ensure_fresh()
+        with self.lock:
+            return self.boards[leaderboard].rank_of_score(score)
+
+    def top(self, leaderboard, limit, start=0):
+        """``(user_id, score, rank)`` rows from position ``start``"""
+        self.ensure_fresh()
+        with self.lock:
+            return self.boards[leaderboard].entries(start, start + limit)
+
+    def around(self, leaderboard, user_id, radius):
+        """``(start position, rows)`` within ``radius`` positions of a user.
+
+        Returns None if the user has no UserPoints row.
+        """
+        self.ensure_fresh()
+        with self.lock:
+            board = self.boards[leaderboard]
+            position = board.position_of(user_id)
+            if position is None:
+                return None
+            start = max(position - radius, 0)
+            return start, board.entries(start, position + radius + 1)
+
+
+leaderboard_index = LeaderboardIndex()
+
+
+@receiver(post_save, sender=UserPoints)
+def update_leaderboard_index(sender, instance, **kwargs):
+    values = {
+        field: getattr(instance, field)
+        for fields in LEADERBOARD_FIELDS.values() for field in fields
+    }
+    transaction.on_commit(lambda: leaderboard_index.apply(instance.user_id, values))
+
+
+@receiver(post_delete, sender=UserPoints)
+def remove_from_leaderboard_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: leaderboard_index.remove(instance.user_id))
+
+
+@receiver(counters_updated, sender=UserPoints)
+def update_leaderboard_index_from_counters(sender, values, **kwargs):
+    # Partial updates are picked up by the next sync with the database
+    if all(field in values for fields in LEADERBOARD_FIELDS.values() for field in fields):
+        transaction.on_commit(lambda: leaderboard_index.apply(values['user_id'], values))
@@ -48,6 +48,8 @@ class Command(BaseCommand):
         selected_questions = all_questions[:10]  # Take first 10 random questions
 
         weekly_set.questions.add(*selected_questions)
+        # Fix each question's bit position in the progress bitmaps
+        weekly_set.freeze_question_order([question.id for question in selected_questions])
         weekly_set.save()
 
         self.stdout.write(f'Created weekly question set: {weekly_set.title}\n')
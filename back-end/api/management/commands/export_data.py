@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+
+from api.exports import (
+    EXPORT_DATASETS, EXPORT_FORMATS, export_bounds, format_cursor, parse_cursor, parse_since, stream_export
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream questions or answer history to a file as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORT_DATASETS))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument(
+            '--since',
+            help='Only export rows created after this ISO date/datetime'
+        )
+        parser.add_argument(
+            '--cursor',
+            help='Only export rows after this cursor (incremental pulls; use the cursor '
+                 'reported by the previous export)'
+        )
+        parser.add_argument(
+            '--after-id',
+            help='Same as --cursor, for datasets ordered by id'
+        )
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        """Write the export in constant memory"""
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+            if since is None:
+                raise CommandError('--since must be an ISO 8601 date or datetime')
+
+        after = None
+        cursor = options['cursor'] or options['after_id']
+        if cursor:
+            after = parse_cursor(options['dataset'], cursor)
+            if after is None:
+                raise CommandError('--cursor must be the cursor reported by a previous export of this dataset')
+
+        after, last = export_bounds(options['dataset'], after)
+        chunks = stream_export(
+            options['dataset'],
+            options['format'],
+            since=since,
+            gzip=options['gzip'],
+            after=after,
+            last=last
+        )
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(f'Exported {options["dataset"]} to {options["output"]}\n')
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        cursor = format_cursor(last)
+        if EXPORT_DATASETS[options['dataset']][2] is None:
+            self.stderr.write(f'Last id: {cursor} (pass --after-id {cursor} on the next pull)\n')
+        else:
+            self.stderr.write(f'Cursor: {cursor} (pass --cursor {cursor} on the next pull)\n')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Question
+from api.near_duplicates import NEAR_DUPLICATE_THRESHOLD, find_duplicate_clusters
+
+
+class Command(BaseCommand):
+    help = 'Report clusters of near-duplicate questions using the MinHash LSH index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=NEAR_DUPLICATE_THRESHOLD,
+            help='Minimum estimated Jaccard similarity (0-1) to treat two questions as duplicates'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=50,
+            help='Maximum number of clusters to print'
+        )
+
+    def handle(self, *args, **options):
+        """Print the largest near-duplicate clusters in the question bank"""
+        self.stdout.write('Searching for near-duplicate questions...\n')
+
+        clusters = find_duplicate_clusters(threshold=options['threshold'])
+        if not clusters:
+            self.stdout.write('No near-duplicate questions found.\n')
+            return
+
+        duplicate_total = sum(len(cluster) - 1 for cluster in clusters)
+        self.stdout.write(
+            f'Found {len(clusters)} clusters ({duplicate_total} redundant questions)\n'
+        )
+
+        for index, cluster in enumerate(clusters[:options['limit']], 1):
+            self.stdout.write(f'\nCluster {index} ({len(cluster)} questions):\n')
+            questions = Question.objects.filter(id__in=cluster).order_by('id')
+            for question in questions.values_list('id', 'vietnamese_text', 'english_text'):
+                self.stdout.write(f'  #{question[0]}: {question[1]} -> {question[2]}\n')
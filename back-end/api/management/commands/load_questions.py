@@ -0,0 +1,111 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from multiprocessing import Pool
+import os
+import time
+
+import django
+
+from api.importers import QuestionBulkImporter, detect_import_format, plan_file_segments, prepare_segment
+
+
+class Command(BaseCommand):
+    help = 'Load questions from files or directories (.txt, .csv, .tsv, .jsonl) into the question bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='Question files, or directories searched recursively for question files'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of parser processes (default: number of CPUs)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of questions inserted per transaction'
+        )
+        parser.add_argument(
+            '--near-duplicates',
+            choices=['flag', 'skip', 'off'],
+            default='flag',
+            help='Flag, skip or do not check near-duplicate questions'
+        )
+
+    def _collect_files(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, names in os.walk(path):
+                    for name in sorted(names):
+                        if detect_import_format(name):
+                            files.append(os.path.join(root, name))
+            elif os.path.isfile(path):
+                if not detect_import_format(path):
+                    raise CommandError(f'Unsupported file type: {path}')
+                files.append(path)
+            else:
+                raise CommandError(f'Path not found: {path}')
+        return files
+
+    def handle(self, *args, **options):
+        """Parse files in worker processes and insert through a single writer"""
+        files = self._collect_files(options['paths'])
+        if not files:
+            self.stdout.write('No question files found.\n')
+            return
+
+        segments = []
+        for path in files:
+            segments.extend(plan_file_segments(path, detect_import_format(path)))
+        self.stdout.write(
+            f'Loading {len(files)} files ({len(segments)} segments) '
+            f'with {options["workers"]} parser processes...\n'
+        )
+
+        started = time.monotonic()
+
+        def report_progress(importer):
+            elapsed = time.monotonic() - started
+            rate = importer.parsed_count / elapsed if elapsed else 0
+            self.stdout.write(
+                f'  {importer.parsed_count} parsed, {importer.created_count} created '
+                f'({rate:.0f} rows/s)\n'
+            )
+
+        importer = QuestionBulkImporter(
+            batch_size=options['batch_size'],
+            commit_every_batch=True,
+            progress_callback=report_progress,
+            near_duplicate_mode=options['near_duplicates']
+        )
+
+        def records():
+            if options['workers'] <= 1:
+                for segment in segments:
+                    yield from prepare_segment(segment)
+                return
+
+            # Worker processes must not inherit the writer's database connection
+            connections.close_all()
+            with Pool(options['workers'], initializer=django.setup) as pool:
+                for segment_records in pool.imap(prepare_segment, segments):
+                    yield from segment_records
+
+        result = importer.run(records())
+
+        elapsed = time.monotonic() - started
+        rate = result['parsed_count'] / elapsed if elapsed else 0
+        self.stdout.write(f'Parsed: {result["parsed_count"]}\n')
+        self.stdout.write(f'Created: {result["created_count"]}\n')
+        self.stdout.write(f'Duplicates: {result["duplicate_count"]}\n')
+        self.stdout.write(f'Near-duplicates: {result["near_duplicate_count"]}\n')
+        self.stdout.write(f'Errors: {result["error_count"]}\n')
+        for error in result['errors']:
+            self.stdout.write(f'  {error}\n')
+        self.stdout.write(f'Finished in {elapsed:.1f}s ({rate:.0f} rows/s)\n')
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+import time
+
+from api.importers import IMPORT_BATCH_SIZE, claim_next_import_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued question import jobs (polls the database, no external broker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the jobs currently queued and exit instead of polling'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Number of questions inserted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        """Claim pending import jobs one at a time and run them"""
+        self.stdout.write('Import worker started\n')
+
+        try:
+            while True:
+                job = claim_next_import_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                self.stdout.write(f'Processing import job {job.id} ({job.original_name})...\n')
+                job = run_import_job(job, batch_size=options['batch_size'])
+
+                if job.status == 'completed':
+                    self.stdout.write(
+                        f'Job {job.id} completed: {job.created_count} created, '
+                        f'{job.duplicate_count} duplicates, {job.error_count} errors '
+                        f'({job.get_throughput():.0f} questions/s)\n'
+                    )
+                else:
+                    self.stdout.write(f'Job {job.id} failed: {job.error_message}\n')
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write('Import worker stopped\n')
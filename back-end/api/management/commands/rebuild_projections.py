@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.answer_events import PROJECTIONS, projection_state, rebuild_projections
+from api.dashboard_cache import invalidate_all_dashboards
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute derived state (points, daily rollups, task progress, streaks) from the '
+        'answer event log in one streaming pass. Rebuilding task_progress without points '
+        'leaves the rewards of re-completed tasks to the next points rebuild. Nothing is '
+        'written if the rebuild changes any points or task progress, unless --force is given.'
+    )
+
+    # Value of a row that does not exist (e.g. progress on a task never started)
+    MISSING = {'points': (0, 0), 'task_progress': (0, False)}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--projection',
+            action='append',
+            dest='projections',
+            choices=list(PROJECTIONS),
+            help=f'Projection to rebuild, may be repeated (default: all of {", ".join(PROJECTIONS)})'
+        )
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Only rebuild these users (may be repeated)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Number of events read and applied per batch'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Keep the rebuilt state even if it differs from the current points or task progress'
+        )
+
+    def handle(self, *args, **options):
+        names = options['projections'] or list(PROJECTIONS)
+
+        user_ids = None
+        if options['usernames']:
+            users = dict(User.objects.filter(username__in=options['usernames']).values_list('username', 'id'))
+            missing = set(options['usernames']) - set(users)
+            if missing:
+                raise CommandError(f'Unknown users: {", ".join(sorted(missing))}')
+            user_ids = list(users.values())
+
+        self.stdout.write(f'Rebuilding {", ".join(names)}...\n')
+        with transaction.atomic():
+            before = projection_state(names, user_ids)
+            count = rebuild_projections(names, user_ids, batch_size=options['batch_size'])
+            after = projection_state(names, user_ids)
+            changed = sorted(
+                key for key in before.keys() | after.keys()
+                if before.get(key, self.MISSING[key[0]]) != after.get(key, self.MISSING[key[0]])
+            )
+            if changed and not options['force']:
+                # Raising rolls the rebuild back
+                examples = ', '.join(
+                    f'{name} {row_id}: {before.get((name, row_id))} -> {after.get((name, row_id))}'
+                    for name, row_id in changed[:10]
+                )
+                raise CommandError(
+                    f'The rebuild would change {len(changed)} rows ({examples}); nothing was written. '
+                    'Use --force to keep the rebuilt state.'
+                )
+            if changed:
+                self.stdout.write(f'Changed {len(changed)} rows\n')
+
+        # Bulk rewrite: see invalidate_all_dashboards for the invalidation contract
+        invalidate_all_dashboards()
+        self.stdout.write(f'Replayed {count} answer events\n')
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api.dashboard_cache import invalidate_all_dashboards
+from api.models import WeeklyPointsSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Archive the weekly leaderboard into WeeklyPointsSnapshot and reset weekly points. '
+        'Run it once at the start of each week; running it again for the same week does nothing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--week-start',
+            help='Monday of the week to archive (YYYY-MM-DD, default: last week)'
+        )
+
+    def handle(self, *args, **options):
+        """Snapshot and reset weekly points for one week"""
+        if options['week_start']:
+            week_start = parse_date(options['week_start'])
+            if week_start is None or week_start.weekday() != 0:
+                raise CommandError(f'Invalid week start (must be a Monday): {options["week_start"]}')
+        else:
+            today = timezone.now().date()
+            week_start = today - timedelta(days=today.weekday() + 7)
+
+        self.stdout.write(f'Rolling over week {week_start}...\n')
+        archived = WeeklyPointsSnapshot.rollover(week_start)
+        if archived is None:
+            self.stdout.write(f'Week {week_start} was already rolled over\n')
+            return
+
+        # Bulk rewrite: see invalidate_all_dashboards for the invalidation contract
+        invalidate_all_dashboards()
+        self.stdout.write(f'Archived {archived} users and reset their weekly points\n')
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:25
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    Question = apps.get_model('api', 'Question')
+    batch = []
+    for question in Question.objects.only('id', 'vietnamese_text', 'english_text').iterator(chunk_size=2000):
+        payload = f"{question.vietnamese_text}\x00{question.english_text}".encode('utf-8')
+        question.content_hash = hashlib.sha1(payload).hexdigest()
+        batch.append(question)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_dailylearningsession_dailylearningquestion_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='SHA-1 của cặp câu tiếng Việt/tiếng Anh, dùng để phát hiện trùng lặp', max_length=40),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
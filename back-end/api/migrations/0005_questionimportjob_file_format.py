@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_questionimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='file_format',
+            field=models.CharField(choices=[('text', 'Văn bản (Question/Answer)'), ('csv', 'CSV'), ('tsv', 'TSV'), ('jsonl', 'JSON Lines')], default='text', max_length=10),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:29
+
+from array import array
+import hashlib
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the MinHash routine in api.near_duplicates as of this
+# migration, so later changes to that module do not change the backfill
+NUM_PERMUTATIONS = 32
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 4
+
+_NON_WORD_RE = re.compile(r'[^\w\s]+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _shingles(text, prefix):
+    text = _SPACE_RE.sub(' ', _NON_WORD_RE.sub(' ', text.lower())).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {prefix + text}
+    return {prefix + text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def compute_signature(vietnamese_text, english_text):
+    shingles = _shingles(vietnamese_text, 'v') | _shingles(english_text, 'e')
+    hashes = [
+        array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(NUM_PERMUTATIONS * 4))
+        for shingle in shingles
+    ]
+    return array('I', map(min, zip(*hashes)))
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def backfill_minhash(apps, schema_editor):
+    Question = apps.get_model('api', 'Question')
+    QuestionLSHBucket = apps.get_model('api', 'QuestionLSHBucket')
+    questions = []
+    buckets = []
+    for question in Question.objects.only('id', 'vietnamese_text', 'english_text').iterator(chunk_size=1000):
+        signature = compute_signature(question.vietnamese_text, question.english_text)
+        question.minhash = signature.tobytes()
+        questions.append(question)
+        buckets.extend(QuestionLSHBucket(question_id=question.id, key=key) for key in band_keys(signature))
+        if len(questions) >= 1000:
+            Question.objects.bulk_update(questions, ['minhash'])
+            QuestionLSHBucket.objects.bulk_create(buckets)
+            questions = []
+            buckets = []
+    if questions:
+        Question.objects.bulk_update(questions, ['minhash'])
+        QuestionLSHBucket.objects.bulk_create(buckets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_questionimportjob_file_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='minhash',
+            field=models.BinaryField(blank=True, help_text='Chữ ký MinHash, dùng để phát hiện câu hỏi gần trùng lặp', null=True),
+        ),
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='near_duplicate_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='near_duplicate_mode',
+            field=models.CharField(choices=[('flag', 'Đánh dấu'), ('skip', 'Bỏ qua')], default='flag', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='near_duplicates',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='QuestionLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='api.question')),
+            ],
+            options={
+                'verbose_name': 'Question LSH Bucket',
+                'verbose_name_plural': 'Question LSH Buckets',
+            },
+        ),
+        migrations.RunPython(backfill_minhash, migrations.RunPython.noop),
+    ]
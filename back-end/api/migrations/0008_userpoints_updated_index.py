@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_question_minhash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpoints',
+            index=models.Index(fields=['updated_at'], name='userpoints_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_userpoints_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Ngày hoạt động')),
+                ('questions_answered', models.IntegerField(default=0, help_text='Số câu đã trả lời')),
+                ('correct_answers', models.IntegerField(default=0, help_text='Số câu trả lời đúng')),
+                ('points_earned', models.IntegerField(default=0, help_text='Số điểm nhận được')),
+                ('seconds_spent', models.IntegerField(default=0, help_text='Thời gian học (giây)')),
+                ('practice_answers', models.IntegerField(default=0, help_text='Số câu luyện tập tự do')),
+                ('weekly_answers', models.IntegerField(default=0, help_text='Số câu trong bộ câu hỏi tuần')),
+                ('translation_answers', models.IntegerField(default=0, help_text='Số câu dịch trong học hàng ngày')),
+                ('listening_answers', models.IntegerField(default=0, help_text='Số câu nghe-viết trong học hàng ngày')),
+                ('mixed_answers', models.IntegerField(default=0, help_text='Số câu kết hợp trong học hàng ngày')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Daily Rollup',
+                'verbose_name_plural': 'User Daily Rollups',
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
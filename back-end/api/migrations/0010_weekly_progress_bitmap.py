@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+def _set_bits(positions):
+    data = bytearray()
+    for position in positions:
+        byte = position >> 3
+        if byte >= len(data):
+            data.extend(bytes(byte - len(data) + 1))
+        data[byte] |= 1 << (position & 7)
+    return bytes(data)
+
+
+def completed_questions_to_bitmap(apps, schema_editor):
+    WeeklyQuestionSet = apps.get_model('api', 'WeeklyQuestionSet')
+    WeeklyQuestionProgress = apps.get_model('api', 'WeeklyQuestionProgress')
+    SetQuestion = WeeklyQuestionSet.questions.through
+    CompletedQuestion = WeeklyQuestionProgress.completed_questions.through
+
+    positions_by_set = {}
+    for question_set in WeeklyQuestionSet.objects.all():
+        question_set.question_order = sorted(
+            SetQuestion.objects.filter(weeklyquestionset_id=question_set.id)
+            .values_list('question_id', flat=True)
+        )
+        question_set.save(update_fields=['question_order'])
+        positions_by_set[question_set.id] = {
+            question_id: position for position, question_id in enumerate(question_set.question_order)
+        }
+
+    completed = {}
+    for progress_id, question_id in CompletedQuestion.objects.values_list(
+        'weeklyquestionprogress_id', 'question_id'
+    ).iterator(chunk_size=5000):
+        completed.setdefault(progress_id, []).append(question_id)
+
+    batch = []
+    for progress in WeeklyQuestionProgress.objects.filter(id__in=list(completed)).only('id', 'question_set_id').iterator(chunk_size=1000):
+        positions = positions_by_set.get(progress.question_set_id, {})
+        progress.completed_bitmap = _set_bits(
+            positions[question_id] for question_id in completed[progress.id] if question_id in positions
+        )
+        batch.append(progress)
+        if len(batch) >= 1000:
+            WeeklyQuestionProgress.objects.bulk_update(batch, ['completed_bitmap'])
+            batch = []
+    if batch:
+        WeeklyQuestionProgress.objects.bulk_update(batch, ['completed_bitmap'])
+
+
+def bitmap_to_completed_questions(apps, schema_editor):
+    WeeklyQuestionSet = apps.get_model('api', 'WeeklyQuestionSet')
+    WeeklyQuestionProgress = apps.get_model('api', 'WeeklyQuestionProgress')
+    CompletedQuestion = WeeklyQuestionProgress.completed_questions.through
+
+    orders = dict(WeeklyQuestionSet.objects.values_list('id', 'question_order'))
+    rows = []
+    for progress in WeeklyQuestionProgress.objects.only('id', 'question_set_id', 'completed_bitmap').iterator(chunk_size=1000):
+        bitmap = bytes(progress.completed_bitmap or b'')
+        for position, question_id in enumerate(orders.get(progress.question_set_id) or []):
+            if position >> 3 < len(bitmap) and bitmap[position >> 3] >> (position & 7) & 1:
+                rows.append(CompletedQuestion(weeklyquestionprogress_id=progress.id, question_id=question_id))
+    CompletedQuestion.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_userdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weeklyquestionprogress',
+            name='completed_bitmap',
+            field=models.BinaryField(blank=True, default=b'', help_text='Các câu hỏi đã hoàn thành (bit theo thứ tự question_order)'),
+        ),
+        migrations.AddField(
+            model_name='weeklyquestionset',
+            name='question_order',
+            field=models.JSONField(blank=True, default=list, help_text='Thứ tự cố định của câu hỏi (vị trí bit trong tiến trình)'),
+        ),
+        migrations.RunPython(completed_questions_to_bitmap, bitmap_to_completed_questions),
+        migrations.RemoveField(
+            model_name='weeklyquestionprogress',
+            name='completed_questions',
+        ),
+    ]
@@ -0,0 +1,204 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:56
+
+from collections import defaultdict
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+SEED_BATCH_SIZE = 2000
+
+SOURCE_FIELDS = {
+    'practice': 'practice_answers',
+    'weekly': 'weekly_answers',
+    'translation': 'translation_answers',
+    'listening': 'listening_answers',
+    'mixed': 'mixed_answers',
+}
+
+
+def _backfill_rollups(apps):
+    """Sum the stored answer history into the daily rollup days that have no row yet.
+
+    Practice answers count per UserAnswer, daily learning per session
+    (``completed_questions`` counts every attempt). Weekly attempts were
+    never stored per answer and are left out.
+    """
+    from django.db.models import Count, Q, Sum
+    from django.db.models.functions import TruncDate
+
+    DailyLearningQuestion = apps.get_model('api', 'DailyLearningQuestion')
+    DailyLearningSession = apps.get_model('api', 'DailyLearningSession')
+    UserAnswer = apps.get_model('api', 'UserAnswer')
+    UserDailyRollup = apps.get_model('api', 'UserDailyRollup')
+
+    rollups = defaultdict(lambda: defaultdict(int))
+    answers = (
+        UserAnswer.objects.filter(user__isnull=False)
+        .annotate(day=TruncDate('created_at'))
+        .values('user_id', 'day')
+        .annotate(total=Count('id'), correct=Count('id', filter=Q(is_correct=True)))
+        .order_by()
+    )
+    for row in answers.iterator(chunk_size=SEED_BATCH_SIZE):
+        totals = rollups[(row['user_id'], row['day'])]
+        totals['questions_answered'] += row['total']
+        totals['correct_answers'] += row['correct']
+        totals['practice_answers'] += row['total']
+
+    sessions = (
+        DailyLearningSession.objects.values('user_id', 'session_date', 'exercise_type')
+        .annotate(total=Sum('completed_questions'), correct=Sum('correct_answers'), points=Sum('points_earned'))
+        .order_by()
+    )
+    for row in sessions.iterator(chunk_size=SEED_BATCH_SIZE):
+        totals = rollups[(row['user_id'], row['session_date'])]
+        totals['questions_answered'] += row['total'] or 0
+        totals['correct_answers'] += row['correct'] or 0
+        totals['points_earned'] += row['points'] or 0
+        totals[SOURCE_FIELDS[row['exercise_type']]] += row['total'] or 0
+
+    timings = (
+        DailyLearningQuestion.objects.values('session__user_id', 'session__session_date')
+        .annotate(seconds=Sum('time_taken'))
+        .order_by()
+    )
+    for row in timings.iterator(chunk_size=SEED_BATCH_SIZE):
+        rollups[(row['session__user_id'], row['session__session_date'])]['seconds_spent'] += row['seconds'] or 0
+
+    existing = set(UserDailyRollup.objects.values_list('user_id', 'date'))
+    UserDailyRollup.objects.bulk_create(
+        [
+            UserDailyRollup(user_id=user_id, date=date, **totals)
+            for (user_id, date), totals in rollups.items()
+            if (user_id, date) not in existing
+        ],
+        batch_size=SEED_BATCH_SIZE
+    )
+
+
+def seed_opening_balances(apps, schema_editor):
+    """Record the state the log starts from, so that a rebuild reproduces today's state.
+
+    No events are made up for answers stored before the log. Instead:
+    daily rollups are filled from the stored history and kept as they are up
+    to ``opening_date``; points are each user's current totals minus what a
+    rebuild adds up (daily activity reports and completed task rewards; it
+    can be negative where points were never awarded for those); task
+    progress is the current progress of every row.
+    """
+    from django.db.models import F, Q, Sum
+    from django.utils import timezone
+
+    DailyTaskCompletion = apps.get_model('api', 'DailyTaskCompletion')
+    UserDailyRollup = apps.get_model('api', 'UserDailyRollup')
+    UserPoints = apps.get_model('api', 'UserPoints')
+    UserTaskProgress = apps.get_model('api', 'UserTaskProgress')
+
+    _backfill_rollups(apps)
+
+    # Every user with answers holds their opening date on a UserPoints row,
+    # as answering creates one from now on
+    with_points = set(UserPoints.objects.values_list('user_id', flat=True))
+    UserPoints.objects.bulk_create(
+        [
+            UserPoints(user_id=user_id)
+            for user_id in UserDailyRollup.objects.values_list('user_id', flat=True).distinct().order_by()
+            if user_id not in with_points
+        ],
+        batch_size=SEED_BATCH_SIZE
+    )
+
+    today = timezone.now().date()
+    week_start = today - datetime.timedelta(days=today.weekday())
+    sources = {}
+    for queryset, points_field, date_field in (
+        (DailyTaskCompletion.objects.all(), 'points_earned', 'completion_date'),
+        (UserTaskProgress.objects.filter(is_completed=True), 'points_earned', 'week_start'),
+    ):
+        rows = queryset.values('user_id').annotate(
+            total=Sum(points_field),
+            weekly=Sum(points_field, filter=Q(**{f'{date_field}__gte': week_start}))
+        ).order_by()
+        for row in rows:
+            totals = sources.setdefault(row['user_id'], [0, 0])
+            totals[0] += row['total'] or 0
+            totals[1] += row['weekly'] or 0
+
+    batch = []
+    for user_points in UserPoints.objects.order_by('id').iterator(chunk_size=SEED_BATCH_SIZE):
+        total, weekly = sources.get(user_points.user_id, (0, 0))
+        user_points.opening_total_points = user_points.total_points - total
+        user_points.opening_weekly_points = user_points.weekly_points - weekly
+        user_points.opening_week_start = week_start
+        user_points.opening_date = today
+        batch.append(user_points)
+    UserPoints.objects.bulk_update(
+        batch,
+        ['opening_total_points', 'opening_weekly_points', 'opening_week_start', 'opening_date'],
+        batch_size=SEED_BATCH_SIZE
+    )
+    UserTaskProgress.objects.update(opening_progress=F('current_progress'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_weekly_progress_bitmap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('practice', 'Practice'), ('weekly', 'Weekly Questions'), ('translation', 'Translation'), ('listening', 'Listening'), ('mixed', 'Mixed')], help_text='Nguồn câu trả lời', max_length=20)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('similarity_score', models.FloatField(default=0.0)),
+                ('points', models.IntegerField(default=0, help_text='Điểm nhận được cho câu trả lời')),
+                ('seconds_spent', models.IntegerField(default=0, help_text='Thời gian trả lời (giây)')),
+                ('activity_date', models.DateField(help_text='Ngày hoạt động được tính cho câu trả lời')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_events', to='api.question')),
+                ('question_set', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_events', to='api.weeklyquestionset')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_events', to='api.dailylearningsession')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answer_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Answer Event',
+                'verbose_name_plural': 'Answer Events',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='answerevent_user_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='userpoints',
+            name='opening_total_points',
+            field=models.IntegerField(default=0, help_text='Điểm có từ trước nhật ký câu trả lời'),
+        ),
+        migrations.AddField(
+            model_name='userpoints',
+            name='opening_weekly_points',
+            field=models.IntegerField(default=0, help_text='Điểm tuần có từ trước nhật ký câu trả lời'),
+        ),
+        migrations.AddField(
+            model_name='userpoints',
+            name='opening_week_start',
+            field=models.DateField(blank=True, help_text='Tuần mà opening_weekly_points thuộc về', null=True),
+        ),
+        migrations.AddField(
+            model_name='userpoints',
+            name='opening_date',
+            field=models.DateField(blank=True, help_text='Ngày ghi số dư ban đầu; thống kê hằng ngày đến hết ngày này có từ trước nhật ký câu trả lời', null=True),
+        ),
+        migrations.AddField(
+            model_name='usertaskprogress',
+            name='opening_progress',
+            field=models.IntegerField(default=0, help_text='Tiến trình có từ trước nhật ký câu trả lời (giữ lại khi tính lại)'),
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
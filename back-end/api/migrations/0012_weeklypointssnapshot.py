@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_answerevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyPointsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField(help_text='Ngày bắt đầu tuần (Thứ Hai)')),
+                ('weekly_points', models.IntegerField(default=0, help_text='Điểm trong tuần')),
+                ('rank', models.IntegerField(help_text='Thứ hạng trong tuần')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Weekly Points Snapshot',
+                'verbose_name_plural': 'Weekly Points Snapshots',
+                'ordering': ['-week_start', 'rank'],
+                'indexes': [models.Index(fields=['week_start', 'rank'], name='weeklysnapshot_rank_idx')],
+                'unique_together': {('week_start', 'user')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:20
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_weeklypointssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Hash của endpoint, username và Idempotency-Key', max_length=64, unique=True)),
+                ('fingerprint', models.CharField(help_text='Hash của nội dung yêu cầu', max_length=32)),
+                ('status_code', models.IntegerField(blank=True, help_text='Mã trạng thái của phản hồi (trống khi yêu cầu đang được xử lý)', null=True)),
+                ('response_data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+                'indexes': [models.Index(fields=['created_at'], name='idempotencykey_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionimportjob',
+            name='attempts',
+            field=models.IntegerField(default=0, help_text='Số lần worker đã nhận xử lý job'),
+        ),
+    ]
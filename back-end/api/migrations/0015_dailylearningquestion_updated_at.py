@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:15
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Start the export cursor of existing answers at their creation time"""
+    DailyLearningQuestion = apps.get_model('api', 'DailyLearningQuestion')
+    DailyLearningQuestion.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_questionimportjob_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailylearningquestion',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='dailylearningquestion',
+            index=models.Index(fields=['updated_at', 'id'], name='dailyquestion_updated_idx'),
+        ),
+    ]
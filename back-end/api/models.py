@@ -1,9 +1,34 @@
+import hashlib
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
+def bitmap_contains(bitmap, position):
+    """Whether bit ``position`` is set in a little-endian byte bitmap"""
+    byte = position >> 3
+    return byte < len(bitmap) and bool(bitmap[byte] >> (position & 7) & 1)
+
+
+def bitmap_with(bitmap, position):
+    """Copy of ``bitmap`` with bit ``position`` set, grown as needed"""
+    data = bytearray(bitmap)
+    byte = position >> 3
+    if byte >= len(data):
+        data.extend(bytes(byte - len(data) + 1))
+    data[byte] |= 1 << (position & 7)
+    return bytes(data)
+
+
+def bitmap_count(bitmap, mask=None):
+    """Number of bits set in ``bitmap``, only counting those also set in the integer ``mask``"""
+    value = int.from_bytes(bitmap, 'little')
+    return (value if mask is None else value & mask).bit_count()
+
+
 class Topic(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -41,6 +66,19 @@ class Question(models.Model):
         choices=DIFFICULTY_CHOICES,
         default='medium'
     )
+    content_hash = models.CharField(
+        max_length=40,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="SHA-1 của cặp câu tiếng Việt/tiếng Anh, dùng để phát hiện trùng lặp"
+    )
+    minhash = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Chữ ký MinHash, dùng để phát hiện câu hỏi gần trùng lặp"
+    )
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
@@ -51,6 +89,41 @@ class Question(models.Model):
     def __str__(self):
         return f"{self.vietnamese_text[:50]}... - {self.english_text[:50]}..."
 
+    @staticmethod
+    def compute_content_hash(vietnamese_text, english_text):
+        """Hash a Vietnamese/English pair for exact duplicate lookups"""
+        payload = f"{vietnamese_text}\x00{english_text}".encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()
+
+    def save(self, *args, **kwargs):
+        from .near_duplicates import compute_signature, index_question, signature_to_bytes
+
+        # Keep the duplicate-detection hash and MinHash signature in sync with the texts
+        self.content_hash = self.compute_content_hash(self.vietnamese_text, self.english_text)
+        self.minhash = signature_to_bytes(compute_signature(self.vietnamese_text, self.english_text))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'content_hash', 'minhash'}
+        super().save(*args, **kwargs)
+        index_question(self)
+
+
+class QuestionLSHBucket(models.Model):
+    """One LSH band bucket of a question's MinHash signature"""
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets'
+    )
+    key = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        verbose_name = "Question LSH Bucket"
+        verbose_name_plural = "Question LSH Buckets"
+
+    def __str__(self):
+        return f"{self.question_id} - {self.key}"
+
 
 class UserAnswer(models.Model):
     user = models.ForeignKey(
@@ -132,6 +205,10 @@ class UserTaskProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     week_start = models.DateField(help_text="Start date of the week")
     points_earned = models.IntegerField(default=0)
+    opening_progress = models.IntegerField(
+        default=0,
+        help_text="Tiến trình có từ trước nhật ký câu trả lời (giữ lại khi tính lại)"
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -188,6 +265,27 @@ class UserPoints(models.Model):
     current_streak = models.IntegerField(default=0, help_text="Current daily streak")
     longest_streak = models.IntegerField(default=0, help_text="Longest daily streak")
     last_activity_date = models.DateField(null=True, blank=True)
+    # Points that no logged event, activity report or task reward accounts for
+    # (earned before the answer event log); rebuilds start from these
+    opening_total_points = models.IntegerField(
+        default=0,
+        help_text="Điểm có từ trước nhật ký câu trả lời"
+    )
+    opening_weekly_points = models.IntegerField(
+        default=0,
+        help_text="Điểm tuần có từ trước nhật ký câu trả lời"
+    )
+    opening_week_start = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Tuần mà opening_weekly_points thuộc về"
+    )
+    # Daily rollups up to this day predate the log; rebuilds keep them as they are
+    opening_date = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Ngày ghi số dư ban đầu; thống kê hằng ngày đến hết ngày này có từ trước nhật ký câu trả lời"
+    )
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -195,31 +293,102 @@ class UserPoints(models.Model):
         verbose_name = "User Points"
         verbose_name_plural = "User Points"
         unique_together = ['user']
+        indexes = [
+            # Lets the in-process leaderboard index pull recent changes
+            models.Index(fields=['updated_at'], name='userpoints_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.total_points} points (Streak: {self.current_streak})"
 
-    def update_streak(self):
+    def update_streak(self, activity_date=None):
         """Update user streak based on daily activity"""
-        today = timezone.now().date()
+        if self.advance_streak(activity_date or timezone.now().date()):
+            self.save(update_fields=['current_streak', 'longest_streak', 'last_activity_date', 'updated_at'])
 
-        if self.last_activity_date == today:
-            # Already updated today
-            return
+    def advance_streak(self, activity_date):
+        """Apply one day of activity to the streak fields without saving; False if nothing changed"""
+        if self.last_activity_date is not None and activity_date <= self.last_activity_date:
+            # Already counted (or older than the last counted day)
+            return False
 
-        yesterday = today - timezone.timedelta(days=1)
+        yesterday = activity_date - timezone.timedelta(days=1)
 
         if self.last_activity_date == yesterday:
             # Continue streak
             self.current_streak += 1
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
-        elif self.last_activity_date is None or self.last_activity_date < yesterday:
+        else:
             # Reset streak
             self.current_streak = 1
+        self.longest_streak = max(self.longest_streak, self.current_streak)
 
-        self.last_activity_date = today
-        self.save()
+        self.last_activity_date = activity_date
+        return True
+
+
+class WeeklyPointsSnapshot(models.Model):
+    """Weekly points and rank of each user, archived when the week is rolled over"""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='weekly_snapshots'
+    )
+    week_start = models.DateField(help_text="Ngày bắt đầu tuần (Thứ Hai)")
+    weekly_points = models.IntegerField(default=0, help_text="Điểm trong tuần")
+    rank = models.IntegerField(help_text="Thứ hạng trong tuần")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Weekly Points Snapshot"
+        verbose_name_plural = "Weekly Points Snapshots"
+        unique_together = ['week_start', 'user']
+        ordering = ['-week_start', 'rank']
+        indexes = [
+            # Historic weekly leaderboards are range reads on this index
+            models.Index(fields=['week_start', 'rank'], name='weeklysnapshot_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.week_start} - #{self.rank} ({self.weekly_points} points)"
+
+    @classmethod
+    def rollover(cls, week_start):
+        """Archive every user's weekly points for ``week_start`` and start a new week.
+
+        One ``INSERT ... SELECT`` copies the points and their RANK() into the
+        snapshot table, then one UPDATE subtracts the archived points from
+        ``weekly_points`` (so points earned while this runs are kept).
+        Returns the number of archived rows, or None if the week was already
+        rolled over.
+        """
+        from django.db import connection, transaction
+        from django.db.models import F, OuterRef, Subquery
+
+        with transaction.atomic():
+            if cls.objects.filter(week_start=week_start).exists():
+                return None
+
+            qn = connection.ops.quote_name
+            now = timezone.now()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {qn(cls._meta.db_table)} "
+                    f"({qn('user_id')}, {qn('week_start')}, {qn('weekly_points')}, {qn('rank')}, {qn('created_at')}) "
+                    f"SELECT {qn('user_id')}, %s, {qn('weekly_points')}, "
+                    f"RANK() OVER (ORDER BY {qn('weekly_points')} DESC), %s "
+                    f"FROM {qn(UserPoints._meta.db_table)}",
+                    [connection.ops.adapt_datefield_value(week_start), connection.ops.adapt_datetimefield_value(now)]
+                )
+                archived = cursor.rowcount
+
+            snapshots = cls.objects.filter(week_start=week_start, weekly_points__gt=0)
+            UserPoints.objects.filter(user_id__in=snapshots.values('user_id')).update(
+                weekly_points=F('weekly_points') - Subquery(
+                    snapshots.filter(user_id=OuterRef('user_id')).values('weekly_points')[:1]
+                ),
+                updated_at=now
+            )
+        return archived
 
 
 class WeeklyQuestionSet(models.Model):
@@ -231,6 +400,11 @@ class WeeklyQuestionSet(models.Model):
         related_name='weekly_sets',
         help_text="Các câu hỏi trong bộ tuần này"
     )
+    question_order = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Thứ tự cố định của câu hỏi (vị trí bit trong tiến trình)"
+    )
     week_start = models.DateField(help_text="Ngày bắt đầu tuần (Thứ Hai)")
     week_end = models.DateField(help_text="Ngày kết thúc tuần (Chủ Nhật)")
     is_active = models.BooleanField(default=True)
@@ -249,6 +423,19 @@ class WeeklyQuestionSet(models.Model):
     def get_total_questions(self):
         return self.questions.count()
 
+    def freeze_question_order(self, question_ids):
+        """Append questions missing from ``question_order`` and return it.
+
+        A question's index in this list is its bit in the progress bitmaps,
+        so existing positions never move; new questions go to the end.
+        """
+        missing = sorted(set(question_ids) - set(self.question_order))
+        if missing:
+            self.question_order = self.question_order + missing
+            if self.pk:
+                self.save(update_fields=['question_order'])
+        return self.question_order
+
     def get_week_range_display(self):
         return f"{self.week_start.strftime('%d/%m')} - {self.week_end.strftime('%d/%m/%Y')}"
 
@@ -265,11 +452,10 @@ class WeeklyQuestionProgress(models.Model):
         on_delete=models.CASCADE,
         related_name='user_progress'
     )
-    completed_questions = models.ManyToManyField(
-        Question,
-        related_name='weekly_progress',
+    completed_bitmap = models.BinaryField(
+        default=b'',
         blank=True,
-        help_text="Các câu hỏi đã hoàn thành"
+        help_text="Các câu hỏi đã hoàn thành (bit theo thứ tự question_order)"
     )
     total_points = models.IntegerField(default=0)
     is_completed = models.BooleanField(default=False)
@@ -286,30 +472,95 @@ class WeeklyQuestionProgress(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.question_set.title} - {self.get_completed_count()}/{self.question_set.get_total_questions()}"
 
+    def get_question_state(self):
+        """Questions of the set with completed and remaining lists, loaded once.
+
+        One query loads the set's questions (with topics) and stores them as
+        the set's prefetched ``questions``, so serializers of the question set
+        reuse them; completion comes from ``completed_bitmap``. The result is
+        cached on the instance and kept current by ``mark_question_completed``.
+        """
+        if getattr(self, '_question_state', None) is None:
+            from django.db.models import Prefetch, prefetch_related_objects
+
+            prefetch_related_objects(
+                [self.question_set],
+                Prefetch('questions', queryset=Question.objects.select_related('topic'))
+            )
+            questions_by_id = {question.id: question for question in self.question_set.questions.all()}
+            order = self.question_set.freeze_question_order(questions_by_id)
+            positions = {question_id: position for position, question_id in enumerate(order)}
+            questions = [questions_by_id[question_id] for question_id in order if question_id in questions_by_id]
+            completed_ids = {
+                question.id for question in questions
+                if bitmap_contains(self.completed_bitmap, positions[question.id])
+            }
+            self._question_state = {
+                'questions': questions,
+                'positions': positions,
+                # Bits of the questions still in the set; removed questions keep their position
+                'mask': sum(1 << positions[question.id] for question in questions),
+                'completed_ids': completed_ids,
+                'remaining': [question for question in questions if question.id not in completed_ids],
+            }
+        return self._question_state
+
     def get_completed_count(self):
-        return self.completed_questions.count()
+        """Number of completed questions still in the set (masked popcount of the bitmap)"""
+        return bitmap_count(self.completed_bitmap, self.get_question_state()['mask'])
 
     def get_progress_percentage(self):
-        total = self.question_set.get_total_questions()
+        total = len(self.get_question_state()['questions'])
         if total == 0:
             return 0
-        return (self.get_completed_count() / total) * 100
+        return (len(self.get_question_state()['completed_ids']) / total) * 100
 
     def get_remaining_questions(self):
-        return self.question_set.questions.exclude(id__in=self.completed_questions.all())
+        return self.get_question_state()['remaining']
 
     def mark_question_completed(self, question):
-        """Mark a question as completed and update progress"""
-        if question not in self.completed_questions.all():
-            self.completed_questions.add(question)
-            self.total_points += self.question_set.points_per_question
-
-            # Check if all questions are completed
-            if self.get_completed_count() >= self.question_set.get_total_questions():
-                self.is_completed = True
-                self.completed_at = timezone.now()
+        """Mark a question as completed and update progress with one UPDATE.
+
+        The UPDATE only matches if the bitmap is unchanged since it was read,
+        so concurrent completions retry instead of overwriting each other.
+        """
+        state = self.get_question_state()
+        position = state['positions'].get(question.id)
+        if position is None:
+            return
 
-            self.save()
+        points = self.question_set.points_per_question
+        while not bitmap_contains(self.completed_bitmap, position):
+            bitmap = bitmap_with(self.completed_bitmap, position)
+            changes = {
+                'completed_bitmap': bitmap,
+                'total_points': models.F('total_points') + points,
+                'updated_at': timezone.now(),
+            }
+            if bitmap_count(bitmap, state['mask']) >= len(state['questions']) and not self.is_completed:
+                changes['is_completed'] = True
+                changes['completed_at'] = timezone.now()
+
+            updated = WeeklyQuestionProgress.objects.filter(
+                pk=self.pk,
+                completed_bitmap=self.completed_bitmap
+            ).update(**changes)
+            if updated:
+                self.completed_bitmap = bitmap
+                self.total_points += points
+                self.updated_at = changes['updated_at']
+                if 'is_completed' in changes:
+                    self.is_completed = True
+                    self.completed_at = changes['completed_at']
+                break
+
+            # Another request completed a question first; reload and retry
+            self.refresh_from_db(fields=['completed_bitmap', 'total_points', 'is_completed', 'completed_at'])
+            self._question_state = None
+            state = self.get_question_state()
+
+        state['completed_ids'].add(question.id)
+        state['remaining'] = [q for q in state['remaining'] if q.id != question.id]
 
 
 class DailyLearningSession(models.Model):
@@ -368,7 +619,7 @@ class DailyLearningSession(models.Model):
         if not self.is_completed:
             self.is_completed = True
             self.completed_at = timezone.now()
-            self.save()
+            self.save(update_fields=['is_completed', 'completed_at', 'updated_at'])
 
 
 class DailyLearningQuestion(models.Model):
@@ -392,12 +643,17 @@ class DailyLearningQuestion(models.Model):
     )
     attempts = models.IntegerField(default=1)
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Daily Learning Question"
         verbose_name_plural = "Daily Learning Questions"
         unique_together = ['session', 'question']
         ordering = ['created_at']
+        indexes = [
+            # Cursor of incremental exports (api.exports)
+            models.Index(fields=['updated_at', 'id'], name='dailyquestion_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.session.user.username} - {self.question.vietnamese_text[:30]}... - Correct: {self.is_correct}"
@@ -501,3 +757,251 @@ class DailyLearningSettings(models.Model):
     def set_exercise_types_list(self, types_list):
         """Set exercise types from list"""
         self.exercise_types = ','.join(types_list)
+
+
+class QuestionImportJob(models.Model):
+    """Question import queued for the background import worker"""
+    FORMAT_CHOICES = [
+        ('text', 'Văn bản (Question/Answer)'),
+        ('csv', 'CSV'),
+        ('tsv', 'TSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Đang chờ'),
+        ('running', 'Đang xử lý'),
+        ('completed', 'Hoàn thành'),
+        ('failed', 'Thất bại'),
+    ]
+
+    file = models.FileField(upload_to='imports/')
+    original_name = models.CharField(max_length=255)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='text')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        db_index=True
+    )
+    NEAR_DUPLICATE_MODES = [
+        ('flag', 'Đánh dấu'),
+        ('skip', 'Bỏ qua'),
+    ]
+    near_duplicate_mode = models.CharField(max_length=10, choices=NEAR_DUPLICATE_MODES, default='flag')
+    parsed_count = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    duplicate_count = models.IntegerField(default=0)
+    near_duplicate_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    near_duplicates = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0, help_text="Số lần worker đã nhận xử lý job")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Bumped with every progress update: the heartbeat of a running job
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Question Import Job"
+        verbose_name_plural = "Question Import Jobs"
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.original_name} - {self.get_status_display()}"
+
+    def get_elapsed_seconds(self):
+        if not self.started_at:
+            return 0
+        end = self.finished_at or timezone.now()
+        return max((end - self.started_at).total_seconds(), 0)
+
+    def get_throughput(self):
+        """Parsed questions per second since the worker picked up the job"""
+        elapsed = self.get_elapsed_seconds()
+        if elapsed == 0:
+            return 0
+        return self.parsed_count / elapsed
+
+
+class UserDailyRollup(models.Model):
+    """Per-user, per-day activity totals maintained when answers are submitted"""
+    # Answer source -> counter column
+    SOURCE_FIELDS = {
+        'practice': 'practice_answers',
+        'weekly': 'weekly_answers',
+        'translation': 'translation_answers',
+        'listening': 'listening_answers',
+        'mixed': 'mixed_answers',
+    }
+    COUNTER_FIELDS = [
+        'questions_answered', 'correct_answers', 'points_earned', 'seconds_spent'
+    ] + list(SOURCE_FIELDS.values())
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_rollups'
+    )
+    date = models.DateField(help_text="Ngày hoạt động")
+    questions_answered = models.IntegerField(default=0, help_text="Số câu đã trả lời")
+    correct_answers = models.IntegerField(default=0, help_text="Số câu trả lời đúng")
+    points_earned = models.IntegerField(default=0, help_text="Số điểm nhận được")
+    seconds_spent = models.IntegerField(default=0, help_text="Thời gian học (giây)")
+    practice_answers = models.IntegerField(default=0, help_text="Số câu luyện tập tự do")
+    weekly_answers = models.IntegerField(default=0, help_text="Số câu trong bộ câu hỏi tuần")
+    translation_answers = models.IntegerField(default=0, help_text="Số câu dịch trong học hàng ngày")
+    listening_answers = models.IntegerField(default=0, help_text="Số câu nghe-viết trong học hàng ngày")
+    mixed_answers = models.IntegerField(default=0, help_text="Số câu kết hợp trong học hàng ngày")
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "User Daily Rollup"
+        verbose_name_plural = "User Daily Rollups"
+        unique_together = ['user', 'date']
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.questions_answered} questions"
+
+    @classmethod
+    def record_answer(cls, user, source, is_correct, points=0, seconds=0, date=None):
+        """Add one answer to the user's row for ``date`` (today by default).
+
+        Uses a single UPDATE with F() expressions so concurrent answers do not
+        overwrite each other; the row is created on the first answer of the day.
+        Call it inside the transaction that saves the answer.
+        """
+        cls.record_answers(user, source, 1, 1 if is_correct else 0, points, seconds, date)
+
+    @classmethod
+    def record_answers(cls, user, source, count, correct, points=0, seconds=0, date=None):
+        """Add a batch of ``count`` answers (``correct`` of them right) in one UPDATE.
+
+        ``user`` may be a User or a user id.
+        """
+        from .counters import increment_or_create
+
+        increment_or_create(
+            cls,
+            {'user_id': getattr(user, 'pk', user), 'date': date or timezone.now().date()},
+            {
+                'questions_answered': count,
+                'correct_answers': correct,
+                'points_earned': points,
+                'seconds_spent': seconds,
+                cls.SOURCE_FIELDS[source]: count,
+            }
+        )
+
+    @classmethod
+    def summarize(cls, user, start, end=None):
+        """Sum the counters over ``start``..``end`` (inclusive) with one range read"""
+        rows = cls.objects.filter(user=user, date__gte=start)
+        if end is not None:
+            rows = rows.filter(date__lte=end)
+        totals = rows.aggregate(
+            days_active=models.Count('id', filter=models.Q(questions_answered__gt=0)),
+            **{field: models.Sum(field) for field in cls.COUNTER_FIELDS}
+        )
+        return {field: value or 0 for field, value in totals.items()}
+
+
+class AnswerEvent(models.Model):
+    """Append-only log of graded answers from every answer endpoint.
+
+    Points, daily rollups, streaks and task progress are projections of this
+    log (see ``api.answer_events``) and can be rebuilt from it.
+    """
+    SOURCE_CHOICES = [
+        ('practice', 'Practice'),
+        ('weekly', 'Weekly Questions'),
+        ('translation', 'Translation'),
+        ('listening', 'Listening'),
+        ('mixed', 'Mixed'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='answer_events',
+        null=True,
+        blank=True
+    )
+    # Deleting a question keeps its events, and the points they account for
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.SET_NULL,
+        related_name='answer_events',
+        null=True,
+        blank=True
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, help_text="Nguồn câu trả lời")
+    is_correct = models.BooleanField(default=False)
+    similarity_score = models.FloatField(default=0.0)
+    points = models.IntegerField(default=0, help_text="Điểm nhận được cho câu trả lời")
+    seconds_spent = models.IntegerField(default=0, help_text="Thời gian trả lời (giây)")
+    session = models.ForeignKey(
+        DailyLearningSession,
+        on_delete=models.SET_NULL,
+        related_name='answer_events',
+        null=True,
+        blank=True
+    )
+    question_set = models.ForeignKey(
+        WeeklyQuestionSet,
+        on_delete=models.SET_NULL,
+        related_name='answer_events',
+        null=True,
+        blank=True
+    )
+    activity_date = models.DateField(help_text="Ngày hoạt động được tính cho câu trả lời")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Answer Event"
+        verbose_name_plural = "Answer Events"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['user', 'id'], name='answerevent_user_idx'),
+        ]
+
+    def __str__(self):
+        user_info = self.user.username if self.user else "Anonymous"
+        return f"{user_info} - {self.source} - Correct: {self.is_correct}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("AnswerEvent is append-only")
+        if self.activity_date is None:
+            self.activity_date = self.created_at.date()
+        super().save(*args, **kwargs)
+
+
+class IdempotencyKey(models.Model):
+    """Response stored for an answer submission made with an Idempotency-Key"""
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Hash của endpoint, username và Idempotency-Key"
+    )
+    fingerprint = models.CharField(max_length=32, help_text="Hash của nội dung yêu cầu")
+    status_code = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Mã trạng thái của phản hồi (trống khi yêu cầu đang được xử lý)"
+    )
+    response_data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotencykey_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} - {self.status_code or 'pending'}"
@@ -0,0 +1,260 @@
+"""MinHash signatures and a banded LSH index for near-duplicate questions.
+
+Each question gets a MinHash signature over character shingles of its
+normalized Vietnamese and English text. The signature is split into bands;
+every band is hashed into a bucket key stored in ``QuestionLSHBucket``.
+Two questions that share any bucket are candidates, and candidates whose
+estimated Jaccard similarity reaches the threshold are near-duplicates.
+
+Imports index one representative per cluster: a question flagged as a
+near-duplicate is stored without buckets, since its match already covers
+the same buckets. Lookups also read at most ``MAX_BUCKET_CANDIDATES``
+questions per bucket, so templated banks whose rows share bands without
+being near-duplicates do not make every lookup compare against the whole
+template.
+"""
+from array import array
+from collections import defaultdict
+import hashlib
+from itertools import islice
+from operator import eq
+import re
+
+from django.db import connection
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Question, QuestionLSHBucket
+
+
+NUM_PERMUTATIONS = 32
+LSH_BANDS = 8
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 4
+NEAR_DUPLICATE_THRESHOLD = 0.75
+LOOKUP_CHUNK_SIZE = 500
+MAX_BUCKET_CANDIDATES = 50
+
+_NON_WORD_RE = re.compile(r'[^\w\s]+')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = _NON_WORD_RE.sub(' ', text.lower())
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+def _shingles(text, prefix):
+    text = normalize_text(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {prefix + text}
+    return {prefix + text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def compute_signature(vietnamese_text, english_text):
+    """Return the MinHash signature of a question as an ``array('I')``.
+
+    Each shingle is expanded with SHAKE-128 into NUM_PERMUTATIONS independent
+    32-bit hashes, and the signature is their element-wise minimum. Both steps
+    run in C, which keeps signing fast enough for bulk imports.
+    """
+    shingles = _shingles(vietnamese_text, 'v') | _shingles(english_text, 'e')
+    digest_size = NUM_PERMUTATIONS * 4
+    hashes = [
+        array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(digest_size))
+        for shingle in shingles
+    ]
+    return array('I', map(min, zip(*hashes)))
+
+
+def signature_to_bytes(signature):
+    return signature.tobytes()
+
+
+def signature_from_bytes(data):
+    signature = array('I')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def band_keys(signature):
+    """Hash each band of the signature into a signed 64-bit bucket key"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def estimate_similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity: the share of equal MinHash values"""
+    return sum(map(eq, signature_a, signature_b)) / NUM_PERMUTATIONS
+
+
+def _chunks(items, size=LOOKUP_CHUNK_SIZE):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bucket_candidates(keys):
+    """Yield ``(key, question_id)`` for the oldest questions of each bucket, capped per bucket"""
+    for chunk in _chunks(keys):
+        yield from (
+            QuestionLSHBucket.objects.filter(key__in=chunk)
+            .annotate(position=Window(RowNumber(), partition_by=F('key'), order_by=F('id').asc()))
+            .filter(position__lte=MAX_BUCKET_CANDIDATES)
+            .values_list('key', 'question_id')
+        )
+
+
+def find_near_duplicates(signatures, threshold=NEAR_DUPLICATE_THRESHOLD, exclude_ids=()):
+    """Find the best stored match for each signature.
+
+    Candidates come from a bucket-key lookup capped at
+    ``MAX_BUCKET_CANDIDATES`` per bucket, so the cost depends on the number
+    of signatures, not on the size of the bank or of a cluster. Later
+    signatures are also compared with earlier unmatched ones in the same
+    call. Returns ``{index: (question_id or ('batch', index), similarity)}``.
+    """
+    keys_per_signature = [band_keys(signature) for signature in signatures]
+
+    candidates_by_key = defaultdict(set)
+    all_keys = {key for keys in keys_per_signature for key in keys}
+    for key, question_id in _bucket_candidates(all_keys):
+        if question_id not in exclude_ids:
+            candidates_by_key[key].add(question_id)
+
+    candidate_ids = set().union(*candidates_by_key.values()) if candidates_by_key else set()
+    stored_signatures = {}
+    for chunk in _chunks(candidate_ids):
+        rows = Question.objects.filter(id__in=chunk).exclude(minhash=None).values_list('id', 'minhash')
+        for question_id, data in rows:
+            stored_signatures[question_id] = signature_from_bytes(data)
+
+    matches = {}
+    batch_buckets = defaultdict(list)
+    for index, (signature, keys) in enumerate(zip(signatures, keys_per_signature)):
+        best = None
+        seen = set()
+        for key in keys:
+            for question_id in candidates_by_key.get(key, ()):
+                if question_id in seen or question_id not in stored_signatures:
+                    continue
+                seen.add(question_id)
+                similarity = estimate_similarity(signature, stored_signatures[question_id])
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (question_id, similarity)
+            for other_index in batch_buckets.get(key, ()):
+                ref = ('batch', other_index)
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                similarity = estimate_similarity(signature, signatures[other_index])
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (ref, similarity)
+        if best is not None:
+            # Matched signatures are not indexed, like flagged rows in the table
+            matches[index] = best
+            continue
+        for key in keys:
+            if len(batch_buckets[key]) < MAX_BUCKET_CANDIDATES:
+                batch_buckets[key].append(index)
+    return matches
+
+
+def build_buckets(question_id, signature):
+    return [QuestionLSHBucket(question_id=question_id, key=key) for key in band_keys(signature)]
+
+
+def insert_buckets(rows):
+    """Insert ``(question_id, signature)`` pairs into the LSH table.
+
+    Uses a single ``executemany`` instead of ``bulk_create``: bulk imports
+    write one row per band per question, and building model instances for
+    each of them costs more than the insert itself.
+    """
+    meta = QuestionLSHBucket._meta
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(meta.db_table)} "
+        f"({qn(meta.get_field('question').column)}, {qn(meta.get_field('key').column)}) "
+        f"VALUES (%s, %s)"
+    )
+    params = [(question_id, key) for question_id, signature in rows for key in band_keys(signature)]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def index_question(question):
+    """Replace the LSH buckets of a saved question"""
+    QuestionLSHBucket.objects.filter(question_id=question.id).delete()
+    if question.minhash is not None:
+        signature = signature_from_bytes(question.minhash)
+        QuestionLSHBucket.objects.bulk_create(build_buckets(question.id, signature))
+
+
+def find_duplicate_clusters(threshold=NEAR_DUPLICATE_THRESHOLD):
+    """Group the whole bank into clusters of near-duplicate question ids.
+
+    Walks only the buckets shared by more than one question, so questions
+    are compared with their LSH candidates rather than with every row.
+    Near-duplicates flagged on import have no buckets and are reported on
+    their import job instead. Returns a list of sorted id lists, largest cluster first.
+    """
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    signatures = {}
+    compared = set()
+
+    shared_keys = (
+        QuestionLSHBucket.objects.values('key')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+        .values_list('key', flat=True)
+    )
+    for chunk in _chunks(shared_keys.iterator(chunk_size=LOOKUP_CHUNK_SIZE)):
+        buckets = defaultdict(list)
+        rows = QuestionLSHBucket.objects.filter(key__in=chunk).values_list('key', 'question_id')
+        for key, question_id in rows:
+            buckets[key].append(question_id)
+
+        missing = {q for ids in buckets.values() for q in ids if q not in signatures}
+        for id_chunk in _chunks(missing):
+            for question_id, data in Question.objects.filter(id__in=id_chunk).values_list('id', 'minhash'):
+                signatures[question_id] = signature_from_bytes(data) if data is not None else None
+
+        for question_ids in buckets.values():
+            question_ids.sort()
+            for i, a in enumerate(question_ids):
+                for b in question_ids[i + 1:]:
+                    if (a, b) in compared or find(a) == find(b):
+                        continue
+                    compared.add((a, b))
+                    sig_a, sig_b = signatures.get(a), signatures.get(b)
+                    if sig_a is None or sig_b is None:
+                        continue
+                    if estimate_similarity(sig_a, sig_b) >= threshold:
+                        parent[find(b)] = find(a)
+
+    clusters = defaultdict(list)
+    for question_id in parent:
+        clusters[find(question_id)].append(question_id)
+
+    result = [sorted(ids) for ids in clusters.values() if len(ids) > 1]
+    result.sort(key=len, reverse=True)
+    return result
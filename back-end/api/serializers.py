@@ -3,8 +3,10 @@ from django.contrib.auth.models import User
 from .models import (
     Question, UserAnswer, Topic, WeeklyTask, UserTaskProgress, DailyTaskCompletion,
     UserPoints, WeeklyQuestionSet, WeeklyQuestionProgress, DailyLearningSession,
-    DailyLearningQuestion, DailyLearningStreak, DailyLearningSettings
+    DailyLearningQuestion, DailyLearningStreak, DailyLearningSettings, QuestionImportJob,
+    WeeklyPointsSnapshot
 )
+from .leaderboard import leaderboard_index
 
 
 class TopicSerializer(serializers.ModelSerializer):
@@ -36,6 +38,14 @@ class WeeklyTaskSerializer(serializers.ModelSerializer):
 
     def get_progress_percentage(self, obj):
         """Calculate progress percentage for a user"""
+        # Views that already loaded this week's progress pass it in to avoid a query per task
+        progress_map = self.context.get('progress_map')
+        if progress_map is not None:
+            progress = progress_map.get(obj.id)
+            if progress is None:
+                return 0
+            return min(100, (progress.current_progress / obj.target_count) * 100)
+
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             try:
@@ -129,29 +139,21 @@ class UserPointsSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_weekly_rank(self, obj):
-        """Get user's weekly rank"""
-        from django.db.models import F
-        from django.utils import timezone
-        import datetime
-
-        # Get current week start
-        today = timezone.now().date()
-        week_start = today - datetime.timedelta(days=today.weekday())
-
-        # Count users with higher weekly points
-        higher_count = UserPoints.objects.filter(
-            weekly_points__gt=obj.weekly_points
-        ).count()
-
-        return higher_count + 1
+        """Get user's weekly rank (binary search in the in-process leaderboard index)"""
+        return leaderboard_index.rank_of_score('weekly', obj.weekly_points)
 
     def get_total_rank(self, obj):
         """Get user's total rank"""
-        higher_count = UserPoints.objects.filter(
-            total_points__gt=obj.total_points
-        ).count()
+        return leaderboard_index.rank_of_score('total', obj.total_points)
 
-        return higher_count + 1
+
+class WeeklyPointsSnapshotSerializer(serializers.ModelSerializer):
+    """Serializer for archived weekly leaderboard rows"""
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = WeeklyPointsSnapshot
+        fields = ['id', 'username', 'week_start', 'weekly_points', 'rank', 'created_at']
 
 
 class TaskDashboardSerializer(serializers.Serializer):
@@ -186,6 +188,30 @@ class QuestionSimpleSerializer(serializers.ModelSerializer):
 
 
 
+class QuestionImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for background question import jobs"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    elapsed_seconds = serializers.SerializerMethodField()
+    throughput = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuestionImportJob
+        fields = [
+            'id', 'original_name', 'file_format', 'near_duplicate_mode', 'status',
+            'status_display', 'parsed_count', 'created_count', 'duplicate_count',
+            'near_duplicate_count', 'near_duplicates', 'error_count', 'errors',
+            'error_message', 'elapsed_seconds', 'throughput', 'started_at',
+            'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_elapsed_seconds(self, obj):
+        return round(obj.get_elapsed_seconds(), 1)
+
+    def get_throughput(self, obj):
+        return round(obj.get_throughput(), 1)
+
+
 class CheckAnswerSerializer(serializers.Serializer):
     question_id = serializers.IntegerField()
     user_answer = serializers.CharField()
@@ -273,13 +299,13 @@ class WeeklyQuestionProgressSerializer(serializers.ModelSerializer):
         return obj.get_completed_count()
 
     def get_total_questions(self, obj):
-        return obj.question_set.get_total_questions()
+        return len(obj.get_question_state()['questions'])
 
     def get_progress_percentage(self, obj):
         return obj.get_progress_percentage()
 
     def get_remaining_questions_count(self, obj):
-        return obj.get_remaining_questions().count()
+        return len(obj.get_question_state()['remaining'])
 
 
 class WeeklyQuestionDetailSerializer(serializers.ModelSerializer):
@@ -297,15 +323,21 @@ class WeeklyQuestionDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def to_representation(self, instance):
+        # Load the set's questions and the completed ids before any field reads them
+        instance.get_question_state()
+        return super().to_representation(instance)
+
     def get_completed_questions(self, obj):
         """Get list of completed question IDs"""
-        return list(obj.completed_questions.values_list('id', flat=True))
+        state = obj.get_question_state()
+        return [question.id for question in state['questions'] if question.id in state['completed_ids']]
 
     def get_next_question(self, obj):
         """Get the next unanswered question"""
-        remaining = obj.get_remaining_questions().first()
+        remaining = obj.get_question_state()['remaining']
         if remaining:
-            return QuestionSimpleSerializer(remaining).data
+            return QuestionSimpleSerializer(remaining[0]).data
         return None
 
 
@@ -455,6 +487,17 @@ class DailyLearningSessionDetailSerializer(DailyLearningSessionSerializer):
         return None
 
 
+class DailyLearningHistorySerializer(DailyLearningSessionSerializer):
+    """Past session with its answers; skips the next-question lookup.
+
+    Expects ``session_questions`` prefetched with ``question__topic`` selected.
+    """
+    session_questions = DailyLearningQuestionSerializer(many=True, read_only=True)
+
+    class Meta(DailyLearningSessionSerializer.Meta):
+        fields = DailyLearningSessionSerializer.Meta.fields + ['session_questions']
+
+
 class DailyLearningDashboardSerializer(serializers.Serializer):
     """Serializer for daily learning dashboard data"""
     today_sessions = DailyLearningSessionSerializer(many=True)
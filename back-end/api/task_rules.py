@@ -0,0 +1,257 @@
+"""Weekly task rule engine.
+
+Every ``WeeklyTask.task_type`` maps to a measure of the user's week:
+
+* ``daily_practice``  - questions answered this week
+* ``correct_answers`` - correct answers this week
+* ``perfect_week``    - days with at least one answer this week
+* ``streak_master``   - current daily streak
+* ``topic_master``    - most correct answers in a single topic this week
+
+For a batch of answer events the engine loads the active task definitions
+from a process-local cache, reads each measure needed by those tasks once
+for all affected (user, week) pairs, and writes every affected
+UserTaskProgress row with one ``INSERT ... ON CONFLICT DO UPDATE``. Progress
+only moves forward (``MAX(old, new)``, capped at the target), so concurrent
+requests cannot lower it. Rows that reached their target are then completed
+by one conditional ``UPDATE ... WHERE NOT is_completed RETURNING``: only the
+request whose update flips a row gets it back, so a row is completed and
+rewarded at most once.
+
+The task definitions are cached per process (see ``ActiveTaskCache``).
+"""
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import add_points, counters_updated, update_returning
+from .models import AnswerEvent, UserDailyRollup, UserPoints, UserTaskProgress, WeeklyTask
+
+
+def week_start_of(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def _rollup_measures(keys, events):
+    """answers, correct and active_days per (user_id, week_start) from the daily rollups"""
+    measures = {key: {'answers': 0, 'correct': 0, 'active_days': 0} for key in keys}
+    weeks = {week_start for _, week_start in keys}
+    rows = UserDailyRollup.objects.filter(
+        user_id__in={user_id for user_id, _ in keys},
+        date__gte=min(weeks),
+        date__lt=max(weeks) + datetime.timedelta(days=7)
+    ).values_list('user_id', 'date', 'questions_answered', 'correct_answers')
+    for user_id, date, answered, correct in rows:
+        values = measures.get((user_id, week_start_of(date)))
+        if values is not None and answered:
+            values['answers'] += answered
+            values['correct'] += correct
+            values['active_days'] += 1
+    return measures
+
+
+def _streak_measures(keys, events):
+    streaks = dict(
+        UserPoints.objects.filter(user_id__in={user_id for user_id, _ in keys})
+        .values_list('user_id', 'current_streak')
+    )
+    return {key: {'streak': streaks.get(key[0], 0)} for key in keys}
+
+
+def _topic_measures(keys, events):
+    """Best single-topic correct count per (user_id, week_start), up to the last event in the batch"""
+    weeks = {week_start for _, week_start in keys}
+    rows = AnswerEvent.objects.filter(
+        user_id__in={user_id for user_id, _ in keys},
+        activity_date__gte=min(weeks),
+        activity_date__lt=max(weeks) + datetime.timedelta(days=7),
+        is_correct=True
+    )
+    last_id = max((event.id for event in events if event.id is not None), default=None)
+    if last_id is not None:
+        rows = rows.filter(id__lte=last_id)
+    rows = rows.values('user_id', 'activity_date', 'question__topic_id').annotate(correct=Count('id')).order_by()
+
+    counts = {}
+    for row in rows:
+        if row['question__topic_id'] is not None:
+            key = (row['user_id'], week_start_of(row['activity_date']), row['question__topic_id'])
+            counts[key] = counts.get(key, 0) + row['correct']
+    measures = {key: {'topic_best': 0} for key in keys}
+    for (user_id, week_start, _), correct in counts.items():
+        values = measures.get((user_id, week_start))
+        if values is not None:
+            values['topic_best'] = max(values['topic_best'], correct)
+    return measures
+
+
+# Task type -> measure used as its progress
+TASK_RULES = {
+    'daily_practice': 'answers',
+    'correct_answers': 'correct',
+    'perfect_week': 'active_days',
+    'streak_master': 'streak',
+    'topic_master': 'topic_best',
+}
+
+# Loader -> measures it provides (one query per loader, whatever the number of tasks)
+MEASURE_LOADERS = [
+    (_rollup_measures, {'answers', 'correct', 'active_days'}),
+    (_streak_measures, {'streak'}),
+    (_topic_measures, {'topic_best'}),
+]
+
+
+_VERSION_KEY = 'task_rules:version'
+
+
+class ActiveTaskCache:
+    """Process-local copy of the active WeeklyTask definitions.
+
+    Reloaded after ``TASK_RULES_CACHE_SECONDS`` or when the version stored in
+    the Django cache changes (bumped whenever a WeeklyTask is saved or
+    deleted, so other processes sharing the cache reload too).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tasks = None
+        self.version = None
+        self.loaded_at = 0.0
+
+    def get(self):
+        ttl = getattr(settings, 'TASK_RULES_CACHE_SECONDS', 60)
+        version = cache.get(_VERSION_KEY, 0)
+        with self.lock:
+            if self.tasks is None or self.version != version or time.monotonic() - self.loaded_at >= ttl:
+                self.tasks = list(WeeklyTask.objects.filter(is_active=True, task_type__in=TASK_RULES))
+                self.version = version
+                self.loaded_at = time.monotonic()
+            return self.tasks
+
+    def invalidate(self):
+        try:
+            cache.incr(_VERSION_KEY)
+        except ValueError:
+            cache.add(_VERSION_KEY, 1, timeout=None)
+        with self.lock:
+            self.tasks = None
+
+
+active_tasks = ActiveTaskCache()
+
+
+UPSERT_BATCH_SIZE = 100
+
+
+def _upsert_progress(rows, now):
+    """Insert or advance UserTaskProgress rows: (user_id, task, week_start, progress)"""
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        _upsert_batch(rows[start:start + UPSERT_BATCH_SIZE], now)
+
+
+def _upsert_batch(rows, now):
+    qn = connection.ops.quote_name
+    table = qn(UserTaskProgress._meta.db_table)
+    columns = [
+        'user_id', 'task_id', 'week_start', 'current_progress', 'is_completed',
+        'completed_at', 'points_earned', 'opening_progress', 'created_at', 'updated_at'
+    ]
+    ops = connection.ops
+    db_now = ops.adapt_datetimefield_value(now)
+    params = []
+    for user_id, task, week_start, progress in rows:
+        params.extend([
+            user_id, task.id, ops.adapt_datefield_value(week_start), min(progress, task.target_count),
+            False, None, 0, 0, db_now, db_now
+        ])
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) VALUES {placeholders} "
+        f"ON CONFLICT ({qn('user_id')}, {qn('task_id')}, {qn('week_start')}) DO UPDATE SET "
+        f"{qn('current_progress')} = CASE WHEN excluded.{qn('current_progress')} > {table}.{qn('current_progress')} "
+        f"THEN excluded.{qn('current_progress')} ELSE {table}.{qn('current_progress')} END, "
+        f"{qn('updated_at')} = excluded.{qn('updated_at')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _complete_reached(keys, tasks, now):
+    """Complete the rows of ``keys`` that reached their target; returns those this call completed"""
+    rows = UserTaskProgress.objects.filter(
+        user_id__in={user_id for user_id, _ in keys},
+        week_start__in={week_start for _, week_start in keys},
+        task__in=tasks,
+        is_completed=False,
+        current_progress__gte=F('task__target_count')
+    )
+    reward = WeeklyTask.objects.filter(pk=OuterRef('task_id')).values('points_reward')
+    completed = update_returning(
+        rows,
+        {'is_completed': True, 'completed_at': now, 'points_earned': Subquery(reward), 'updated_at': now},
+        returning='__all__'
+    )
+    return [UserTaskProgress(**values) for values in completed]
+
+
+def evaluate_tasks(events, award_points=True):
+    """Advance every active task affected by ``events`` with one upsert.
+
+    Awards the reward of each task completed by this call unless
+    ``award_points`` is False (rebuilds count rewards separately). Returns
+    the UserTaskProgress rows completed by this call.
+    """
+    keys = {(event.user_id, week_start_of(event.activity_date)) for event in events if event.user_id is not None}
+    return _evaluate(keys, events, award_points)
+
+
+def evaluate_user_week(user_id, date):
+    """Re-evaluate every active task for the week containing ``date`` from the stored measures"""
+    return _evaluate({(user_id, week_start_of(date))}, [], award_points=True)
+
+
+def _evaluate(keys, events, award_points):
+    tasks = active_tasks.get()
+    if not tasks or not keys:
+        return []
+
+    needed = {TASK_RULES[task.task_type] for task in tasks}
+    measures = {key: {} for key in keys}
+    for loader, provides in MEASURE_LOADERS:
+        if needed & provides:
+            for key, values in loader(keys, events).items():
+                measures[key].update(values)
+
+    rows = [
+        (user_id, task, week_start, measures[(user_id, week_start)][TASK_RULES[task.task_type]])
+        for user_id, week_start in keys
+        for task in tasks
+    ]
+    now = timezone.now()
+    with transaction.atomic(savepoint=False):
+        _upsert_progress(rows, now)
+        completed = _complete_reached(keys, tasks, now)
+
+        rewards = {}
+        for progress in completed:
+            rewards[progress.user_id] = rewards.get(progress.user_id, 0) + progress.points_earned
+        for user_id in {user_id for user_id, _ in keys}:
+            counters_updated.send(sender=UserTaskProgress, values={'user_id': user_id})
+            if award_points and rewards.get(user_id):
+                add_points(user_id, rewards[user_id])
+    return completed
+
+
+@receiver(post_save, sender=WeeklyTask)
+@receiver(post_delete, sender=WeeklyTask)
+def invalidate_active_tasks(sender, **kwargs):
+    transaction.on_commit(active_tasks.invalidate)
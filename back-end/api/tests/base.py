@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from api.leaderboard import leaderboard_index
+from api.task_rules import active_tasks
+from api.user_resolver import username_cache
+
+
+def reset_caches():
+    """Empty every process-local cache, as in a freshly started worker"""
+    cache.clear()
+    leaderboard_index.invalidate()
+    active_tasks.invalidate()
+    username_cache.clear()
+    token_cache.clear()
+
+
+class APITestCase(TestCase):
+    """TestCase that starts every test with empty process-local caches"""
+
+    def setUp(self):
+        reset_caches()
+        self.client = APIClient()
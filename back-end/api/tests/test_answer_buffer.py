@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from api import answer_buffer
+from api.answer_buffer import AnswerWriteBuffer, get_answer_buffer
+from api.models import AnswerEvent, Question, UserAnswer
+
+from .base import APITestCase
+
+
+# Flushes are driven by the tests, without the background thread
+@mock.patch.object(AnswerWriteBuffer, '_start', lambda self: None)
+class AnswerWriteBufferTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.question = Question.objects.create(vietnamese_text='Xin chào', english_text='hello')
+
+    def answer(self, is_correct=True):
+        return UserAnswer(
+            user=self.user, question=self.question, user_answer='hello',
+            is_correct=is_correct, similarity_score=1.0 if is_correct else 0.0
+        )
+
+    def test_flush_writes_answers_and_events_in_one_batch(self):
+        buffer = AnswerWriteBuffer(max_size=10, flush_rows=5, flush_interval=60)
+        self.assertTrue(buffer.add(self.answer()))
+        self.assertTrue(buffer.add(self.answer(is_correct=False)))
+        self.assertEqual(UserAnswer.objects.count(), 0)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(UserAnswer.objects.count(), 2)
+        self.assertEqual(AnswerEvent.objects.filter(source='practice').count(), 2)
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_full_buffer_makes_the_caller_write(self):
+        buffer = AnswerWriteBuffer(max_size=1, flush_rows=5, flush_interval=60)
+        self.assertTrue(buffer.add(self.answer()))
+        self.assertFalse(buffer.add(self.answer()))
+        self.assertEqual(buffer.fallback_count, 1)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        buffer = AnswerWriteBuffer(max_size=10, flush_rows=5, flush_interval=60)
+        good, bad = self.answer(), self.answer(is_correct=False)
+        buffer.add(good)
+        buffer.add(bad)
+
+        def write(answers):
+            if len(answers) > 1 or answers[0] is bad:
+                raise ValueError('write failed')
+            UserAnswer.objects.bulk_create(answers)
+
+        with mock.patch('api.answer_buffer.write_answers', side_effect=write), \
+                self.assertLogs('api.answer_buffer', 'ERROR'):
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(list(UserAnswer.objects.values_list('is_correct', flat=True)), [True])
+
+    @override_settings(ANSWER_WRITE_BEHIND={'ENABLED': True, 'FLUSH_ROWS': 100, 'FLUSH_INTERVAL_MS': 60000})
+    def test_check_answer_queues_the_answer_when_enabled(self):
+        with mock.patch.object(answer_buffer, '_buffer', None):
+            response = self.client.post('/api/check-answer/', {
+                'question_id': self.question.id, 'user_answer': 'hello', 'username': 'alice'
+            }, format='json')
+            self.assertTrue(response.json()['is_correct'])
+            self.assertEqual(UserAnswer.objects.count(), 0)
+
+            get_answer_buffer().flush()
+        self.assertEqual(UserAnswer.objects.get().user_id, self.user.id)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_answer_buffer())
@@ -0,0 +1,199 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from api.models import (
+    AnswerEvent, DailyLearningSession, Question, UserDailyRollup, UserPoints, UserTaskProgress, WeeklyTask
+)
+
+from .base import APITestCase, reset_caches
+
+
+def rebuild(*args):
+    call_command('rebuild_projections', *args, stdout=StringIO())
+
+
+class AnswerEventProjectionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='ev')
+        self.question = Question.objects.create(vietnamese_text='a', english_text='hello there')
+        WeeklyTask.objects.create(title='p', description='d', task_type='daily_practice', target_count=2, points_reward=7)
+        WeeklyTask.objects.create(title='c', description='d', task_type='correct_answers', target_count=5, points_reward=3)
+
+    def answer_everything(self):
+        for answer in ['hello there', 'nope nope', 'hello there']:
+            self.client.post(
+                '/api/check-answer/',
+                {'question_id': self.question.id, 'user_answer': answer, 'username': 'ev'},
+                format='json'
+            )
+        self.client.post(
+            '/api/tasks/daily-activity/',
+            {'username': 'ev', 'questions_answered': 1, 'correct_answers': 1, 'points_earned': 4},
+            format='json'
+        )
+        session = DailyLearningSession.objects.create(
+            user=self.user, session_date=timezone.now().date(), target_questions=3
+        )
+        self.client.post(
+            '/api/daily-learning/answer/',
+            {'username': 'ev', 'session_id': session.id, 'question_id': self.question.id,
+             'user_answer': 'hello there', 'time_taken': 12},
+            format='json'
+        )
+
+    def snapshot(self):
+        points = UserPoints.objects.get(user=self.user)
+        return (
+            (points.total_points, points.weekly_points, points.current_streak, points.longest_streak),
+            sorted(UserTaskProgress.objects.values_list(
+                'task__task_type', 'current_progress', 'is_completed', 'points_earned'
+            )),
+            list(UserDailyRollup.objects.values_list(
+                'questions_answered', 'correct_answers', 'points_earned', 'seconds_spent',
+                'practice_answers', 'translation_answers'
+            )),
+        )
+
+    def test_answers_are_logged_and_projected(self):
+        self.answer_everything()
+        self.assertEqual(AnswerEvent.objects.count(), 4)
+        # 4 reported + 7 task reward + 10 daily learning points
+        self.assertEqual(self.snapshot()[0], (21, 21, 1, 1))
+
+    def test_rebuild_reproduces_live_state(self):
+        self.answer_everything()
+        before = self.snapshot()
+        rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_rebuild_refuses_to_change_state_without_force(self):
+        self.answer_everything()
+        before = self.snapshot()
+        UserPoints.objects.update(total_points=999, current_streak=50)
+        UserDailyRollup.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            rebuild()
+        self.assertEqual(UserPoints.objects.get().total_points, 999)
+        self.assertFalse(UserDailyRollup.objects.exists())
+
+        rebuild('--force')
+        self.assertEqual(self.snapshot(), before)
+
+    def test_answer_query_budget(self):
+        self.answer_everything()
+        session = DailyLearningSession.objects.get()
+
+        # Question, answer, event, rollup, streak row, rollup measures, task
+        # upsert and completed tasks, in the view's transaction
+        with self.assertNumQueries(10):
+            self.client.post(
+                '/api/check-answer/',
+                {'question_id': self.question.id, 'user_answer': 'nope', 'username': 'ev'},
+                format='json'
+            )
+        # Session, question, one UPDATE each for the daily answer and the
+        # session counters, then the same projections and the points update
+        with self.assertNumQueries(13):
+            self.client.post(
+                '/api/daily-learning/answer/',
+                {'username': 'ev', 'session_id': session.id, 'question_id': self.question.id,
+                 'user_answer': 'nope', 'time_taken': 5},
+                format='json'
+            )
+
+    def test_deleting_a_question_keeps_its_events(self):
+        self.answer_everything()
+        before = self.snapshot()
+        self.question.delete()
+
+        self.assertEqual(AnswerEvent.objects.filter(question=None).count(), 4)
+        rebuild()
+        self.assertEqual(self.snapshot(), before)
+
+    def test_events_are_append_only(self):
+        self.answer_everything()
+        with self.assertRaises(ValueError):
+            AnswerEvent.objects.first().save()
+
+
+class OpeningBalancesMigrationTests(TransactionTestCase):
+    """Migration 0011 records opening balances, without events, so that a rebuild changes nothing"""
+
+    before = [('api', '0010_weekly_progress_bitmap')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.after = executor.loader.graph.leaf_nodes('api')
+        executor.migrate(self.before)
+        reset_caches()
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(self.after)
+
+    def test_rebuild_after_the_migration_keeps_points_progress_and_history(self):
+        get_model = self.apps.get_model
+        today = timezone.now().date()
+        week_start = today - datetime.timedelta(days=today.weekday())
+        user = get_model('auth', 'User').objects.create(username='old')
+        questions = [
+            get_model('api', 'Question').objects.create(vietnamese_text=f'q{i}', english_text=f'a{i}')
+            for i in range(2)
+        ]
+        get_model('api', 'UserPoints').objects.create(user=user, total_points=500, weekly_points=40)
+        task = get_model('api', 'WeeklyTask').objects.create(
+            title='t', description='d', task_type='daily_practice', target_count=10, points_reward=5
+        )
+        get_model('api', 'UserTaskProgress').objects.create(
+            user=user, task=task, week_start=week_start, current_progress=8
+        )
+        get_model('api', 'UserAnswer').objects.create(
+            user=user, question=questions[0], user_answer='a0', is_correct=True
+        )
+        # One daily question answered three times: the session counted every attempt
+        session = get_model('api', 'DailyLearningSession').objects.create(
+            user=user, session_date=today, exercise_type='translation',
+            completed_questions=3, correct_answers=2, points_earned=12
+        )
+        get_model('api', 'DailyLearningQuestion').objects.create(
+            session=session, question=questions[1], user_answer='a1', is_correct=True,
+            similarity_score=1.0, time_taken=9, attempts=3
+        )
+
+        MigrationExecutor(connection).migrate(self.after)
+
+        self.assertFalse(AnswerEvent.objects.exists())
+        history = (4, 3, 12, 9, 1, 3)
+        self.assertEqual(self.rollup(), history)
+        self.assertEqual(UserPoints.objects.get(user__username='old').opening_date, today)
+
+        rebuild()
+        points = UserPoints.objects.get(user__username='old')
+        self.assertEqual((points.total_points, points.weekly_points), (500, 40))
+        self.assertEqual(UserTaskProgress.objects.get(user__username='old').current_progress, 8)
+        self.assertEqual(self.rollup(), history)
+
+        # Answers logged on the opening day are already in its rollup
+        self.client.post(
+            '/api/check-answer/', {'question_id': questions[0].id, 'user_answer': 'a0', 'username': 'old'}
+        )
+        after_answer = self.rollup()
+        self.assertEqual(after_answer[0], 5)
+        rebuild()
+        self.assertEqual(self.rollup(), after_answer)
+
+    def rollup(self):
+        return UserDailyRollup.objects.filter(user__username='old').values_list(
+            'questions_answered', 'correct_answers', 'points_earned', 'seconds_spent',
+            'practice_answers', 'translation_answers'
+        ).get()
@@ -0,0 +1,73 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication, TokenCache, token_cache
+
+from .base import APITestCase
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_repeat_authentication_needs_no_query(self):
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual((user.id, user.username, token.key), (self.user.id, 'alice', self.token.key))
+        self.assertIsNot(user, self.auth.authenticate_credentials(self.token.key)[0])
+
+    def test_deleted_token_and_deactivated_user_are_rejected(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+        self.user.is_active = True
+        self.user.save()
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    @override_settings(TOKEN_CACHE_TTL=300)
+    def test_entries_expire_after_the_ttl(self):
+        self.auth.authenticate_credentials(self.token.key)
+        # queryset.update() sends no signals, like a write from another process
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        self.auth.authenticate_credentials(self.token.key)
+
+        with mock.patch('api.authentication.time.monotonic', return_value=time.monotonic() + 301):
+            with self.assertRaises(AuthenticationFailed):
+                self.auth.authenticate_credentials(self.token.key)
+
+    def test_stats_endpoint(self):
+        self.auth.authenticate_credentials(self.token.key)
+        self.auth.authenticate_credentials(self.token.key)
+        stats = self.client.get('/api/auth/token-cache/stats/').json()
+        self.assertEqual(stats['size'], len(token_cache.entries))
+        self.assertGreater(stats['hits'], 0)
+
+
+class TokenCacheTests(APITestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TokenCache(max_size=2)
+        tokens = [Token.objects.create(user=User.objects.create(username=f'u{i}')) for i in range(3)]
+        cache.put(tokens[0], tokens[0].user)
+        cache.put(tokens[1], tokens[1].user)
+        cache.get(tokens[0].key)
+        cache.put(tokens[2], tokens[2].user)
+
+        self.assertIsNotNone(cache.get(tokens[0].key))
+        self.assertIsNone(cache.get(tokens[1].key))
+        self.assertEqual(set(cache.keys_by_user), {tokens[0].user.id, tokens[2].user.id})
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api.counters import add_points, counters_updated, increment
+from api.models import DailyLearningQuestion, DailyLearningSession, DailyTaskCompletion, Question, UserPoints
+
+from .base import APITestCase
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+
+    def test_add_points_creates_the_row_then_increments_it(self):
+        self.assertEqual(add_points(self.user, 5)['total_points'], 5)
+
+        # One UPDATE ... RETURNING, without a savepoint under the test transaction
+        with self.assertNumQueries(1):
+            values = add_points(self.user.id, 3, weekly_points=0)
+        self.assertEqual((values['total_points'], values['weekly_points']), (8, 5))
+        self.assertEqual(values['user_id'], self.user.id)
+
+    def test_stale_instances_do_not_lose_increments(self):
+        add_points(self.user, 0)
+        stale = UserPoints.objects.get(user=self.user)
+        add_points(self.user, 4)
+        add_points(self.user, 6)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.total_points, 10)
+
+    def test_sends_the_new_values(self):
+        add_points(self.user, 1)
+        received = []
+
+        def listener(sender, values, **kwargs):
+            received.append((sender, values['total_points']))
+
+        counters_updated.connect(listener)
+        self.addCleanup(counters_updated.disconnect, listener)
+        add_points(self.user, 2)
+        self.assertEqual(received, [(UserPoints, 3)])
+
+    def test_reads_values_back_without_update_returning(self):
+        add_points(self.user, 2)
+        with mock.patch('api.counters._supports_update_returning', return_value=False):
+            values = increment(UserPoints, {'user_id': self.user.id}, {'total_points': 5}, returning=['total_points'])
+            self.assertIsNone(increment(UserPoints, {'user_id': 0}, {'total_points': 1}))
+        self.assertEqual(values['total_points'], 7)
+
+
+class AnswerCounterViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+
+    def test_daily_learning_attempts_are_added_in_the_database(self):
+        question = Question.objects.create(vietnamese_text='a', english_text='hello there')
+        session = DailyLearningSession.objects.create(
+            user=self.user, session_date=timezone.now().date(), target_questions=5
+        )
+        stale = None
+        for answer, seconds in [('nope', 4), ('hello there', 6)]:
+            response = self.client.post('/api/daily-learning/answer/', {
+                'username': 'alice', 'session_id': session.id, 'question_id': question.id,
+                'user_answer': answer, 'time_taken': seconds
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            stale = stale or DailyLearningQuestion.objects.get()
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.attempts, stale.time_taken, stale.is_correct), (2, 10, True))
+
+    def test_invalid_counts_are_rejected(self):
+        for body in [
+            {'questions_answered': 'abc'},
+            {'correct_answers': -1},
+            {'points_earned': '1.5'},
+        ]:
+            response = self.client.post('/api/tasks/daily-activity/', {'username': 'alice', **body}, format='json')
+            self.assertEqual(response.status_code, 400, body)
+        self.assertFalse(DailyTaskCompletion.objects.exists())
+        self.assertFalse(UserPoints.objects.exists())
+
+        response = self.client.post(
+            '/api/tasks/daily-activity/', {'username': 'alice', 'points_earned': '3'}, format='json'
+        )
+        self.assertEqual(response.json()['user_points']['total_points'], 3)
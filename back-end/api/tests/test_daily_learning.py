@@ -0,0 +1,102 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from api.models import DailyLearningQuestion, DailyLearningSession, Question, Topic
+
+from .base import APITestCase
+
+
+class DailyLearningTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.today = timezone.now().date()
+
+    def create_session(self, days_ago, **fields):
+        return DailyLearningSession.objects.create(
+            user=self.user, session_date=self.today - datetime.timedelta(days=days_ago),
+            target_questions=10, **fields
+        )
+
+
+class DailyLearningDashboardTests(DailyLearningTestCase):
+    def test_weekly_and_monthly_stats(self):
+        week_start = self.today - datetime.timedelta(days=self.today.weekday())
+        month_start = self.today.replace(day=1)
+
+        self.create_session(0, completed_questions=4, correct_answers=3, points_earned=30)
+        self.create_session(0, exercise_type='listening', completed_questions=2, correct_answers=1, points_earned=10)
+        for days_ago in [3, 10, 40]:
+            self.create_session(days_ago, completed_questions=days_ago, correct_answers=1, points_earned=10)
+        stats = DailyLearningSession.objects.filter(user=self.user)
+
+        def expected(start):
+            sessions = [s for s in stats if s.session_date >= start]
+            return {
+                'total_sessions': len(sessions),
+                'total_questions': sum(s.completed_questions for s in sessions),
+                'correct_answers': sum(s.correct_answers for s in sessions),
+                'points_earned': sum(s.points_earned for s in sessions),
+                'days_active': len({s.session_date for s in sessions}),
+            }
+
+        data = self.client.get('/api/daily-learning/dashboard/', {'username': 'alice'}).json()
+        self.assertEqual(data['weekly_stats'], expected(week_start))
+        self.assertEqual(data['monthly_stats'], expected(month_start))
+        self.assertEqual(len(data['today_sessions']), 2)
+
+    def test_uncached_dashboard_queries(self):
+        self.create_session(0, completed_questions=1)
+        # The first request creates the settings and streak rows
+        self.client.get('/api/daily-learning/dashboard/', {'username': 'alice'})
+        cache.clear()
+
+        # Settings and their topics, streak, weekly and monthly stats in one
+        # aggregate, and today's sessions
+        with self.assertNumQueries(5):
+            self.client.get('/api/daily-learning/dashboard/', {'username': 'alice'})
+
+
+class DailyLearningHistoryTests(DailyLearningTestCase):
+    def create_history(self, days, start=0):
+        topic = Topic.objects.create(name=f'T{start}')
+        for days_ago in range(start, start + days):
+            session = self.create_session(days_ago, completed_questions=2)
+            for index in range(2):
+                question = Question.objects.create(
+                    vietnamese_text=f'C{days_ago}-{index}', english_text=f'q{days_ago}-{index}', topic=topic
+                )
+                DailyLearningQuestion.objects.create(
+                    session=session, question=question, user_answer='x', is_correct=bool(index)
+                )
+
+    def history(self, **params):
+        return self.client.get('/api/daily-learning/history/', {'username': 'alice', **params}).json()
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.create_history(2)
+        self.history()
+        # Page count, the page of sessions and their questions
+        with self.assertNumQueries(3):
+            small = self.history()
+
+        self.create_history(6, start=2)
+        with self.assertNumQueries(3):
+            large = self.history()
+        self.assertEqual((small['count'], large['count']), (2, 8))
+
+        session = large['results'][0]
+        self.assertEqual(len(session['session_questions']), 2)
+        self.assertEqual(session['session_questions'][0]['topic_name'], 'T0')
+
+    def test_pagination(self):
+        self.create_history(5)
+        data = self.history(page=2, page_size=2)
+        self.assertEqual((data['count'], data['total_pages'], data['previous'], data['next']), (5, 3, 1, 3))
+        self.assertEqual(
+            [row['session_date'] for row in data['results']],
+            [str(self.today - datetime.timedelta(days=days_ago)) for days_ago in (2, 3)]
+        )
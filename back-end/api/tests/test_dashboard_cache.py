@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+
+from api.checks import check_shared_cache
+from api.models import DailyLearningSession, UserPoints
+
+from .base import APITestCase
+
+
+class DashboardCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='dc')
+
+    def get(self, path):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(f'{path}?username=dc').json()
+
+    def test_task_dashboard_is_served_from_cache_until_points_change(self):
+        # The first request creates the user's points and task rows
+        self.get('/api/tasks/dashboard/')
+        self.get('/api/tasks/dashboard/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/tasks/dashboard/?username=dc')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            points = UserPoints.objects.get(user=self.user)
+            points.total_points = 50
+            points.save()
+        self.assertEqual(self.get('/api/tasks/dashboard/')['user_points']['total_points'], 50)
+
+    def test_daily_learning_dashboard_is_invalidated_by_new_sessions(self):
+        # The first request creates the user's settings and streak rows
+        self.get('/api/daily-learning/dashboard/')
+        self.get('/api/daily-learning/dashboard/')
+        with self.assertNumQueries(0):
+            self.client.get('/api/daily-learning/dashboard/?username=dc')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyLearningSession.objects.create(
+                user=self.user, session_date=timezone.now().date(), completed_questions=4
+            )
+        data = self.get('/api/daily-learning/dashboard/')
+        self.assertEqual(data['weekly_stats']['total_questions'], 4)
+
+    def test_stats_count_hits_and_misses(self):
+        for _ in range(3):
+            self.get('/api/tasks/dashboard/')
+        stats = self.client.get('/api/dashboard-cache/stats/').json()
+        self.assertEqual((stats['tasks']['hits'], stats['tasks']['misses']), (1, 2))
+
+
+class SharedCacheCheckTests(APITestCase):
+    local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://x'}}
+
+    def test_warns_about_process_local_cache_outside_debug(self):
+        with override_settings(DEBUG=False, CACHES=self.local):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['api.W001'])
+        with override_settings(DEBUG=True, CACHES=self.local):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(DEBUG=False, CACHES=self.shared):
+            self.assertEqual(check_shared_cache(None), [])
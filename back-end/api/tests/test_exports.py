@@ -0,0 +1,153 @@
+import datetime
+import gzip
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from api.models import DailyLearningQuestion, DailyLearningSession, Question, UserAnswer
+
+from .base import APITestCase
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(User.objects.create(username='analyst', is_staff=True))
+
+    def export(self, dataset='questions', **params):
+        response = self.client.get(f'/api/export/{dataset}/', params)
+        body = b''.join(response.streaming_content)
+        if params.get('gzip'):
+            body = gzip.decompress(body)
+        return response, [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+    def test_full_export_streams_rows_in_id_order(self):
+        questions = [Question.objects.create(vietnamese_text=f'C{i}', english_text=f'q{i}') for i in range(3)]
+
+        response, rows = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([row['id'] for row in rows], [q.id for q in questions])
+        self.assertEqual(rows[0]['english_text'], 'q0')
+        self.assertEqual(response['X-Export-Last-Id'], str(questions[-1].id))
+
+    def test_after_id_picks_up_rows_committed_late(self):
+        first = Question.objects.create(vietnamese_text='C1', english_text='q1')
+        response, _ = self.export()
+        last_id = response['X-Export-Last-Id']
+
+        # Committed after the first pull but stamped earlier (its transaction
+        # started first): a created_at watermark would skip it
+        late = Question.objects.create(vietnamese_text='C2', english_text='q2')
+        Question.objects.filter(id=late.id).update(created_at=first.created_at - datetime.timedelta(seconds=5))
+
+        response, rows = self.export(after_id=last_id)
+        self.assertEqual([row['id'] for row in rows], [late.id])
+        self.assertEqual(response['X-Export-Last-Id'], str(late.id))
+
+        response, rows = self.export(after_id=response['X-Export-Last-Id'], gzip='1')
+        self.assertEqual(rows, [])
+        self.assertEqual(response['X-Export-Last-Id'], str(late.id))
+
+    def test_since_still_filters_by_creation_time(self):
+        old = Question.objects.create(vietnamese_text='C1', english_text='q1')
+        Question.objects.filter(id=old.id).update(created_at=timezone.now() - datetime.timedelta(days=3))
+        new = Question.objects.create(vietnamese_text='C2', english_text='q2')
+
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+        _, rows = self.export(since=since)
+        self.assertEqual([row['id'] for row in rows], [new.id])
+
+    def test_rejects_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/export/questions/', {'after_id': '-1'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export/questions/', {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/export/unknown/').status_code, 404)
+
+    def test_command_reports_the_watermark(self):
+        question = Question.objects.create(vietnamese_text='C1', english_text='q1')
+        stderr = StringIO()
+
+        call_command('export_data', 'questions', '--after-id', '0', '--output', '/dev/null', stderr=stderr)
+
+        self.assertIn(f'Last id: {question.id}', stderr.getvalue())
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/export/questions/').status_code, 401)
+
+    def test_answer_exports_cover_every_user_only_for_staff(self):
+        question = Question.objects.create(vietnamese_text='C1', english_text='q1')
+        alice = User.objects.create(username='alice')
+        bob = User.objects.create(username='bob')
+        for user in [alice, bob]:
+            UserAnswer.objects.create(user=user, question=question, user_answer='a', is_correct=True)
+
+        _, rows = self.export('user-answers')
+        self.assertEqual({row['user_username'] for row in rows}, {'alice', 'bob'})
+
+        self.client.force_authenticate(alice)
+        _, rows = self.export('user-answers')
+        self.assertEqual([row['user_username'] for row in rows], ['alice'])
+        _, rows = self.export('questions')
+        self.assertEqual(len(rows), 1)
+
+
+@override_settings(EXPORT_CURSOR_LAG=0)
+class UpdatedAtCursorExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.client.force_authenticate(self.user)
+        self.session = DailyLearningSession.objects.create(
+            user=self.user, session_date=timezone.now().date(), target_questions=5
+        )
+        self.questions = [Question.objects.create(vietnamese_text=f'C{i}', english_text=f'q{i}') for i in range(2)]
+
+    def export(self, **params):
+        response = self.client.get('/api/export/daily-learning-answers/', params)
+        body = b''.join(response.streaming_content)
+        return response, [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+    def answer(self, question, text):
+        return self.client.post('/api/daily-learning/answer/', {
+            'username': 'alice', 'session_id': self.session.id, 'question_id': question.id, 'user_answer': text
+        }, format='json')
+
+    def test_rows_changed_after_a_pull_are_exported_again(self):
+        self.answer(self.questions[0], 'nope')
+        self.answer(self.questions[1], 'q1')
+        response, rows = self.export()
+        self.assertEqual([row['question_id'] for row in rows], [q.id for q in self.questions])
+        self.assertNotIn('X-Export-Last-Id', response)
+
+        # A second attempt changes the first row in place; its id stays the same
+        self.answer(self.questions[0], 'q0')
+        response, rows = self.export(cursor=response['X-Export-Cursor'])
+        self.assertEqual([(row['question_id'], row['attempts'], row['is_correct']) for row in rows], [
+            (self.questions[0].id, 2, True)
+        ])
+
+        cursor = response['X-Export-Cursor']
+        response, rows = self.export(cursor=cursor)
+        self.assertEqual(rows, [])
+        self.assertEqual(response['X-Export-Cursor'], cursor)
+
+    def test_rows_changed_within_the_lag_wait_for_the_next_pull(self):
+        self.answer(self.questions[0], 'q0')
+        DailyLearningQuestion.objects.update(updated_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.answer(self.questions[1], 'q1')
+
+        with self.settings(EXPORT_CURSOR_LAG=60):
+            response, rows = self.export()
+        self.assertEqual([row['question_id'] for row in rows], [self.questions[0].id])
+
+        _, rows = self.export(cursor=response['X-Export-Cursor'])
+        self.assertEqual([row['question_id'] for row in rows], [self.questions[1].id])
+
+    def test_rejects_an_id_as_cursor(self):
+        response = self.client.get('/api/export/daily-learning-answers/', {'after_id': '3'})
+        self.assertEqual(response.status_code, 400)
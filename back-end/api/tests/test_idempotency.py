@@ -0,0 +1,93 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import DailyLearningSession, IdempotencyKey, Question, UserAnswer, UserPoints
+
+from .base import APITestCase
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='ik')
+        self.question = Question.objects.create(vietnamese_text='a', english_text='hello there')
+        self.body = {'question_id': self.question.id, 'user_answer': 'hello there', 'username': 'ik'}
+
+    def check(self, body, key):
+        return self.client.post('/api/check-answer/', body, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.check(self.body, 'k1')
+        with self.assertNumQueries(1):
+            second = self.check(self.body, 'k1')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(UserAnswer.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.check(self.body, 'k1')
+        response = self.check(dict(self.body, user_answer='x'), 'k1')
+        self.assertEqual(response.status_code, 422)
+
+    def test_pending_key_conflicts_until_it_is_abandoned(self):
+        from api.idempotency import PENDING_TIMEOUT, _fingerprint, _key_hash
+        entry = IdempotencyKey.objects.create(
+            key=_key_hash('check-answer', 'ik', 'k1'), fingerprint=_fingerprint(self.body)
+        )
+        self.assertEqual(self.check(self.body, 'k1').status_code, 409)
+
+        entry.created_at -= datetime.timedelta(seconds=PENDING_TIMEOUT + 1)
+        entry.save()
+        self.assertEqual(self.check(self.body, 'k1').status_code, 200)
+        self.assertEqual(UserAnswer.objects.count(), 1)
+
+    def test_daily_learning_answer_is_counted_once(self):
+        session = DailyLearningSession.objects.create(
+            user=self.user, session_date=timezone.now().date(), target_questions=5
+        )
+        body = {'username': 'ik', 'session_id': session.id, 'question_id': self.question.id, 'user_answer': 'hello there'}
+        for _ in range(3):
+            self.client.post('/api/daily-learning/answer/', body, format='json', HTTP_IDEMPOTENCY_KEY='d1')
+        session.refresh_from_db()
+        self.assertEqual(session.completed_questions, 1)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+
+    def test_failed_requests_release_the_key(self):
+        with mock.patch('api.views.write_answers', side_effect=RuntimeError('database is locked')):
+            with self.assertRaises(RuntimeError):
+                self.check(self.body, 'k2')
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.check(self.body, 'k2').status_code, 200)
+
+    def test_server_error_after_writing_rolls_the_writes_back(self):
+        session = DailyLearningSession.objects.create(
+            user=self.user, session_date=timezone.now().date(), target_questions=5
+        )
+        body = {'username': 'ik', 'session_id': session.id, 'question_id': self.question.id, 'user_answer': 'hello there'}
+        # The view's own transaction has committed when building the response fails
+        with mock.patch.object(DailyLearningSession, 'get_accuracy_rate', side_effect=RuntimeError('boom')):
+            response = self.client.post('/api/daily-learning/answer/', body, format='json', HTTP_IDEMPOTENCY_KEY='d2')
+        self.assertEqual(response.status_code, 500)
+        session.refresh_from_db()
+        self.assertEqual(session.completed_questions, 0)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post('/api/daily-learning/answer/', body, format='json', HTTP_IDEMPOTENCY_KEY='d2')
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual(session.completed_questions, 1)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+
+    def test_purge_deletes_expired_keys(self):
+        self.check(self.body, 'old')
+        self.check(self.body, 'new')
+        IdempotencyKey.objects.filter(pk=IdempotencyKey.objects.order_by('id')[0].pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=2)
+        )
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
@@ -0,0 +1,246 @@
+import datetime
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from api.importers import (
+    MAX_JOB_ATTEMPTS, STALE_JOB_SECONDS, QuestionBulkImporter, claim_next_import_job, detect_import_format,
+    iter_file_range, iter_text_chunks, parse_import_file, parse_questions_file, plan_file_segments,
+    prepare_segment
+)
+from api.models import Question, QuestionImportJob, QuestionLSHBucket
+
+from .base import APITestCase
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class QuestionImportTests(APITestCase):
+    def upload(self, body, name='questions.txt', **data):
+        return self.client.post(
+            '/api/questions/import/',
+            {'file': SimpleUploadedFile(name, body), **data},
+            format='multipart'
+        )
+
+    def run_jobs(self):
+        call_command('process_import_jobs', '--once', '--batch-size', '2', stdout=StringIO())
+
+    def job(self, response):
+        return self.client.get(f"/api/questions/import/{response.json()['job_id']}/").json()
+
+    def test_import_skips_duplicates_and_reports_errors(self):
+        Question.objects.create(vietnamese_text='A', english_text='a')
+        body = (
+            'Question: A\nAnswer: a\nTopic: T1\n\n'
+            'Question: B\nAnswer: b\nTopic: T1\nStatus: Dễ\n\n'
+            'Question: B\nAnswer: b\n\n'
+            'Question: C\nAnswer: c\nTopic: ' + 'x' * 120 + '\n'
+        )
+        response = self.upload(body.encode())
+        self.assertEqual(response.status_code, 202)
+        self.run_jobs()
+
+        job = self.job(response)
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual((job['created_count'], job['duplicate_count'], job['error_count']), (1, 2, 1))
+        question = Question.objects.get(vietnamese_text='B')
+        self.assertEqual((question.topic.name, question.difficulty), ('T1', 'easy'))
+
+    def test_file_without_questions_fails_the_job(self):
+        response = self.upload(b'\n\nfoo\n')
+        self.run_jobs()
+        self.assertEqual(self.job(response)['status'], 'failed')
+
+    def test_bulk_save_uses_constant_queries(self):
+        rows = [
+            {'vietnamese': 'B', 'english': 'b', 'topic': 'T1'},
+            {'vietnamese': 'C', 'english': 'c', 'topic': 'T2'},
+        ]
+        with self.assertNumQueries(9):
+            result = QuestionBulkImporter().run(rows)
+        self.assertEqual(result['created_count'], 2)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StaleImportJobTests(APITestCase):
+    def create_job(self, **fields):
+        job = QuestionImportJob.objects.create(
+            file=SimpleUploadedFile('questions.txt', b'Question: A\nAnswer: a\n'),
+            original_name='questions.txt',
+            **fields
+        )
+        stale = timezone.now() - datetime.timedelta(seconds=STALE_JOB_SECONDS + 1)
+        QuestionImportJob.objects.filter(id=job.id).update(updated_at=stale)
+        return job
+
+    def test_stale_running_job_is_requeued_and_claimed_again(self):
+        job = self.create_job(status='running', attempts=1, created_count=7)
+        with self.assertLogs('api.importers', 'WARNING'):
+            claimed = claim_next_import_job()
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.created_count), ('running', 2, 0))
+
+    def test_job_that_keeps_losing_its_worker_fails(self):
+        job = self.create_job(status='running', attempts=MAX_JOB_ATTEMPTS)
+        with self.assertLogs('api.importers', 'WARNING'):
+            self.assertIsNone(claim_next_import_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_running_job_with_recent_progress_is_left_alone(self):
+        job = self.create_job(status='running', attempts=1)
+        QuestionImportJob.objects.filter(id=job.id).update(updated_at=timezone.now())
+        self.assertIsNone(claim_next_import_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'running')
+
+
+class StreamingParserTests(SimpleTestCase):
+    def test_characters_split_across_chunks_are_decoded_once(self):
+        data = '\ufeffQuestion: Xin chào\nAnswer: Hello\n\nQuestion: Tạm biệt\nAnswer: Bye'.encode('utf-8')
+        chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+        self.assertEqual(
+            [(q['vietnamese'], q['english']) for q in parse_questions_file(chunks)],
+            [('Xin chào', 'Hello'), ('Tạm biệt', 'Bye')]
+        )
+
+    def test_invalid_utf8_falls_back_to_latin1(self):
+        self.assertEqual(''.join(iter_text_chunks([b'caf\xe9 ', b'ok'])), 'café ok')
+
+    def test_blocks_without_an_answer_are_skipped(self):
+        body = b'Question: A\n\nQuestion: B\nAnswer: b\nStatus: Kh\xc3\xb3\n'
+        self.assertEqual(
+            list(parse_questions_file([body])),
+            [{'vietnamese': 'B', 'english': 'b', 'topic': '', 'difficulty': 'hard'}]
+        )
+
+
+class StructuredFormatTests(SimpleTestCase):
+    def test_csv_with_header_and_aliases(self):
+        body = 'english,Question,level,topic\nhello,Xin chào,Dễ,Greetings\nbye,Tạm biệt,,\n'.encode()
+        self.assertEqual(list(parse_import_file([body], 'csv')), [
+            {'vietnamese': 'Xin chào', 'english': 'hello', 'topic': 'Greetings', 'difficulty': 'easy'},
+            {'vietnamese': 'Tạm biệt', 'english': 'bye', 'topic': '', 'difficulty': 'medium'},
+        ])
+
+    def test_tsv_without_header_is_positional(self):
+        body = 'Xin chào\thello\tGreetings\thard\n'.encode()
+        self.assertEqual(list(parse_import_file([body], 'tsv')), [
+            {'vietnamese': 'Xin chào', 'english': 'hello', 'topic': 'Greetings', 'difficulty': 'hard'},
+        ])
+
+    def test_rows_with_extra_columns_and_bad_json_are_errors(self):
+        rows = list(parse_import_file([b'question,answer\na,b,c\n'], 'csv'))
+        self.assertIn('error', rows[0])
+
+        rows = list(parse_import_file([b'{"vi": "a", "en": "b", "difficulty": "weird"}\n[1]\n{oops\n'], 'jsonl'))
+        self.assertEqual(rows[0], {'vietnamese': 'a', 'english': 'b', 'topic': '', 'difficulty': 'weird'})
+        self.assertEqual(len([row for row in rows if 'error' in row]), 2)
+
+    def test_format_follows_the_file_extension(self):
+        self.assertEqual(detect_import_format('Questions.NDJSON'), 'jsonl')
+        self.assertEqual(detect_import_format('questions.tsv'), 'tsv')
+        self.assertIsNone(detect_import_format('questions.xlsx'))
+
+
+def write_file(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    return path
+
+
+TEXT_BLOCKS = ''.join(
+    f'Question: Câu số {index}\nAnswer: Sentence {index}\nTopic: T{index % 3}\n\n' for index in range(40)
+)
+JSONL_ROWS = ''.join(json.dumps({'vi': f'Dòng {index}', 'en': f'Line {index}'}) + '\n' for index in range(40))
+
+
+class FileSegmentTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def parse_segments(self, segments):
+        return [
+            record
+            for path, file_format, start, end in segments
+            for record in parse_import_file(iter_file_range(path, start, end), file_format)
+        ]
+
+    def test_segments_cover_the_file_and_split_on_record_boundaries(self):
+        for name, text, file_format in [('q.txt', TEXT_BLOCKS, 'text'), ('q.jsonl', JSONL_ROWS, 'jsonl')]:
+            path = write_file(self.directory, name, text)
+            segments = plan_file_segments(path, file_format, segment_size=100)
+            self.assertGreater(len(segments), 5)
+            self.assertEqual(segments[0][2], 0)
+            self.assertEqual(segments[-1][3], os.path.getsize(path))
+            for previous, segment in zip(segments, segments[1:]):
+                self.assertEqual(previous[3], segment[2])
+
+            whole = list(parse_import_file(iter_file_range(path, 0, os.path.getsize(path)), file_format))
+            self.assertEqual(len(whole), 40)
+            self.assertEqual(self.parse_segments(segments), whole)
+
+    def test_delimited_files_and_small_files_stay_whole(self):
+        csv_path = write_file(self.directory, 'q.csv', 'question,answer\n' + 'a,b\n' * 100)
+        self.assertEqual(plan_file_segments(csv_path, 'csv', segment_size=10), [(csv_path, 'csv', 0, os.path.getsize(csv_path))])
+        text_path = write_file(self.directory, 'q.txt', TEXT_BLOCKS)
+        self.assertEqual(len(plan_file_segments(text_path, 'text')), 1)
+
+    def test_prepare_segment_hashes_valid_records_only(self):
+        path = write_file(self.directory, 'q.jsonl', '{"vi": "Xin chào", "en": "Hello"}\n{oops\n')
+        valid, invalid = prepare_segment((path, 'jsonl', 0, os.path.getsize(path)))
+        self.assertEqual(valid['content_hash'], Question.compute_content_hash('Xin chào', 'Hello'))
+        self.assertIsInstance(valid['minhash'], bytes)
+        self.assertIn('error', invalid)
+        self.assertNotIn('content_hash', invalid)
+
+
+class LoadQuestionsCommandTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def load(self, *args):
+        # Small segments so that each file is parsed by several pool tasks
+        def small_segments(path, file_format):
+            return plan_file_segments(path, file_format, segment_size=200)
+
+        out = StringIO()
+        with mock.patch('api.management.commands.load_questions.plan_file_segments', side_effect=small_segments):
+            call_command('load_questions', *args, '--batch-size', '7', stdout=out)
+        return out.getvalue()
+
+    def test_counts_from_every_worker_are_merged(self):
+        write_file(self.directory, 'a.txt', TEXT_BLOCKS)
+        # Every row repeats a question of a.txt, plus one invalid line
+        duplicates = ''.join(
+            json.dumps({'vi': f'Câu số {index}', 'en': f'Sentence {index}'}) + '\n' for index in range(40)
+        )
+        write_file(self.directory, 'b.jsonl', duplicates + '{oops\n')
+        write_file(self.directory, 'notes.md', 'ignored')
+
+        output = self.load(self.directory, '--workers', '2', '--near-duplicates', 'off')
+
+        self.assertIn('Parsed: 81\n', output)
+        self.assertIn('Created: 40\n', output)
+        self.assertIn('Duplicates: 40\n', output)
+        self.assertIn('Errors: 1\n', output)
+        self.assertEqual(Question.objects.count(), 40)
+        self.assertEqual(Question.objects.filter(topic__name='T2').count(), 13)
+        self.assertEqual(QuestionLSHBucket.objects.values('question').distinct().count(), 40)
+
+    def test_rerunning_a_load_creates_nothing(self):
+        path = write_file(self.directory, 'a.jsonl', JSONL_ROWS)
+        self.load(path, '--workers', '1')
+        output = self.load(path, '--workers', '1')
+        self.assertIn('Created: 0\n', output)
+        self.assertIn('Duplicates: 40\n', output)
+        self.assertEqual(Question.objects.count(), 40)
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api.leaderboard import ScoreBoard, leaderboard_index
+from api.models import UserPoints
+
+from .base import APITestCase
+
+
+class ScoreBoardTests(APITestCase):
+    def test_incremental_updates_keep_leaderboard_order(self):
+        board = ScoreBoard()
+        board.load([(1, 5, 0), (2, 5, 0), (3, 7, 0)])
+        board.upsert(2, 9, 0)
+        board.upsert(4, 5, 0)
+        board.remove(1)
+        self.assertEqual(board.entries(0, 10), [(2, 9, 1), (3, 7, 2), (4, 5, 3)])
+        self.assertEqual(board.position_of(4), 2)
+
+
+class LeaderboardViewTests(APITestCase):
+    def create_users(self, rows):
+        for index, (total, weekly) in enumerate(rows):
+            UserPoints.objects.create(
+                user=User.objects.create(username=f'u{index}'),
+                total_points=total, weekly_points=weekly, longest_streak=index
+            )
+
+    def test_ranks_share_ties(self):
+        self.create_users([(10, 5), (30, 5), (20, 1), (30, 0)])
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/leaderboard/?limit=3').json()
+        self.assertEqual([row['total_points'] for row in data['leaderboard']], [30, 30, 20])
+        self.assertEqual([row['total_rank'] for row in data['leaderboard']], [1, 1, 3])
+        self.assertEqual(data['total_users'], 4)
+
+        data = self.client.get('/api/leaderboard/?type=weekly').json()
+        self.assertEqual([row['weekly_rank'] for row in data['leaderboard']], [1, 1, 3, 4])
+
+    def test_around_and_pagination(self):
+        self.create_users([(index, index % 4) for index in range(20)])
+        data = self.client.get('/api/leaderboard/?around=u10&radius=2').json()
+        self.assertEqual(
+            [(row['username'], row['rank']) for row in data['leaderboard']],
+            [('u12', 8), ('u11', 9), ('u10', 10), ('u9', 11), ('u8', 12)]
+        )
+        data = self.client.get('/api/leaderboard/?after_rank=15&limit=10').json()
+        self.assertEqual([row['rank'] for row in data['leaderboard']], [16, 17, 18, 19, 20])
+        self.assertIsNone(data['next_after_rank'])
+        self.assertEqual(self.client.get('/api/leaderboard/?around=nobody').status_code, 404)
+
+    def test_index_syncs_writes_from_other_processes(self):
+        self.create_users([(10, 5), (30, 5), (20, 1)])
+        leaderboard_index.ensure_fresh(force=True)
+        # QuerySet.update sends no signal, like a write made by another worker
+        UserPoints.objects.filter(user__username='u0').update(total_points=100, updated_at=timezone.now())
+        leaderboard_index.ensure_fresh(force=True)
+        self.assertEqual(leaderboard_index.top('total', 1)[0][1], 100)
+
+        UserPoints.objects.filter(user__username='u0').delete()
+        leaderboard_index.ensure_fresh(force=True)
+        self.assertEqual(leaderboard_index.total_users(), 2)
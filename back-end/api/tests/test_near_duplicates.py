@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api import near_duplicates
+from api.importers import QuestionBulkImporter
+from api.models import Question, QuestionLSHBucket
+from api.near_duplicates import (
+    MAX_BUCKET_CANDIDATES, compute_signature, estimate_similarity, find_duplicate_clusters, find_near_duplicates,
+    insert_buckets, signature_to_bytes
+)
+
+from .base import APITestCase
+
+
+ORIGINAL = {
+    'vietnamese': 'Hôm nay trời rất đẹp và chúng tôi đi dạo trong công viên',
+    'english': 'The weather is very nice today and we are walking in the park',
+}
+NEAR_COPY = {
+    'vietnamese': 'Hôm nay trời rất đẹp và chúng tôi đi dạo trong công viên!',
+    'english': 'The weather is very nice today, and we are walking in the park.',
+}
+UNRELATED = {
+    'vietnamese': 'Tôi cần mua một chiếc xe đạp mới cho con gái',
+    'english': 'I need to buy a new bicycle for my daughter',
+}
+
+
+class SignatureTests(SimpleTestCase):
+    def test_similarity_tracks_text_overlap(self):
+        original, near_copy, unrelated = [
+            compute_signature(data['vietnamese'], data['english']) for data in (ORIGINAL, NEAR_COPY, UNRELATED)
+        ]
+        # Punctuation is dropped before shingling
+        self.assertEqual(estimate_similarity(original, near_copy), 1)
+        self.assertLess(estimate_similarity(original, unrelated), 0.2)
+
+
+class NearDuplicateImportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        QuestionBulkImporter().run([dict(ORIGINAL)])
+
+    def test_flag_mode_imports_and_reports_the_match(self):
+        result = QuestionBulkImporter().run([dict(NEAR_COPY), dict(UNRELATED)])
+
+        self.assertEqual((result['created_count'], result['near_duplicate_count']), (2, 1))
+        match = result['near_duplicates'][0]
+        self.assertEqual(match['similar_to_id'], Question.objects.get(vietnamese_text=ORIGINAL['vietnamese']).id)
+        # The flagged copy is saved, but only its match represents the cluster in the index
+        self.assertFalse(QuestionLSHBucket.objects.filter(question__vietnamese_text=NEAR_COPY['vietnamese']).exists())
+        self.assertTrue(QuestionLSHBucket.objects.filter(question__vietnamese_text=UNRELATED['vietnamese']).exists())
+
+    def test_skip_mode_drops_near_duplicates_within_the_file_too(self):
+        second_copy = dict(UNRELATED, vietnamese=UNRELATED['vietnamese'] + '.')
+        result = QuestionBulkImporter(near_duplicate_mode='skip').run(
+            [dict(NEAR_COPY), dict(UNRELATED), second_copy]
+        )
+
+        self.assertEqual((result['created_count'], result['near_duplicate_count']), (1, 2))
+        self.assertEqual(result['near_duplicates'][1]['similar_to'], UNRELATED['vietnamese'])
+        self.assertEqual(Question.objects.count(), 2)
+
+    def test_clusters_of_indexed_questions(self):
+        Question.objects.create(vietnamese_text=NEAR_COPY['vietnamese'], english_text=NEAR_COPY['english'])
+        self.assertEqual(find_duplicate_clusters(), [sorted(Question.objects.values_list('id', flat=True))])
+
+    def test_near_copies_of_a_template_leave_one_indexed_question(self):
+        for round_number in range(3):
+            result = QuestionBulkImporter().run([
+                {'vietnamese': f"{ORIGINAL['vietnamese']} {round_number}.{i}", 'english': ORIGINAL['english']}
+                for i in range(20)
+            ])
+            self.assertEqual(result['near_duplicate_count'], 20)
+        self.assertEqual(QuestionLSHBucket.objects.values('question').distinct().count(), 1)
+
+
+class LookupCostTests(APITestCase):
+    def create_cluster(self, size):
+        signature = compute_signature(ORIGINAL['vietnamese'], ORIGINAL['english'])
+        questions = Question.objects.bulk_create([
+            Question(
+                vietnamese_text=f'{i}', english_text=f'{i}', content_hash=f'{size}-{i}',
+                minhash=signature_to_bytes(signature)
+            )
+            for i in range(size)
+        ])
+        # Rows indexed before imports kept one representative per cluster
+        insert_buckets([(question.pk, signature) for question in questions])
+        return signature
+
+    def comparisons(self, signature):
+        with mock.patch.object(
+            near_duplicates, 'estimate_similarity', wraps=near_duplicates.estimate_similarity
+        ) as estimate:
+            self.assertEqual(len(find_near_duplicates([signature])), 1)
+        return estimate.call_count
+
+    def test_lookup_cost_does_not_grow_with_the_cluster(self):
+        signature = self.create_cluster(10)
+        small = self.comparisons(signature)
+        self.create_cluster(MAX_BUCKET_CANDIDATES * 3)
+        self.assertEqual(small, 10)
+        self.assertEqual(self.comparisons(signature), MAX_BUCKET_CANDIDATES)
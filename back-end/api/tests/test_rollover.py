@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+
+from api.models import UserPoints, WeeklyPointsSnapshot
+
+from .base import APITestCase
+
+
+class RolloverTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for index, points in enumerate([5, 9, 9, 0]):
+            UserPoints.objects.create(
+                user=User.objects.create(username=f'u{index}'),
+                weekly_points=points, total_points=points + 100
+            )
+
+    def rollover(self, week_start='2026-10-12'):
+        stdout = StringIO()
+        call_command('rollover_week', '--week-start', week_start, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_archives_ranks_and_resets_weekly_points(self):
+        self.assertIn('Archived 4 users', self.rollover())
+
+        self.assertEqual(
+            sorted(WeeklyPointsSnapshot.objects.values_list('user__username', 'weekly_points', 'rank')),
+            [('u0', 5, 3), ('u1', 9, 1), ('u2', 9, 1), ('u3', 0, 4)]
+        )
+        self.assertEqual(set(UserPoints.objects.values_list('weekly_points', flat=True)), {0})
+        self.assertEqual(UserPoints.objects.get(user__username='u1').total_points, 109)
+
+    def test_second_run_for_the_same_week_does_nothing(self):
+        self.rollover()
+        UserPoints.objects.filter(user__username='u0').update(weekly_points=3)
+
+        self.assertIn('already rolled over', self.rollover())
+        self.assertEqual(UserPoints.objects.get(user__username='u0').weekly_points, 3)
+        self.assertEqual(WeeklyPointsSnapshot.objects.count(), 4)
+
+    def test_rejects_a_week_start_that_is_not_a_monday(self):
+        with self.assertRaises(CommandError):
+            self.rollover('2026-10-13')
+
+    def test_archived_leaderboard(self):
+        self.rollover()
+        url = '/api/leaderboard/'
+
+        with self.assertNumQueries(2):
+            data = self.client.get(url, {'type': 'weekly', 'week_start': '2026-10-12', 'limit': 2}).json()
+        self.assertEqual([row['rank'] for row in data['leaderboard']], [1, 1])
+        self.assertEqual(data['next_after_rank'], 2)
+
+        data = self.client.get(url, {
+            'type': 'weekly', 'week_start': '2026-10-12', 'around': 'u3', 'radius': 1
+        }).json()
+        self.assertEqual([row['username'] for row in data['leaderboard']], ['u0', 'u3'])
+
+        self.assertEqual(self.client.get(url, {'type': 'weekly', 'week_start': '2026-10-05'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'type': 'weekly', 'week_start': 'last'}).status_code, 400)
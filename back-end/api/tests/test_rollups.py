@@ -0,0 +1,47 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api.models import UserDailyRollup
+
+from .base import APITestCase
+
+
+class UserDailyRollupTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='alice')
+        self.today = timezone.now().date()
+
+    def test_answers_accumulate_in_one_row_per_day(self):
+        UserDailyRollup.record_answer(self.user, 'practice', True, points=5)
+        UserDailyRollup.record_answer(self.user.id, 'listening', False, seconds=12)
+        UserDailyRollup.record_answers(self.user, 'weekly', 3, 2, points=10)
+
+        rollup = UserDailyRollup.objects.get()
+        self.assertEqual(
+            (rollup.date, rollup.questions_answered, rollup.correct_answers, rollup.points_earned, rollup.seconds_spent),
+            (self.today, 5, 3, 15, 12)
+        )
+        self.assertEqual(
+            (rollup.practice_answers, rollup.listening_answers, rollup.weekly_answers, rollup.translation_answers),
+            (1, 1, 3, 0)
+        )
+
+    def test_summarize_sums_a_date_range(self):
+        for days_ago, count in [(0, 2), (1, 0), (3, 4), (10, 8)]:
+            UserDailyRollup.record_answers(
+                self.user, 'practice', count, count, date=self.today - datetime.timedelta(days=days_ago)
+            )
+
+        with self.assertNumQueries(1):
+            totals = UserDailyRollup.summarize(self.user, self.today - datetime.timedelta(days=6))
+        self.assertEqual(totals['questions_answered'], 6)
+        # A day with a row but no answers does not count as active
+        self.assertEqual(totals['days_active'], 2)
+
+        totals = UserDailyRollup.summarize(
+            self.user, self.today - datetime.timedelta(days=10), self.today - datetime.timedelta(days=3)
+        )
+        self.assertEqual((totals['questions_answered'], totals['days_active']), (12, 2))
@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import WeeklyTask
+
+from .base import APITestCase
+
+
+class TaskDashboardTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create(username='alice')
+
+    def create_tasks(self, count):
+        # Task changes drop every dashboard snapshot on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(count):
+                WeeklyTask.objects.create(
+                    title=f'T{index}', description='d', task_type='daily_practice',
+                    target_count=index + 1, points_reward=5
+                )
+
+    def uncached_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/dashboard/', {'username': 'alice'})
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        self.create_tasks(2)
+        # The first load creates the points and progress rows
+        self.client.get('/api/tasks/dashboard/', {'username': 'alice'})
+        few, data = self.uncached_queries()
+        self.assertEqual(len(data['weekly_tasks']), 2)
+        # Points, tasks, progress, today's completion and the weekly summary
+        self.assertEqual(few, 5)
+
+        self.create_tasks(8)
+        self.client.get('/api/tasks/dashboard/', {'username': 'alice'})
+        many, data = self.uncached_queries()
+        self.assertEqual(len(data['weekly_tasks']), 10)
+        self.assertEqual(few, many)
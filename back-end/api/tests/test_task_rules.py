@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Question, Topic, UserPoints, UserTaskProgress, WeeklyTask
+from api.task_rules import evaluate_user_week
+
+from .base import APITestCase
+
+
+class TaskRuleEngineTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='tr')
+        topic = Topic.objects.create(name='t1')
+        self.question = Question.objects.create(vietnamese_text='a', english_text='hello there', topic=topic)
+        self.tasks = {
+            task_type: WeeklyTask.objects.create(
+                title=task_type, description='d', task_type=task_type, target_count=target, points_reward=1
+            )
+            for task_type, target in [
+                ('daily_practice', 3), ('correct_answers', 2), ('perfect_week', 1),
+                ('streak_master', 1), ('topic_master', 2),
+            ]
+        }
+
+    def check(self, answer):
+        return self.client.post(
+            '/api/check-answer/',
+            {'question_id': self.question.id, 'user_answer': answer, 'username': 'tr'},
+            format='json'
+        )
+
+    def progress(self):
+        return dict(UserTaskProgress.objects.values_list('task__task_type', 'current_progress'))
+
+    def test_answers_advance_every_task_type(self):
+        self.check('hello there')
+        self.check('hello there')
+        self.assertEqual(self.progress(), {
+            'daily_practice': 2, 'correct_answers': 2, 'perfect_week': 1, 'streak_master': 1, 'topic_master': 2
+        })
+        completed = UserTaskProgress.objects.filter(is_completed=True).count()
+        self.assertEqual(completed, 4)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, completed)
+
+    def test_completion_is_reported_and_rewarded_once(self):
+        self.check('hello there')
+        UserTaskProgress.objects.all().delete()
+        UserPoints.objects.filter(user=self.user).update(total_points=0)
+
+        # Two evaluations in the same clock tick: only the first completes anything
+        now = timezone.now()
+        with mock.patch('api.task_rules.timezone.now', return_value=now):
+            first = evaluate_user_week(self.user.id, now.date())
+            second = evaluate_user_week(self.user.id, now.date())
+        self.assertEqual(
+            sorted(progress.task.task_type for progress in first),
+            ['perfect_week', 'streak_master']
+        )
+        self.assertEqual(second, [])
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 2)
+        self.assertEqual(UserTaskProgress.objects.filter(is_completed=True, completed_at=now).count(), 2)
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        for _ in range(3):
+            self.check('hello there')
+        with CaptureQueriesContext(connection) as before:
+            self.check('hello there')
+        for index in range(5):
+            WeeklyTask.objects.create(
+                title=f'extra {index}', description='d', task_type='daily_practice', target_count=50
+            )
+        self.check('hello there')
+        with CaptureQueriesContext(connection) as after:
+            self.check('hello there')
+        self.assertEqual(len(after), len(before))
+
+    def test_progress_endpoint_reevaluates_instead_of_incrementing(self):
+        self.check('hello there')
+        task = self.tasks['daily_practice']
+        response = self.client.post(
+            '/api/tasks/progress/', {'username': 'tr', 'task_id': task.id, 'increment': 5}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['progress']['current_progress'], 1)
+
+        # Answers keep advancing the task afterwards
+        self.check('nope')
+        self.assertEqual(self.progress()['daily_practice'], 2)
+
+    def test_progress_endpoint_rejects_inactive_tasks(self):
+        task = self.tasks['topic_master']
+        task.is_active = False
+        task.save()
+        response = self.client.post('/api/tasks/progress/', {'username': 'tr', 'task_id': task.id}, format='json')
+        self.assertEqual(response.status_code, 400)
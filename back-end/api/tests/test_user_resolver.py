@@ -0,0 +1,51 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from api.user_resolver import get_or_create_user, resolve_user
+
+from .base import APITestCase
+
+
+class UserResolverTests(APITestCase):
+    def test_repeat_lookups_are_served_from_the_cache(self):
+        user = User.objects.create(username='alice')
+        self.assertEqual(resolve_user('alice').id, user.id)
+
+        with self.assertNumQueries(0):
+            stub = resolve_user('alice')
+        self.assertEqual((stub.id, stub.username), (user.id, 'alice'))
+        self.assertIsNone(resolve_user('nobody'))
+
+    def test_rename_in_this_process_drops_the_entry(self):
+        user = User.objects.create(username='alice')
+        resolve_user('alice')
+
+        user.username = 'alicia'
+        user.save()
+
+        self.assertIsNone(resolve_user('alice'))
+        self.assertEqual(resolve_user('alicia').id, user.id)
+
+    @override_settings(USERNAME_CACHE_TTL=60)
+    def test_changes_from_other_processes_are_seen_after_the_ttl(self):
+        user = User.objects.create(username='alice')
+        resolve_user('alice')
+        # queryset.update() sends no signals, like a write from another process
+        User.objects.filter(id=user.id).update(username='alicia')
+        other = User.objects.create(username='alice')
+
+        self.assertEqual(resolve_user('alice').id, user.id)
+        with mock.patch('api.user_resolver.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(resolve_user('alice').id, other.id)
+            self.assertEqual(resolve_user('alicia').id, user.id)
+
+    def test_get_or_create_user_caches_the_new_user(self):
+        user, created = get_or_create_user('bob')
+        self.assertTrue(created)
+
+        with self.assertNumQueries(0):
+            cached, created = get_or_create_user('bob')
+        self.assertEqual((cached.id, created), (user.id, False))
@@ -0,0 +1,165 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from api.models import (
+    Question, Topic, WeeklyQuestionProgress, WeeklyQuestionSet, bitmap_contains, bitmap_count, bitmap_with
+)
+
+from .base import APITestCase
+
+
+class WeeklyQuestionTestCase(APITestCase):
+    def setUp(self):
+        super().setUp()
+        topic = Topic.objects.create(name='T')
+        self.questions = [
+            Question.objects.create(vietnamese_text=f'C{i}', english_text=f'q{i}', topic=topic)
+            for i in range(5)
+        ]
+        today = timezone.now().date()
+        week_start = today - datetime.timedelta(days=today.weekday())
+        self.question_set = WeeklyQuestionSet.objects.create(
+            title='W', description='', week_start=week_start,
+            week_end=week_start + datetime.timedelta(days=6)
+        )
+        self.question_set.questions.set(self.questions)
+        self.user = User.objects.create(username='alice')
+
+
+class WeeklyQuestionQueryTests(WeeklyQuestionTestCase):
+    def test_set_list_is_two_queries_for_any_number_of_sets(self):
+        for weeks in range(1, 4):
+            week_start = self.question_set.week_start - datetime.timedelta(weeks=weeks)
+            old_set = WeeklyQuestionSet.objects.create(
+                title=f'W-{weeks}', description='', week_start=week_start,
+                week_end=week_start + datetime.timedelta(days=6), is_active=False
+            )
+            old_set.questions.set(self.questions)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/weekly-questions/sets/')
+        self.assertEqual(len(response.json()), 4)
+
+    def test_weekly_page_queries(self):
+        User.objects.create(username='bob')
+        # Freeze the set's question order (a one-time write per set)
+        self.client.get('/api/weekly-questions/', {'username': 'bob'})
+
+        # First visit: username lookup, set, progress get_or_create (select,
+        # savepoint, insert, release) and the set's questions
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/weekly-questions/', {'username': 'alice'})
+        self.assertEqual(len(response.json()['remaining_questions']), 5)
+
+        # Later visits: set, progress and questions
+        with self.assertNumQueries(3):
+            self.client.get('/api/weekly-questions/', {'username': 'alice'})
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/weekly-questions/progress/', {'username': 'alice'})
+        self.assertEqual(response.status_code, 200)
+
+
+class BitmapTests(SimpleTestCase):
+    def test_bits_are_set_counted_and_grow_the_bitmap(self):
+        bitmap = bitmap_with(b'', 9)
+        self.assertEqual(bitmap, b'\x00\x02')
+        bitmap = bitmap_with(bitmap, 0)
+        self.assertTrue(bitmap_contains(bitmap, 0))
+        self.assertTrue(bitmap_contains(bitmap, 9))
+        self.assertFalse(bitmap_contains(bitmap, 1))
+        self.assertFalse(bitmap_contains(bitmap, 64))
+        self.assertEqual(bitmap_count(bitmap), 2)
+        self.assertEqual(bitmap_count(bitmap, mask=1 << 9 | 1 << 3), 1)
+
+
+class WeeklyProgressTests(WeeklyQuestionTestCase):
+    def progress(self):
+        progress = WeeklyQuestionProgress.objects.get_or_create(user=self.user, question_set=self.question_set)[0]
+        progress.question_set = WeeklyQuestionSet.objects.get(id=self.question_set.id)
+        return progress
+
+    def test_completing_a_question_is_one_update_and_idempotent(self):
+        progress = self.progress()
+        progress.get_question_state()
+
+        with self.assertNumQueries(1):
+            progress.mark_question_completed(self.questions[2])
+        progress.mark_question_completed(self.questions[2])
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.get_completed_count(), 1)
+        self.assertEqual(progress.total_points, 5)
+        self.assertEqual(
+            [q.id for q in progress.get_remaining_questions()],
+            [q.id for q in self.questions if q != self.questions[2]]
+        )
+
+    def test_concurrent_completions_retry_instead_of_overwriting(self):
+        first, second = self.progress(), self.progress()
+        first.get_question_state()
+        second.get_question_state()
+
+        first.mark_question_completed(self.questions[0])
+        # second still holds the old bitmap: its compare-and-set misses, it
+        # reloads the bitmap and the retry succeeds
+        with self.assertNumQueries(3):
+            second.mark_question_completed(self.questions[1])
+
+        progress = self.progress()
+        self.assertEqual(progress.get_completed_count(), 2)
+        self.assertEqual(progress.total_points, 10)
+        self.assertEqual(progress.get_question_state()['completed_ids'], {self.questions[0].id, self.questions[1].id})
+
+    def test_completing_every_question_completes_the_set(self):
+        progress = self.progress()
+        for question in self.questions:
+            progress.mark_question_completed(question)
+
+        progress.refresh_from_db()
+        self.assertTrue(progress.is_completed)
+        self.assertIsNotNone(progress.completed_at)
+
+    def test_positions_survive_questions_added_later(self):
+        progress = self.progress()
+        progress.mark_question_completed(self.questions[4])
+        extra = Question.objects.create(vietnamese_text='C5', english_text='q5')
+        self.question_set.questions.add(extra)
+
+        progress = self.progress()
+        self.assertEqual(progress.get_question_state()['completed_ids'], {self.questions[4].id})
+        self.assertEqual(progress.get_question_state()['positions'][extra.id], 5)
+
+    def test_questions_removed_from_the_set_stop_counting(self):
+        progress = self.progress()
+        for question in self.questions[:3]:
+            progress.mark_question_completed(question)
+        self.question_set.questions.remove(self.questions[0], self.questions[1])
+
+        progress = self.progress()
+        self.assertEqual(progress.get_completed_count(), 1)
+        self.assertEqual(len(progress.get_remaining_questions()), 2)
+        self.assertAlmostEqual(progress.get_progress_percentage(), 100 / 3)
+
+        # The set has three questions left: completing the other two completes it
+        progress.mark_question_completed(self.questions[3])
+        self.assertFalse(progress.is_completed)
+        progress.mark_question_completed(self.questions[4])
+        self.assertTrue(progress.is_completed)
+        self.assertEqual(progress.get_completed_count(), 3)
+
+    def test_correct_answer_marks_the_question(self):
+        response = self.client.post('/api/weekly-questions/progress/', {
+            'username': 'alice', 'question_id': self.questions[0].id, 'user_answer': 'q0'
+        }, format='json')
+
+        self.assertTrue(response.json()['is_correct'])
+        self.assertEqual(self.progress().get_completed_count(), 1)
+
+        response = self.client.post('/api/weekly-questions/progress/', {
+            'username': 'alice', 'question_id': self.questions[1].id, 'user_answer': 'something else'
+        }, format='json')
+        self.assertFalse(response.json()['is_correct'])
+        self.assertEqual(self.progress().get_completed_count(), 1)
@@ -7,6 +7,7 @@ urlpatterns = [
     # User endpoints
     path('auth/login/', views.UserLoginView.as_view(), name='user_login'),
     path('auth/token/', views.GetTokenView.as_view(), name='get_token'),
+    path('auth/token-cache/stats/', views.TokenCacheStatsView.as_view(), name='token_cache_stats'),
     path('user-answers/', views.UserAnswerHistoryView.as_view(), name='user_answer_history'),
 
     # Topic endpoints
@@ -18,6 +19,10 @@ urlpatterns = [
     path('questions/', views.QuestionListView.as_view(), name='question_list'),
     path('questions/<int:question_id>/', views.QuestionDetailView.as_view(), name='question_detail'),
     path('questions/import/', views.ImportQuestionsView.as_view(), name='import_questions'),
+    path('questions/import/<int:job_id>/', views.ImportJobStatusView.as_view(), name='import_job_status'),
+
+    # Export endpoints
+    path('export/<str:dataset>/', views.ExportView.as_view(), name='export'),
 
     # Answer endpoints
     path('check-answer/', views.CheckAnswerView.as_view(), name='check_answer'),
@@ -25,6 +30,7 @@ urlpatterns = [
     # Task system endpoints
     path('tasks/weekly/', views.WeeklyTaskListView.as_view(), name='weekly_tasks'),
     path('tasks/dashboard/', views.TaskDashboardView.as_view(), name='task_dashboard'),
+    path('dashboard-cache/stats/', views.DashboardCacheStatsView.as_view(), name='dashboard_cache_stats'),
     path('tasks/progress/', views.UpdateTaskProgressView.as_view(), name='update_task_progress'),
     path('tasks/daily-activity/', views.UpdateDailyActivityView.as_view(), name='update_daily_activity'),
     path('leaderboard/', views.UserLeaderboardView.as_view(), name='user_leaderboard'),
@@ -0,0 +1,126 @@
+"""Process-local username -> user id cache.
+
+Most endpoints identify the user by a ``username`` parameter but only need
+the id (for filters and foreign keys) and the username itself. The resolver
+keeps a bounded LRU map of recently seen usernames and returns a ``User``
+with only ``id`` and ``username`` loaded; any other field is loaded from the
+database on first access, as with ``QuerySet.only()``.
+
+Entries are dropped when a user is renamed or deleted through the ORM in
+this process. Other processes only learn about it when the entry expires,
+``USERNAME_CACHE_TTL`` seconds after it was loaded, so that bounds how long
+a stale mapping can be served. The map holds at most ``USERNAME_CACHE_SIZE``
+entries.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404
+
+
+class UsernameCache:
+    """Bounded LRU map of username -> (expiry, user id), with the reverse map for invalidation"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.ids = OrderedDict()
+        self.usernames = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        with self.lock:
+            entry = self.ids.get(username)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self.ids[username]
+                    if self.usernames.get(entry[1]) == username:
+                        del self.usernames[entry[1]]
+                self.misses += 1
+                return None
+            self.ids.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, username, user_id):
+        ttl = getattr(settings, 'USERNAME_CACHE_TTL', 60)
+        with self.lock:
+            old_username = self.usernames.get(user_id)
+            if old_username is not None and old_username != username:
+                self.ids.pop(old_username, None)
+            old_entry = self.ids.get(username)
+            if old_entry is not None and old_entry[1] != user_id:
+                self.usernames.pop(old_entry[1], None)
+            self.ids[username] = (time.monotonic() + ttl, user_id)
+            self.ids.move_to_end(username)
+            self.usernames[user_id] = username
+            while len(self.ids) > self.max_size:
+                evicted_username, (_, evicted_id) = self.ids.popitem(last=False)
+                if self.usernames.get(evicted_id) == evicted_username:
+                    del self.usernames[evicted_id]
+
+    def discard_user(self, user_id):
+        with self.lock:
+            username = self.usernames.pop(user_id, None)
+            if username is not None:
+                self.ids.pop(username, None)
+
+    def clear(self):
+        with self.lock:
+            self.ids.clear()
+            self.usernames.clear()
+
+
+username_cache = UsernameCache(getattr(settings, 'USERNAME_CACHE_SIZE', 10000))
+
+
+def _user_stub(user_id, username):
+    """User with only id and username loaded; other fields load on access"""
+    return User.from_db(DEFAULT_DB_ALIAS, ['id', 'username'], [user_id, username])
+
+
+def resolve_user(username):
+    """The user with this username (id and username loaded), or None"""
+    user_id = username_cache.get(username)
+    if user_id is None:
+        user_id = User.objects.filter(username=username).values_list('id', flat=True).first()
+        if user_id is None:
+            return None
+        username_cache.put(username, user_id)
+    return _user_stub(user_id, username)
+
+
+def get_user_or_404(username):
+    """Like ``get_object_or_404(User, username=username)`` without a query on a cache hit"""
+    user = resolve_user(username)
+    if user is None:
+        raise Http404('No User matches the given query.')
+    return user
+
+
+def get_or_create_user(username):
+    """Like ``User.objects.get_or_create(username=username)``; returns (user, created)"""
+    user = resolve_user(username)
+    if user is not None:
+        return user, False
+    user, created = User.objects.get_or_create(username=username)
+    username_cache.put(username, user.id)
+    return user, created
+
+
+@receiver(post_save, sender=User)
+def refresh_renamed_user(sender, instance, created, **kwargs):
+    if not created:
+        username_cache.discard_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    username_cache.discard_user(instance.pk)
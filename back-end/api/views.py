@@ -1,19 +1,19 @@
 from rest_framework import status, views, parsers
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db.models import Prefetch, Q
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 import difflib
 import random
-import re
 
-from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from .models import (
     Question, UserAnswer, Topic, WeeklyTask, UserTaskProgress, DailyTaskCompletion,
     UserPoints, WeeklyQuestionSet, WeeklyQuestionProgress, DailyLearningSession,
-    DailyLearningQuestion, DailyLearningStreak, DailyLearningSettings
+    DailyLearningQuestion, DailyLearningStreak, DailyLearningSettings, QuestionImportJob,
+    WeeklyPointsSnapshot
 )
 from .serializers import (
     QuestionSerializer, QuestionSimpleSerializer,
@@ -24,7 +24,26 @@ from .serializers import (
     WeeklyQuestionProgressSerializer, WeeklyQuestionDetailSerializer,
     DailyLearningSessionSerializer, DailyLearningQuestionSerializer,
     DailyLearningStreakSerializer, DailyLearningSettingsSerializer,
-    DailyLearningSessionDetailSerializer, DailyLearningDashboardSerializer
+    DailyLearningSessionDetailSerializer, DailyLearningDashboardSerializer,
+    DailyLearningHistorySerializer, WeeklyPointsSnapshotSerializer,
+    QuestionImportJobSerializer
+)
+from .importers import detect_import_format
+from .exports import (
+    EXPORT_DATASETS, EXPORT_FORMATS, EXPORT_USER_FIELDS, export_bounds, format_cursor, parse_cursor, parse_since,
+    stream_export
+)
+from .leaderboard import leaderboard_index
+from .counters import add_points, apply_values, increment, increment_or_create
+from .answer_buffer import get_answer_buffer, write_answers
+from .answer_events import record_answer_event
+from .task_rules import TASK_RULES, evaluate_user_week, week_start_of
+from .idempotency import idempotent
+from .authentication import token_cache
+from .user_resolver import get_or_create_user, get_user_or_404, resolve_user
+from .dashboard_cache import (
+    dashboard_snapshot_key, get_dashboard_cache_stats, get_dashboard_snapshot,
+    store_dashboard_snapshot
 )
 
 
@@ -48,6 +67,18 @@ def get_feedback_message(similarity):
         return "Cần cố gắng nhiều hơn! Hãy xem lại đáp án đúng."
 
 
+def parse_count(value, default=0):
+    """Parse a non-negative integer from request data (``default`` if missing); None if invalid"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value if value >= 0 else None
+    value = str(value).strip()
+    return int(value) if value.isdigit() else None
+
+
 class RandomQuestionView(views.APIView):
     """Get a random question based on difficulty and topic"""
 
@@ -75,6 +106,7 @@ class RandomQuestionView(views.APIView):
 class CheckAnswerView(views.APIView):
     """Check user's answer against the correct answer"""
 
+    @idempotent('check-answer')
     def post(self, request):
         serializer = CheckAnswerSerializer(data=request.data)
         if not serializer.is_valid():
@@ -93,16 +125,19 @@ class CheckAnswerView(views.APIView):
         # Get or create user if username provided
         user = None
         if username:
-            user, created = User.objects.get_or_create(username=username)
+            user, created = get_or_create_user(username)
 
-        # Save user answer
-        user_answer_record = UserAnswer.objects.create(
+        # Save user answer (queued for a batched insert when write-behind is enabled)
+        user_answer_record = UserAnswer(
             user=user,
             question=question,
             user_answer=user_answer,
             is_correct=is_correct,
             similarity_score=similarity
         )
+        answer_buffer = get_answer_buffer()
+        if answer_buffer is None or not answer_buffer.add(user_answer_record):
+            write_answers([user_answer_record])
 
         # Prepare response
         response_data = {
@@ -293,7 +328,7 @@ class QuestionDetailView(views.APIView):
 
 
 class ImportQuestionsView(views.APIView):
-    """Import questions from text file"""
+    """Queue a text, CSV/TSV or JSONL file of questions for background import"""
 
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
 
@@ -310,69 +345,37 @@ class ImportQuestionsView(views.APIView):
             file = request.FILES['file']
             print(file)
             # Check file extension
-            if not file.name.endswith('.txt'):
+            file_format = detect_import_format(file.name)
+            if file_format is None:
                 return Response(
-                    {'error': 'Chỉ hỗ trợ file .txt'},
+                    {'error': 'Chỉ hỗ trợ file .txt, .csv, .tsv hoặc .jsonl'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Read file content with error handling
-            try:
-                content = file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                # Try with different encodings
-                file.seek(0)
-                try:
-                    content = file.read().decode('latin-1')
-                except UnicodeDecodeError:
-                    file.seek(0)
-                    content = file.read().decode('utf-8', errors='ignore')
-
-            # Parse questions from file
-            questions_data = self.parse_questions_file(content)
-
-            if not questions_data:
+            # Near-duplicates are flagged by default, or skipped on request
+            near_duplicate_mode = request.data.get('near_duplicates', 'flag')
+            if near_duplicate_mode not in dict(QuestionImportJob.NEAR_DUPLICATE_MODES):
                 return Response(
-                    {'error': 'Không tìm thấy câu hỏi hợp lệ trong file'},
+                    {'error': 'near_duplicates phải là "flag" hoặc "skip"'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Save questions to database
-            created_count = 0
-            error_count = 0
-            errors = []
-
-            for q_data in questions_data:
-                try:
-                    # Find or create topic
-                    topic = None
-                    if q_data['topic']:
-                        topic, _ = Topic.objects.get_or_create(
-                            name=q_data['topic'],
-                            defaults={'description': f'Chủ đề {q_data["topic"]}'}
-                        )
-
-                    # Create question
-                    Question.objects.get_or_create(
-                        vietnamese_text=q_data['vietnamese'],
-                        english_text=q_data['english'],
-                        defaults={
-                            'topic': topic,
-                            'difficulty': q_data['difficulty']
-                        }
-                    )
-                    created_count += 1
-
-                except Exception as e:
-                    error_count += 1
-                    errors.append(f"Lỗi với câu hỏi: {q_data.get('vietnamese', 'N/A')} - {str(e)}")
+            # Queue the import; the process_import_jobs worker parses and inserts it
+            job = QuestionImportJob.objects.create(
+                file=file,
+                original_name=file.name,
+                file_format=file_format,
+                near_duplicate_mode=near_duplicate_mode
+            )
 
-            return Response({
-                'message': f'Import thành công {created_count} câu hỏi',
-                'created_count': created_count,
-                'error_count': error_count,
-                'errors': errors[:10]  # Limit errors to first 10
-            })
+            return Response(
+                {
+                    'message': 'Đã nhận file, đang xử lý import',
+                    'job_id': job.id,
+                    'job': QuestionImportJobSerializer(job).data
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
 
         except Exception as e:
             import traceback
@@ -382,58 +385,85 @@ class ImportQuestionsView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def parse_questions_file(self, content):
-        """Parse questions from file content"""
-        questions = []
-
-        # Split by double newlines to separate question blocks
-        blocks = re.split(r'\n\s*\n', content.strip())
 
-        for block in blocks:
-            if not block.strip():
-                continue
+class ImportJobStatusView(views.APIView):
+    """Get progress of a background question import"""
 
-            question_data = {
-                'vietnamese': '',
-                'english': '',
-                'topic': '',
-                'difficulty': 'medium'
-            }
+    def get(self, request, job_id):
+        job = get_object_or_404(QuestionImportJob, id=job_id)
+        serializer = QuestionImportJobSerializer(job)
+        return Response(serializer.data)
 
-            lines = block.strip().split('\n')
 
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
+class ExportView(views.APIView):
+    """Stream a dataset as NDJSON or CSV for analytics exports
 
-                # Parse Question line
-                if line.startswith('Question:'):
-                    question_data['vietnamese'] = line.replace('Question:', '').strip()
+    Requires a logged-in user; answer datasets cover every user only for
+    staff, other users get their own answers.
+    """
+    permission_classes = [IsAuthenticated]
 
-                # Parse Answer line
-                elif line.startswith('Answer:'):
-                    question_data['english'] = line.replace('Answer:', '').strip()
+    def get(self, request, dataset):
+        if dataset not in EXPORT_DATASETS:
+            return Response(
+                {'error': f'Không hỗ trợ xuất dữ liệu "{dataset}"'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-                # Parse Topic line
-                elif line.startswith('Topic:'):
-                    question_data['topic'] = line.replace('Topic:', '').strip()
+        # Not "format": DRF reserves that query parameter for renderer selection
+        export_format = request.GET.get('file_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'file_format phải là "ndjson" hoặc "csv"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-                # Parse Status line (difficulty)
-                elif line.startswith('Status:'):
-                    status = line.replace('Status:', '').strip().lower()
-                    if 'dễ' in status or 'easy' in status:
-                        question_data['difficulty'] = 'easy'
-                    elif 'khó' in status or 'hard' in status:
-                        question_data['difficulty'] = 'hard'
-                    else:
-                        question_data['difficulty'] = 'medium'
+        since = None
+        if request.GET.get('since'):
+            since = parse_since(request.GET['since'])
+            if since is None:
+                return Response(
+                    {'error': 'since phải là ngày hoặc thời điểm ISO 8601'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-            # Only add if we have both question and answer
-            if question_data['vietnamese'] and question_data['english']:
-                questions.append(question_data)
+        # Id-ordered datasets also accept their cursor (the last id) as after_id
+        after = None
+        cursor = request.GET.get('cursor') or request.GET.get('after_id')
+        if cursor:
+            after = parse_cursor(dataset, cursor)
+            if after is None:
+                return Response(
+                    {'error': 'cursor phải là giá trị X-Export-Cursor của lần xuất trước'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        return questions
+        user = None
+        if dataset in EXPORT_USER_FIELDS and not request.user.is_staff:
+            user = request.user
+
+        use_gzip = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
+        filename = f'{dataset}.{export_format}'
+        content_type = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        if use_gzip:
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        # Fix the upper bound before streaming so it can go in a header;
+        # clients pass it back as the cursor of the next incremental pull
+        after, last = export_bounds(dataset, after)
+        response = StreamingHttpResponse(
+            stream_export(
+                dataset, export_format, since=since, gzip=use_gzip,
+                after=after, last=last, user=user
+            ),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Export-Cursor'] = format_cursor(last)
+        if EXPORT_DATASETS[dataset][2] is None:
+            response['X-Export-Last-Id'] = str(last)
+        return response
 
 
 # User Management Views
@@ -449,9 +479,7 @@ class UserLoginView(views.APIView):
         username = serializer.validated_data['username']
 
         # Get or create user
-        user, created = User.objects.get_or_create(
-            username=username
-        )
+        user, created = get_or_create_user(username)
 
         # Get or create token for user
         from rest_framework.authtoken.models import Token
@@ -469,19 +497,13 @@ class GetTokenView(views.APIView):
     """Get token for authenticated user"""
 
     def get(self, request):
-        # Try to get token from Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION')
-        if auth_header and auth_header.startswith('Token '):
-            token_key = auth_header.split(' ')[1]
-            try:
-                from rest_framework.authtoken.models import Token
-                token = Token.objects.get(key=token_key)
-                return Response({
-                    'token': token.key,
-                    'user': UserSerializer(token.user).data
-                })
-            except Token.DoesNotExist:
-                pass
+        # The Authorization header was already validated by CachedTokenAuthentication
+        token = request.auth
+        if token is not None:
+            return Response({
+                'token': token.key,
+                'user': UserSerializer(request.user).data
+            })
 
         return Response(
             {'error': 'Token không hợp lệ hoặc không tìm thấy'},
@@ -489,8 +511,6 @@ class GetTokenView(views.APIView):
         )
 
 
-
-
 class UserAnswerHistoryView(views.APIView):
     """Get user answer history with pagination"""
 
@@ -583,7 +603,17 @@ class TaskDashboardView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            # Repeat loads are served from the snapshot cache without the database
+            cached = get_dashboard_snapshot('tasks', username)
+            if cached is not None:
+                points = cached['user_points']
+                # Ranks depend on other users, so refresh them from the leaderboard index
+                points['weekly_rank'] = leaderboard_index.rank_of_score('weekly', points['weekly_points'])
+                points['total_rank'] = leaderboard_index.rank_of_score('total', points['total_points'])
+                return Response(cached)
+
+            user = get_user_or_404(username)
+            snapshot_key = dashboard_snapshot_key('tasks', user.id)
 
             # Get or create user points
             user_points, created = UserPoints.objects.get_or_create(
@@ -603,57 +633,42 @@ class TaskDashboardView(views.APIView):
             week_start = today - datetime.timedelta(days=today.weekday())
 
             # Get weekly tasks
-            weekly_tasks = WeeklyTask.objects.filter(is_active=True).order_by('created_at')
+            weekly_tasks = list(WeeklyTask.objects.filter(is_active=True).order_by('created_at'))
 
-            # Get or create user progress for each task
-            user_progress_list = []
-            for task in weekly_tasks:
-                progress, created = UserTaskProgress.objects.get_or_create(
-                    user=user,
-                    task=task,
-                    week_start=week_start,
-                    defaults={
-                        'current_progress': 0,
-                        'is_completed': False,
-                        'points_earned': 0
-                    }
-                )
-                user_progress_list.append(progress)
+            # Load this week's progress, creating missing rows in one insert
+            progress_map = self._get_progress_map(user, weekly_tasks, week_start)
+            user_progress_list = [progress_map[task.id] for task in weekly_tasks]
 
             # Get today's completion
-            try:
-                daily_completion = DailyTaskCompletion.objects.get(
-                    user=user,
-                    completion_date=today
-                )
-            except DailyTaskCompletion.DoesNotExist:
-                daily_completion = None
+            daily_completion = DailyTaskCompletion.objects.filter(
+                user=user,
+                completion_date=today
+            ).first()
 
-            # Calculate weekly summary
-            weekly_completions = DailyTaskCompletion.objects.filter(
+            # Calculate weekly summary in a single aggregate query
+            weekly_totals = DailyTaskCompletion.objects.filter(
                 user=user,
                 completion_date__gte=week_start
+            ).aggregate(
+                total_questions=models.Sum('questions_answered'),
+                correct_answers=models.Sum('correct_answers'),
+                points_earned=models.Sum('points_earned'),
+                days_active=models.Count('id')
             )
 
             weekly_summary = {
-                'total_questions': weekly_completions.aggregate(
-                    total=models.Sum('questions_answered'))['total'] or 0,
-                'correct_answers': weekly_completions.aggregate(
-                    correct=models.Sum('correct_answers'))['correct'] or 0,
-                'points_earned': weekly_completions.aggregate(
-                    points=models.Sum('points_earned'))['points'] or 0,
-                'days_active': weekly_completions.count(),
-                'tasks_completed': UserTaskProgress.objects.filter(
-                    user=user,
-                    week_start=week_start,
-                    is_completed=True
-                ).count()
+                'total_questions': weekly_totals['total_questions'] or 0,
+                'correct_answers': weekly_totals['correct_answers'] or 0,
+                'points_earned': weekly_totals['points_earned'] or 0,
+                'days_active': weekly_totals['days_active'],
+                'tasks_completed': sum(1 for progress in user_progress_list if progress.is_completed)
             }
 
             # Prepare response data
             response_data = {
                 'weekly_tasks': WeeklyTaskSerializer(
-                    weekly_tasks, many=True, context={'request': request}
+                    weekly_tasks, many=True,
+                    context={'request': request, 'progress_map': progress_map}
                 ).data,
                 'user_progress': UserTaskProgressSerializer(
                     user_progress_list, many=True
@@ -665,6 +680,7 @@ class TaskDashboardView(views.APIView):
                 'weekly_summary': weekly_summary
             }
 
+            store_dashboard_snapshot(snapshot_key, user, response_data)
             return Response(response_data)
 
         except Exception as e:
@@ -673,16 +689,50 @@ class TaskDashboardView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _get_progress_map(self, user, weekly_tasks, week_start):
+        """Return {task_id: UserTaskProgress} for the week, creating missing rows"""
+        def load():
+            progress_qs = UserTaskProgress.objects.filter(
+                user=user,
+                week_start=week_start,
+                task__in=weekly_tasks
+            ).select_related('task')
+            return {progress.task_id: progress for progress in progress_qs}
+
+        progress_map = load()
+        missing = [task for task in weekly_tasks if task.id not in progress_map]
+        if missing:
+            UserTaskProgress.objects.bulk_create(
+                [
+                    UserTaskProgress(
+                        user=user,
+                        task=task,
+                        week_start=week_start,
+                        current_progress=0,
+                        is_completed=False,
+                        points_earned=0
+                    )
+                    for task in missing
+                ],
+                ignore_conflicts=True
+            )
+            progress_map = load()
+        return progress_map
+
 
 class UpdateTaskProgressView(views.APIView):
     """Update user task progress"""
 
     def post(self, request):
-        """Update progress for a specific task"""
+        """Re-evaluate the user's progress on a task for the current week.
+
+        Progress follows from the user's answers (see ``api.task_rules``), so
+        this recomputes it from the answer rollups instead of adding a
+        client-supplied increment.
+        """
         try:
             username = request.data.get('username', '')
             task_id = request.data.get('task_id', '')
-            increment = request.data.get('increment', 1)
 
             if not username or not task_id:
                 return Response(
@@ -690,39 +740,24 @@ class UpdateTaskProgressView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
             task = get_object_or_404(WeeklyTask, id=task_id)
+            if not task.is_active or task.task_type not in TASK_RULES:
+                return Response(
+                    {'error': 'Nhiệm vụ này không còn hoạt động'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-            # Get current week start
             from django.utils import timezone
-            import datetime
             today = timezone.now().date()
-            week_start = today - datetime.timedelta(days=today.weekday())
+            evaluate_user_week(user.id, today)
 
-            # Get or create user progress
-            progress, created = UserTaskProgress.objects.get_or_create(
+            progress = UserTaskProgress.objects.select_related('task').get(
                 user=user,
                 task=task,
-                week_start=week_start,
-                defaults={
-                    'current_progress': 0,
-                    'is_completed': False,
-                    'points_earned': 0
-                }
+                week_start=week_start_of(today)
             )
 
-            # Update progress
-            if not progress.is_completed:
-                progress.current_progress += increment
-                progress.save()
-
-                # If task was just completed, update user points
-                if progress.is_completed and not created:
-                    user_points, _ = UserPoints.objects.get_or_create(user=user)
-                    user_points.total_points += progress.points_earned
-                    user_points.weekly_points += progress.points_earned
-                    user_points.save()
-
             return Response({
                 'message': 'Cập nhật tiến trình thành công',
                 'progress': UserTaskProgressSerializer(progress).data
@@ -742,17 +777,25 @@ class UpdateDailyActivityView(views.APIView):
         """Update daily activity after answering questions"""
         try:
             username = request.data.get('username', '')
-            questions_answered = request.data.get('questions_answered', 1)
-            correct_answers = request.data.get('correct_answers', 0)
-            points_earned = request.data.get('points_earned', 0)
-
             if not username:
                 return Response(
                     {'error': 'Vui lòng cung cấp username'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            counts = {}
+            for field, default in (('questions_answered', 1), ('correct_answers', 0), ('points_earned', 0)):
+                counts[field] = parse_count(request.data.get(field), default=default)
+                if counts[field] is None:
+                    return Response(
+                        {'error': f'{field} phải là số nguyên không âm'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            questions_answered = counts['questions_answered']
+            correct_answers = counts['correct_answers']
+            points_earned = counts['points_earned']
+
+            user = get_user_or_404(username)
 
             # Get or create user points
             user_points, created = UserPoints.objects.get_or_create(
@@ -772,29 +815,21 @@ class UpdateDailyActivityView(views.APIView):
             from django.utils import timezone
             today = timezone.now().date()
 
-            daily_completion, created = DailyTaskCompletion.objects.get_or_create(
-                user=user,
-                completion_date=today,
-                defaults={
-                    'questions_answered': 0,
-                    'correct_answers': 0,
-                    'points_earned': 0
-                }
-            )
-
-            # Update daily completion
-            daily_completion.questions_answered += questions_answered
-            daily_completion.correct_answers += correct_answers
-            daily_completion.points_earned += points_earned
-            daily_completion.save()
-
-            # Update user points
-            user_points.total_points += points_earned
-            user_points.weekly_points += points_earned
-            user_points.save()
-
-            # Update task progress based on activity
-            self._update_task_progress_from_activity(user, questions_answered, correct_answers)
+            with transaction.atomic():
+                # Update daily completion with one UPDATE (created on the first activity of the day)
+                daily_completion = DailyTaskCompletion(**increment_or_create(
+                    DailyTaskCompletion,
+                    {'user': user, 'completion_date': today},
+                    {
+                        'questions_answered': questions_answered,
+                        'correct_answers': correct_answers,
+                        'points_earned': points_earned
+                    },
+                    returning='__all__'
+                ))
+
+                # Update user points (task progress follows from the answer events)
+                apply_values(user_points, add_points(user, points_earned))
 
             return Response({
                 'message': 'Cập nhật hoạt động hàng ngày thành công',
@@ -808,86 +843,71 @@ class UpdateDailyActivityView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _update_task_progress_from_activity(self, user, questions_answered, correct_answers):
-        """Update task progress based on user activity"""
-        from django.utils import timezone
-        import datetime
-
-        today = timezone.now().date()
-        week_start = today - datetime.timedelta(days=today.weekday())
-
-        # Update daily practice task
-        daily_practice_task = WeeklyTask.objects.filter(
-            task_type='daily_practice',
-            is_active=True
-        ).first()
-
-        if daily_practice_task:
-            progress, _ = UserTaskProgress.objects.get_or_create(
-                user=user,
-                task=daily_practice_task,
-                week_start=week_start,
-                defaults={
-                    'current_progress': 0,
-                    'is_completed': False,
-                    'points_earned': 0
-                }
-            )
-
-            if not progress.is_completed:
-                progress.current_progress = min(progress.current_progress + 1, daily_practice_task.target_count)
-                progress.save()
-
-        # Update correct answers task
-        correct_answers_task = WeeklyTask.objects.filter(
-            task_type='correct_answers',
-            is_active=True
-        ).first()
-
-        if correct_answers_task and correct_answers > 0:
-            progress, _ = UserTaskProgress.objects.get_or_create(
-                user=user,
-                task=correct_answers_task,
-                week_start=week_start,
-                defaults={
-                    'current_progress': 0,
-                    'is_completed': False,
-                    'points_earned': 0
-                }
-            )
-
-            if not progress.is_completed:
-                progress.current_progress = min(
-                    progress.current_progress + correct_answers,
-                    correct_answers_task.target_count
-                )
-                progress.save()
-
 
 class UserLeaderboardView(views.APIView):
     """Get user leaderboard"""
 
     def get(self, request):
-        """Get leaderboard sorted by points"""
+        """Get leaderboard sorted by points.
+
+        Modes: top ``limit`` rows (default), ``around=<username>&radius=N``
+        for the rows surrounding a user, and ``after_rank=N`` to continue
+        from a position returned as ``next_after_rank``. With
+        ``type=weekly&week_start=YYYY-MM-DD`` the archived leaderboard of a
+        past week is returned instead.
+        """
         try:
             leaderboard_type = request.GET.get('type', 'total')  # total or weekly
-            limit = int(request.GET.get('limit', 10))
+            if leaderboard_type != 'weekly':
+                leaderboard_type = 'total'
 
-            if leaderboard_type == 'weekly':
-                leaderboard = UserPoints.objects.all().order_by('-weekly_points', '-current_streak')
+            limit = int(request.GET.get('limit', 10))
+            radius = max(int(request.GET.get('radius', 5)), 0)
+            after_rank = max(int(request.GET.get('after_rank', 0)), 0)
+            around = request.GET.get('around', '').strip()
+
+            week_start = request.GET.get('week_start', '').strip()
+            if leaderboard_type == 'weekly' and week_start:
+                return self._get_archived_week(week_start, limit, after_rank, around, radius)
+
+            # Positions and ranks come from the in-process order-statistic index
+            if around:
+                user = resolve_user(around)
+                window = leaderboard_index.around(leaderboard_type, user.id, radius) if user else None
+                if window is None:
+                    return Response(
+                        {'error': f'Người dùng {around} chưa có trong bảng xếp hạng'},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+                start, entries = window
             else:
-                leaderboard = UserPoints.objects.all().order_by('-total_points', '-longest_streak')
+                start = after_rank
+                entries = leaderboard_index.top(leaderboard_type, limit, start=start)
+
+            points_by_user = {
+                user_points.user_id: user_points
+                for user_points in UserPoints.objects.filter(
+                    user_id__in=[user_id for user_id, _, _ in entries]
+                ).select_related('user')
+            }
 
             leaderboard_data = []
-            for rank, user_points in enumerate(leaderboard[:limit], 1):
+            for position, (user_id, _, _) in enumerate(entries, start + 1):
+                user_points = points_by_user.get(user_id)
+                if user_points is None:
+                    continue
                 data = UserPointsSerializer(user_points).data
-                data['rank'] = rank
+                data['rank'] = position
+                data['username'] = user_points.user.username
                 leaderboard_data.append(data)
 
+            total_users = leaderboard_index.total_users()
+            next_after_rank = start + len(entries)
             return Response({
                 'leaderboard': leaderboard_data,
                 'type': leaderboard_type,
-                'total_users': UserPoints.objects.count()
+                'total_users': total_users,
+                'next_after_rank': next_after_rank if next_after_rank < total_users else None
             })
 
         except Exception as e:
@@ -896,6 +916,51 @@ class UserLeaderboardView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _get_archived_week(self, week_start, limit, after_rank, around, radius):
+        """Read a past week's leaderboard from the snapshot table (week_start, rank index)"""
+        from django.utils.dateparse import parse_date
+
+        week_date = parse_date(week_start)
+        if week_date is None:
+            return Response(
+                {'error': 'Ngày bắt đầu tuần không hợp lệ (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        snapshots = WeeklyPointsSnapshot.objects.filter(week_start=week_date).order_by('rank', 'user_id')
+        total_users = snapshots.count()
+        if not total_users:
+            return Response(
+                {'error': f'Chưa có bảng xếp hạng lưu trữ cho tuần {week_date}'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if around:
+            snapshot = snapshots.filter(user__username=around).first()
+            if snapshot is None:
+                return Response(
+                    {'error': f'Người dùng {around} chưa có trong bảng xếp hạng'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            position = snapshots.filter(
+                Q(rank__lt=snapshot.rank) | Q(rank=snapshot.rank, user_id__lt=snapshot.user_id)
+            ).count()
+            start = max(position - radius, 0)
+            stop = position + radius + 1
+        else:
+            start = after_rank
+            stop = after_rank + limit
+
+        rows = list(snapshots.select_related('user')[start:stop])
+        next_after_rank = start + len(rows)
+        return Response({
+            'leaderboard': WeeklyPointsSnapshotSerializer(rows, many=True).data,
+            'type': 'weekly',
+            'week_start': week_date,
+            'total_users': total_users,
+            'next_after_rank': next_after_rank if next_after_rank < total_users else None
+        })
+
 
 # Weekly Question System Views
 class WeeklyQuestionSetListView(views.APIView):
@@ -903,7 +968,9 @@ class WeeklyQuestionSetListView(views.APIView):
 
     def get(self, request):
         """Get all weekly question sets"""
-        question_sets = WeeklyQuestionSet.objects.all().order_by('-week_start')
+        question_sets = WeeklyQuestionSet.objects.all().order_by('-week_start').prefetch_related(
+            Prefetch('questions', queryset=Question.objects.select_related('topic'))
+        )
         serializer = WeeklyQuestionSetSerializer(question_sets, many=True)
         return Response(serializer.data)
 
@@ -936,7 +1003,7 @@ class WeeklyQuestionProgressView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
 
             # Get current week start
             from django.utils import timezone
@@ -958,6 +1025,7 @@ class WeeklyQuestionProgressView(views.APIView):
                 user=user,
                 question_set=question_set
             )
+            progress.question_set = question_set
 
             serializer = WeeklyQuestionDetailSerializer(progress)
             return Response(serializer.data)
@@ -968,6 +1036,7 @@ class WeeklyQuestionProgressView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @idempotent('weekly-answer')
     def post(self, request):
         """Update user progress on weekly questions"""
         try:
@@ -981,7 +1050,7 @@ class WeeklyQuestionProgressView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
             question = get_object_or_404(Question, id=question_id)
 
             # Get current week start
@@ -1004,9 +1073,10 @@ class WeeklyQuestionProgressView(views.APIView):
                 user=user,
                 question_set=question_set
             )
+            progress.question_set = question_set
 
             # Check if question is part of this week's set
-            if question not in question_set.questions.all():
+            if question not in progress.get_question_state()['questions']:
                 return Response(
                     {'error': 'Câu hỏi này không thuộc bộ câu hỏi tuần này'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -1016,16 +1086,23 @@ class WeeklyQuestionProgressView(views.APIView):
             similarity = calculate_similarity(user_answer, question.english_text)
             is_correct = similarity > 0.8  # 80% threshold for correct answer
 
-            if is_correct:
-                # Mark question as completed only if answer is correct enough
-                progress.mark_question_completed(question)
+            with transaction.atomic():
+                if is_correct:
+                    # Mark question as completed only if answer is correct enough
+                    progress.mark_question_completed(question)
 
-                # Update user points
-                user_points, _ = UserPoints.objects.get_or_create(user=user)
-                user_points.total_points += question_set.points_per_question
-                user_points.weekly_points += question_set.points_per_question
-                user_points.save()
+                # Log the answer; points, rollups, streak and tasks follow from the event
+                record_answer_event(
+                    user=user,
+                    question=question,
+                    source='weekly',
+                    is_correct=is_correct,
+                    similarity_score=similarity,
+                    points=question_set.points_per_question if is_correct else 0,
+                    question_set=question_set
+                )
 
+            if is_correct:
                 return Response({
                     'message': 'Câu trả lời chính xác! Cập nhật tiến trình thành công.',
                     'is_correct': True,
@@ -1063,7 +1140,7 @@ class WeeklyQuestionListView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
 
             # Get current week start
             from django.utils import timezone
@@ -1085,16 +1162,17 @@ class WeeklyQuestionListView(views.APIView):
                 user=user,
                 question_set=question_set
             )
+            progress.question_set = question_set
 
-            # Get remaining questions
-            remaining_questions = progress.get_remaining_questions()
-            serializer = QuestionSimpleSerializer(remaining_questions, many=True)
+            # Completed and remaining questions come from two id lists loaded once
+            state = progress.get_question_state()
+            serializer = QuestionSimpleSerializer(state['remaining'], many=True)
 
             return Response({
                 'question_set': WeeklyQuestionSetSerializer(question_set).data,
                 'remaining_questions': serializer.data,
                 'completed_count': progress.get_completed_count(),
-                'total_questions': question_set.get_total_questions(),
+                'total_questions': len(state['questions']),
                 'progress_percentage': progress.get_progress_percentage(),
                 'is_completed': progress.is_completed
             })
@@ -1119,14 +1197,21 @@ class DailyLearningDashboardView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            cached = get_dashboard_snapshot('daily_learning', username)
+            if cached is not None:
+                return Response(cached)
+
+            user = get_user_or_404(username)
+            snapshot_key = dashboard_snapshot_key('daily_learning', user.id)
 
             # Get today's date
             from django.utils import timezone
             today = timezone.now().date()
 
             # Get or create user settings
-            user_settings, created = DailyLearningSettings.objects.get_or_create(
+            user_settings, created = DailyLearningSettings.objects.prefetch_related(
+                'preferred_topics'
+            ).get_or_create(
                 user=user,
                 defaults={
                     'daily_target': 10,
@@ -1151,41 +1236,15 @@ class DailyLearningDashboardView(views.APIView):
                 session_date=today
             ).order_by('created_at')
 
-            # Calculate weekly stats
+            # Weekly and monthly stats come from one conditional aggregate
             week_start = today - timezone.timedelta(days=today.weekday())
-            weekly_sessions = DailyLearningSession.objects.filter(
-                user=user,
-                session_date__gte=week_start
-            )
-
-            weekly_stats = {
-                'total_sessions': weekly_sessions.count(),
-                'total_questions': weekly_sessions.aggregate(
-                    total=models.Sum('completed_questions'))['total'] or 0,
-                'correct_answers': weekly_sessions.aggregate(
-                    correct=models.Sum('correct_answers'))['correct'] or 0,
-                'points_earned': weekly_sessions.aggregate(
-                    points=models.Sum('points_earned'))['points'] or 0,
-                'days_active': weekly_sessions.values('session_date').distinct().count()
-            }
-
-            # Calculate monthly stats
             month_start = today.replace(day=1)
-            monthly_sessions = DailyLearningSession.objects.filter(
-                user=user,
-                session_date__gte=month_start
-            )
-
-            monthly_stats = {
-                'total_sessions': monthly_sessions.count(),
-                'total_questions': monthly_sessions.aggregate(
-                    total=models.Sum('completed_questions'))['total'] or 0,
-                'correct_answers': monthly_sessions.aggregate(
-                    correct=models.Sum('correct_answers'))['correct'] or 0,
-                'points_earned': monthly_sessions.aggregate(
-                    points=models.Sum('points_earned'))['points'] or 0,
-                'days_active': monthly_sessions.values('session_date').distinct().count()
-            }
+            period_stats = self._get_period_stats(user, {
+                'weekly': week_start,
+                'monthly': month_start
+            })
+            weekly_stats = period_stats['weekly']
+            monthly_stats = period_stats['monthly']
 
             # Generate achievements
             achievements = self._generate_achievements(user, learning_streak, user_settings)
@@ -1199,6 +1258,7 @@ class DailyLearningDashboardView(views.APIView):
                 'achievements': achievements
             }
 
+            store_dashboard_snapshot(snapshot_key, user, response_data)
             return Response(response_data)
 
         except Exception as e:
@@ -1207,6 +1267,35 @@ class DailyLearningDashboardView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _get_period_stats(self, user, period_starts):
+        """Session stats for several periods (name -> start date) in a single query"""
+        aggregates = {}
+        for name, start in period_starts.items():
+            in_period = Q(session_date__gte=start)
+            aggregates.update({
+                f'{name}_total_sessions': models.Count('id', filter=in_period),
+                f'{name}_total_questions': models.Sum('completed_questions', filter=in_period),
+                f'{name}_correct_answers': models.Sum('correct_answers', filter=in_period),
+                f'{name}_points_earned': models.Sum('points_earned', filter=in_period),
+                f'{name}_days_active': models.Count('session_date', distinct=True, filter=in_period),
+            })
+
+        totals = DailyLearningSession.objects.filter(
+            user=user,
+            session_date__gte=min(period_starts.values())
+        ).aggregate(**aggregates)
+
+        return {
+            name: {
+                stat: totals[f'{name}_{stat}'] or 0
+                for stat in [
+                    'total_sessions', 'total_questions', 'correct_answers',
+                    'points_earned', 'days_active'
+                ]
+            }
+            for name in period_starts
+        }
+
     def _generate_achievements(self, user, learning_streak, settings):
         """Generate user achievements based on progress"""
         achievements = []
@@ -1253,6 +1342,20 @@ class DailyLearningDashboardView(views.APIView):
         return achievements
 
 
+class DashboardCacheStatsView(views.APIView):
+    """Hit-rate metrics of the dashboard snapshot cache"""
+
+    def get(self, request):
+        return Response(get_dashboard_cache_stats())
+
+
+class TokenCacheStatsView(views.APIView):
+    """Hit-rate metrics of the token authentication cache (this process)"""
+
+    def get(self, request):
+        return Response(token_cache.stats())
+
+
 class DailyLearningSessionView(views.APIView):
     """Create and manage daily learning sessions"""
 
@@ -1269,7 +1372,7 @@ class DailyLearningSessionView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
 
             # Get today's date
             from django.utils import timezone
@@ -1335,7 +1438,7 @@ class DailyLearningSessionView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
 
             # Get today's date
             from django.utils import timezone
@@ -1377,6 +1480,7 @@ class DailyLearningSessionView(views.APIView):
 class DailyLearningAnswerView(views.APIView):
     """Submit answers for daily learning sessions"""
 
+    @idempotent('daily-learning-answer')
     def post(self, request):
         """Submit answer for a learning session"""
         try:
@@ -1384,7 +1488,6 @@ class DailyLearningAnswerView(views.APIView):
             session_id = request.data.get('session_id', '')
             question_id = request.data.get('question_id', '')
             user_answer = request.data.get('user_answer', '')
-            time_taken = request.data.get('time_taken', 0)
 
             if not username or not session_id or not question_id or not user_answer:
                 return Response(
@@ -1392,7 +1495,14 @@ class DailyLearningAnswerView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            time_taken = parse_count(request.data.get('time_taken'), default=0)
+            if time_taken is None:
+                return Response(
+                    {'error': 'time_taken phải là số nguyên không âm'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            user = get_user_or_404(username)
             session = get_object_or_404(DailyLearningSession, id=session_id, user=user)
             question = get_object_or_404(Question, id=question_id)
 
@@ -1403,57 +1513,58 @@ class DailyLearningAnswerView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Check if question already answered in this session
-            existing_answer = DailyLearningQuestion.objects.filter(
-                session=session,
-                question=question
-            ).first()
-
-            if existing_answer:
-                # Update existing answer
-                existing_answer.user_answer = user_answer
-                existing_answer.attempts += 1
-                existing_answer.time_taken += time_taken
-            else:
-                # Create new answer
-                existing_answer = DailyLearningQuestion.objects.create(
-                    session=session,
-                    question=question,
-                    user_answer=user_answer,
-                    time_taken=time_taken
-                )
-
             # Calculate similarity
             similarity = calculate_similarity(user_answer, question.english_text)
             is_correct = similarity > 0.8
 
-            # Update answer record
-            existing_answer.is_correct = is_correct
-            existing_answer.similarity_score = similarity
-            existing_answer.save()
-
-            # Update session progress
-            if is_correct:
-                session.correct_answers += 1
-
-            session.completed_questions += 1
-
-            # Calculate points for this answer based on similarity percentage
-            # Points range: 1-10 points based on accuracy (0.1 to 1.0 similarity)
-            points_for_this_answer = max(1, int(similarity * 10))  # Min 1 point, max 10 points
-            session.points_earned += points_for_this_answer
-
-            # Check if session is completed
-            if session.completed_questions >= session.target_questions:
-                session.mark_completed()
-
-            session.save()
+            with transaction.atomic():
+                # Count another attempt on an answered question with one UPDATE
+                answer_fields = {'user_answer': user_answer, 'is_correct': is_correct, 'similarity_score': similarity}
+                if increment(
+                    DailyLearningQuestion,
+                    {'session': session, 'question': question},
+                    {'attempts': 1, 'time_taken': time_taken},
+                    assign=answer_fields
+                ) is None:
+                    DailyLearningQuestion.objects.create(
+                        session=session,
+                        question=question,
+                        time_taken=time_taken,
+                        **answer_fields
+                    )
 
-            # Update user points
-            user_points, _ = UserPoints.objects.get_or_create(user=user)
-            user_points.total_points += points_for_this_answer
-            user_points.weekly_points += points_for_this_answer
-            user_points.save()
+                # Calculate points for this answer based on similarity percentage
+                # Points range: 1-10 points based on accuracy (0.1 to 1.0 similarity)
+                points_for_this_answer = max(1, int(similarity * 10))  # Min 1 point, max 10 points
+
+                # Update session progress with one UPDATE
+                apply_values(session, increment(
+                    DailyLearningSession,
+                    {'pk': session.pk},
+                    {
+                        'completed_questions': 1,
+                        'correct_answers': 1 if is_correct else 0,
+                        'points_earned': points_for_this_answer
+                    },
+                    returning=['completed_questions', 'correct_answers', 'points_earned', 'is_completed']
+                ))
+
+                # Check if session is completed
+                if session.completed_questions >= session.target_questions:
+                    session.mark_completed()
+
+                # Log the answer; points, rollups, streak and tasks follow from the event
+                record_answer_event(
+                    user=user,
+                    question=question,
+                    source=session.exercise_type,
+                    is_correct=is_correct,
+                    similarity_score=similarity,
+                    points=points_for_this_answer,
+                    seconds_spent=time_taken,
+                    session=session,
+                    activity_date=session.session_date
+                )
 
             return Response({
                 'message': 'Nộp bài thành công!',
@@ -1492,7 +1603,7 @@ class DailyLearningSettingsView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
             settings, created = DailyLearningSettings.objects.get_or_create(
                 user=user,
                 defaults={
@@ -1520,7 +1631,7 @@ class DailyLearningSettingsView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
             settings, created = DailyLearningSettings.objects.get_or_create(user=user)
 
             # Update settings
@@ -1575,7 +1686,7 @@ class DailyLearningResetSessionView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
             session = get_object_or_404(DailyLearningSession, id=session_id, user=user)
 
             # Delete all questions for this session
@@ -1618,7 +1729,7 @@ class DailyLearningHistoryView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            user = get_object_or_404(User, username=username)
+            user = get_user_or_404(username)
 
             # Calculate date range
             from django.utils import timezone
@@ -1638,10 +1749,16 @@ class DailyLearningHistoryView(views.APIView):
             # Calculate pagination
             start_index = (page - 1) * page_size
             end_index = start_index + page_size
-            paginated_sessions = sessions[start_index:end_index]
+            # Answers and their questions/topics load in one extra query per page
+            paginated_sessions = sessions.prefetch_related(
+                Prefetch(
+                    'session_questions',
+                    queryset=DailyLearningQuestion.objects.select_related('question__topic')
+                )
+            )[start_index:end_index]
 
             # Serialize
-            serializer = DailyLearningSessionDetailSerializer(paginated_sessions, many=True)
+            serializer = DailyLearningHistorySerializer(paginated_sessions, many=True)
 
             # Calculate pagination info
             total_pages = (total_count + page_size - 1) // page_size
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -97,6 +99,31 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Dashboard snapshots with their invalidation counters and the weekly task
+# definition version live in this cache, so every worker process and the
+# management commands that invalidate them (rollover_week,
+# rebuild_projections) must share it. Set REDIS_URL in production; the
+# in-memory fallback is per process and only suits a single development
+# server (the api.W001 system check warns about it when DEBUG is off).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,6 +161,24 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(FRONTEND_DIR, 'build', 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+# Uploaded files (queued question imports)
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Write-behind buffer for practice answers (CheckAnswerView). When enabled,
+# answers are inserted in batches by a background thread; answers still in
+# memory are lost if the process is killed.
+ANSWER_WRITE_BEHIND = {
+    'ENABLED': False,
+    'MAX_SIZE': 10000,         # rows held in memory before falling back to direct inserts
+    'FLUSH_ROWS': 500,         # flush as soon as this many rows are queued
+    'FLUSH_INTERVAL_MS': 200,  # ...or after this long
+}
+
+# Answer endpoints replay the stored response for a repeated Idempotency-Key
+# within this many seconds (older keys are deleted by purge_idempotency_keys)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -142,7 +187,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -171,3 +216,6 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Allow all headers and methods for development
 CORS_ALLOW_ALL_ORIGINS = DEBUG
+
+# Clients may send Idempotency-Key when submitting answers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
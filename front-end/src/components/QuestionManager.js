@@ -1,7 +1,13 @@
-import React, { useState, useEffect } from 'react';
-import { getAllQuestions, addQuestion, updateQuestion, deleteQuestion, getQuestion, getTopics, importQuestionsFromFile } from '../services/api';
+import React, { useState, useEffect, useRef } from 'react';
+import { getAllQuestions, addQuestion, updateQuestion, deleteQuestion, getQuestion, getTopics, importQuestionsFromFile, getImportJob } from '../services/api';
 import 'bootstrap/dist/css/bootstrap.min.css';
 
+// Import job polling: once per second, for at most 10 minutes
+const IMPORT_POLL_INTERVAL_MS = 1000;
+const IMPORT_POLL_MAX_ATTEMPTS = 600;
+
+const isImportRunning = (job) => job.status === 'pending' || job.status === 'running';
+
 const QuestionManager = () => {
   const [questions, setQuestions] = useState([]);
   const [topics, setTopics] = useState([]);
@@ -42,11 +48,23 @@ const QuestionManager = () => {
     search: ''
   });
 
+  // Stops the import poll loop when the component unmounts
+  const isMounted = useRef(true);
+  const importPollTimer = useRef(null);
+
   useEffect(() => {
     fetchQuestions();
     loadTopics();
   }, []);
 
+  useEffect(() => {
+    isMounted.current = true;
+    return () => {
+      isMounted.current = false;
+      clearTimeout(importPollTimer.current);
+    };
+  }, []);
+
   const loadTopics = async () => {
     try {
       const topicsData = await getTopics();
@@ -134,8 +152,8 @@ const QuestionManager = () => {
       return;
     }
 
-    if (!file.name.endsWith('.txt')) {
-      alert('Chỉ hỗ trợ file .txt!');
+    if (!/\.(txt|csv|tsv|jsonl|ndjson)$/i.test(file.name)) {
+      alert('Chỉ hỗ trợ file .txt, .csv, .tsv hoặc .jsonl!');
       return;
     }
 
@@ -143,8 +161,28 @@ const QuestionManager = () => {
     setImportResult(null);
 
     try {
-      const result = await importQuestionsFromFile(file);
-      setImportResult(result);
+      const { job_id: jobId } = await importQuestionsFromFile(file);
+
+      // Poll the background import job until it finishes or we give up waiting
+      let job = await getImportJob(jobId);
+      for (let attempt = 0; isImportRunning(job) && attempt < IMPORT_POLL_MAX_ATTEMPTS; attempt++) {
+        setImportResult(job);
+        await new Promise((resolve) => {
+          importPollTimer.current = setTimeout(resolve, IMPORT_POLL_INTERVAL_MS);
+        });
+        job = await getImportJob(jobId);
+        if (!isMounted.current) {
+          return;
+        }
+      }
+      if (!isMounted.current) {
+        return;
+      }
+      setImportResult(job);
+      if (isImportRunning(job)) {
+        alert('File vẫn đang được import. Vui lòng kiểm tra lại danh sách câu hỏi sau.');
+        return;
+      }
 
       // Refresh danh sách
       await fetchQuestions();
@@ -577,17 +615,18 @@ const QuestionManager = () => {
                     <form onSubmit={handleImportFile}>
                       <div className="mb-3">
                         <label htmlFor="file" className="form-label fw-bold">
-                          Chọn file (.txt):
+                          Chọn file (.txt, .csv, .tsv, .jsonl):
                         </label>
                         <input
                           type="file"
                           className="form-control"
                           id="file"
-                          accept=".txt"
+                          accept=".txt,.csv,.tsv,.jsonl,.ndjson"
                           required
                         />
                         <div className="form-text">
-                          File phải có định dạng: Question: [câu hỏi] Answer: [câu trả lời] Topic: [chủ đề] Status: [độ khó]
+                          File .txt phải có định dạng: Question: [câu hỏi] Answer: [câu trả lời] Topic: [chủ đề] Status: [độ khó].
+                          File CSV/TSV/JSONL dùng các cột vietnamese, english, topic, difficulty.
                         </div>
                       </div>
 
@@ -633,9 +672,29 @@ Status: Trung bình`}
                       <div className="mt-3">
                         <div className={`alert ${importResult.error_count > 0 ? 'alert-warning' : 'alert-success'}`}>
                           <h6>Kết quả import:</h6>
+                          {isImportRunning(importResult) && (
+                            <p className="mb-1">
+                              <strong>⏳ {importResult.status_display}:</strong> đã đọc {importResult.parsed_count} câu hỏi ({importResult.throughput} câu/giây)
+                            </p>
+                          )}
+                          {importResult.status === 'failed' && (
+                            <p className="mb-1">
+                              <strong>❌ Thất bại:</strong> {importResult.error_message}
+                            </p>
+                          )}
                           <p className="mb-1">
                             <strong>✔️ Thành công:</strong> {importResult.created_count} câu hỏi
                           </p>
+                          {importResult.near_duplicate_count > 0 && (
+                            <p className="mb-1">
+                              <strong>⚠️ Gần trùng lặp{importResult.near_duplicate_mode === 'skip' ? ' (bỏ qua)' : ''}:</strong> {importResult.near_duplicate_count} câu hỏi
+                            </p>
+                          )}
+                          {importResult.duplicate_count > 0 && (
+                            <p className="mb-1">
+                              <strong>🔁 Trùng lặp (bỏ qua):</strong> {importResult.duplicate_count} câu hỏi
+                            </p>
+                          )}
                           {importResult.error_count > 0 && (
                             <p className="mb-1">
                               <strong>❌ Lỗi:</strong> {importResult.error_count} câu hỏi
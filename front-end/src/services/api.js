@@ -257,6 +257,16 @@ export const importQuestionsFromFile = async (file) => {
   }
 };
 
+export const getImportJob = async (jobId) => {
+  try {
+    const response = await api.get(`/questions/import/${jobId}/`);
+    return response.data;
+  } catch (error) {
+    console.error('Lỗi khi lấy tiến trình import:', error);
+    throw error;
+  }
+};
+
 // User endpoints
 export const userLogin = async (username) => {
   try {
@@ -291,12 +301,11 @@ export const getTaskDashboard = async (username) => {
   }
 };
 
-export const updateTaskProgress = async (username, taskId, increment = 1) => {
+export const updateTaskProgress = async (username, taskId) => {
   try {
     const response = await api.post('/tasks/progress/', {
       username: username,
-      task_id: taskId,
-      increment: increment
+      task_id: taskId
     });
     return response.data;
   } catch (error) {
@@ -330,6 +339,30 @@ export const getLeaderboard = async (type = 'total', limit = 10) => {
   }
 };
 
+export const getLeaderboardAround = async (username, type = 'total', radius = 5) => {
+  try {
+    const response = await api.get('/leaderboard/', {
+      params: { type, around: username, radius }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Lỗi khi lấy vị trí trên bảng xếp hạng:', error);
+    throw error;
+  }
+};
+
+export const getArchivedWeeklyLeaderboard = async (weekStart, limit = 10) => {
+  try {
+    const response = await api.get('/leaderboard/', {
+      params: { type: 'weekly', week_start: weekStart, limit }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Lỗi khi lấy bảng xếp hạng tuần trước:', error);
+    throw error;
+  }
+};
+
 // Weekly Question System endpoints
 export const getWeeklyQuestionSets = async () => {
   try {
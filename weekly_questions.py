@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import django
@@ -28,10 +29,13 @@ def create_topics():
         if created:
             print(f"Created topic: {topic_name}")
 
-def load_sample_questions():
-    """Load sample questions using Django management command"""
+def load_sample_questions(paths):
+    """Load question files using the load_questions management command"""
+    if not paths:
+        print("No question files given, skipping")
+        return
     try:
-        call_command('load_sample_questions')
+        call_command('load_questions', *paths)
         print("Sample questions loaded successfully")
     except Exception as e:
         print(f"Error loading sample questions: {e}")
@@ -44,7 +48,20 @@ def create_weekly_question_set():
     except Exception as e:
         print(f"Error creating weekly question set: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Create topics, load question files and create the weekly question set'
+    )
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        metavar='file-or-dir',
+        help='Question files (.txt, .csv, .tsv, .jsonl) or directories to load with load_questions'
+    )
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
     print("Starting fix for weekly questions...")
 
     # Step 1: Create topics
@@ -53,7 +70,7 @@ def main():
 
     # Step 2: Load sample questions
     print("\n2. Loading sample questions...")
-    load_sample_questions()
+    load_sample_questions(args.paths)
 
     # Step 3: Create weekly question set
     print("\n3. Creating weekly question set...")